@@ -1,11 +1,14 @@
 import os
+import sys
 import functools
 import operator
 import itertools
 from time import sleep
 import signal
-from tqdm.auto import tqdm
 import requests
+# the shared rit package lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import rit
 import api_helpers
 import helpers
 import constants
@@ -14,29 +17,40 @@ import constants
 # this is the main method containing the actual order routing logic
 def main():
     # creates a session to manage connections and requests to the RIT Client
-    with requests.Session() as s:
-        
-        # add the API key to the session to authenticate during requests
-        s.headers.update(constants.API_KEY)
+    # orders are paced at one every RATE_LIMIT seconds
+    with rit.Client(constants.API_KEY, governor=rit.Governor(order_rate=1 / constants.RATE_LIMIT)) as client:
+        s = client.session
         
         helpers.session = s
         
+        # The risk gate starts from the positions we already have and follows our orders from here
+        securities = api_helpers.get_from_api(s, "securities").json()
+        helpers.risk_gate.sync({security["ticker"]: security["position"] for security in securities})
+        
         # r1 = s.post("http://localhost:9999/v1/orders", params={"ticker": "CRZY_M", "type": "MARKET", "quantity": 1000, "action": "BUY"})
         
         
-        while True:
+        def arbitrage(tick, array_books):
+            # Gets book information
+            books_with_fees, changes = array_books
 
-            # get the current time of the case
-            tick = api_helpers.get_tick(s)
-            
-            # Gets book, portfolio information
-            books_with_fees = api_helpers.get_books(session=s, with_fees=True)
-            
             # Gets the information about possible arbitrage opportunities (from helpers)
             amounts = helpers.arbitrage_opportunity(books_with_fees)
 
             # Tries to arbitrage
             helpers.try_arbitrage(amounts=amounts, session=s)
+
+            # Checks that both legs filled and flattens any residual
+            helpers.reconciler.reconcile(session=s, books_with_fees=books_with_fees)
+            if constants.DEBUG:
+                print(helpers.reconciler.stats())
+                print(helpers.risk_gate.stats())
+
+        # Look for arbitrage whenever a book changes instead of polling as fast as possible
+        scheduler = rit.Scheduler(client.get_case, tick_seconds=1 / constants.SPEED)
+        scheduler.on_change(lambda: api_helpers.get_array_books(session=s), arbitrage, milliseconds=10,
+                            changed=lambda array_books: any(array_books[1].values()))
+        scheduler.run()
             
                 
 
@@ -1,12 +1,16 @@
 import os
+import sys
 import functools
 import operator
 import itertools
 from time import sleep
 import signal
 import requests
-from tqdm.auto import tqdm
 import constants
+# the shared rit package lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rit.book_store import BookStore
+from rit.governor import CircuitOpen, backoff_delay
 
 
 class ApiException(Exception):
@@ -49,17 +53,26 @@ def get_from_api(session, url):
         requests.Response: The HTTP response object returned by the API call.
     """
         
-    response = session.get(f'http://localhost:9999/v1/{url}')
-    while(response.status_code != 200):
-    
+    # The session's governor paces the reads, waits out 429s and backs off on server errors, so
+    # this loop only sends the read again (after a jittered backoff) if that still didn't work
+    attempt = 0
+    while True:
+        try:
+            response = session.get(f'http://localhost:9999/v1/{url}')
+        except CircuitOpen as exception:
+            sleep(exception.retry_in)
+            continue
+        
+        if response.status_code == 200:
+            return response
+        
         if response.status_code == 401:
             raise ApiException(
                 'The API key provided in this Python code must match that in the RIT client '
                 '(please refer to the API hyperlink in the client toolbar and/or the RIT – User Guide – REST API Documentation.pdf)'
             )
-        response = session.get(f'http://localhost:9999/v1/{url}')
-
-    return response
+        sleep(backoff_delay(attempt))
+        attempt += 1
 
 
 def post_from_api(session, url, payload):
@@ -73,20 +86,23 @@ def post_from_api(session, url, payload):
 
     Raises:
         ApiException: If the API returns a 401 Unauthorized status code, indicating that the API key is incorrect.
+        requests.exceptions.ConnectionError: If the post couldn't be sent (or the circuit breaker is open).
 
     Returns:
         requests.Response: The HTTP response object returned by the API call.
     """
         
+    # The session's governor sends the post again after a 429 (it wasn't processed). Anything else
+    # isn't sent again because the order might have gone through
     response = session.post(f'http://localhost:9999/v1/{url}', params=payload)
-    while(response.status_code != 200):
     
-        if response.status_code == 401:
-            raise ApiException(
-                'The API key provided in this Python code must match that in the RIT client '
-                '(please refer to the API hyperlink in the client toolbar and/or the RIT – User Guide – REST API Documentation.pdf)'
-            )
-        response = session.get(f'http://localhost:9999/v1/{url}')
+    if response.status_code == 401:
+        raise ApiException(
+            'The API key provided in this Python code must match that in the RIT client '
+            '(please refer to the API hyperlink in the client toolbar and/or the RIT – User Guide – REST API Documentation.pdf)'
+        )
+    if response.status_code != 200:
+        print(f"POST {url} failed ({response.status_code}): {response.text}")
 
     return response
 
@@ -110,6 +126,44 @@ def get_books(session, with_fees):
     return books
 
 
+# Merged books of each security, updated from the orders that changed between polls
+book_stores = {}
+
+def get_array_books(session):
+    """Gets the books with fees as ArrayBooks, fetching each market's book once for both sides
+
+    Args:
+        session (requests.Session): An active session object configured to communicate with the RIT API
+
+    Returns:
+        tuple: ({security: {"bids": ArrayBook, "asks": ArrayBook}}, {security: BookChanges since the last poll})
+    """
+    # Fees make bids worth less and asks cost more (same as get_book)
+    bid_fees = {market: -info["MARKET_COST"] for market, info in constants.MARKETS.items()}
+    ask_fees = {market: info["MARKET_COST"] for market, info in constants.MARKETS.items()}
+    
+    books = {}
+    changes = {}
+    
+    for security in constants.SECURITIES.keys():
+        responses = {}
+        for market in constants.MARKETS.keys():
+            ticker = f"{security}_{market}" if len(constants.MARKETS.keys()) > 1 else security
+            responses[market] = get_from_api(session, f"securities/book?ticker={ticker}").json()
+        
+        if security not in book_stores:
+            book_stores[security] = BookStore(constants.MARKETS.keys())
+        
+        # Only the orders that changed are re-sorted, and the ArrayBooks are reused if nothing changed
+        changes[security] = book_stores[security].update(responses)
+        books[security] = {
+            "bids": book_stores[security].array_book("bids", bid_fees),
+            "asks": book_stores[security].array_book("asks", ask_fees),
+        }
+    
+    return books, changes
+
+
 def get_book(session, underlying_security, bid_or_ask, with_fees):
     """This function creates a list of all active orders for a security
 
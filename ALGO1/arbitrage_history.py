@@ -0,0 +1,108 @@
+import bisect
+import time
+
+
+class ArbitrageHistory:
+    """Fixed-capacity history of the arbitrage opportunities seen for one security
+
+    Events (perf_counter_ns timestamp, signed margin, venue) go in a ring buffer, so memory is bounded
+    and the oldest event is dropped once it is full. Next to it there is a sorted index of
+    (|margin|, sequence number) for the margin lookups and a running count of sign flips for the
+    time window lookups, so both are binary searches instead of scans of the whole case's history.
+    """
+
+    def __init__(self, capacity=4096):
+        """
+        Args:
+            capacity (int): most events kept
+        """
+        self.capacity = capacity
+        self.timestamps = [0] * capacity
+        self.margins = [0.0] * capacity
+        self.venues = [None] * capacity
+        self.flips = [0] * capacity     # sign flips from the first event up to (and including) each event
+        self.first = 0                  # sequence number of the oldest event kept
+        self.next = 0                   # sequence number of the next event
+        self.index = []                 # sorted (|margin|, sequence number) of the events kept
+
+    def __len__(self):
+        return self.next - self.first
+
+    def event(self, sequence):
+        """Gets an event by its sequence number
+
+        Returns:
+            tuple: (timestamp in ns, signed margin, venue)
+        """
+        slot = sequence % self.capacity
+        return (self.timestamps[slot], self.margins[slot], self.venues[slot])
+
+    def record(self, margin, venue, timestamp=None):
+        """Adds an event (dropping the oldest one if the history is full)
+
+        Args:
+            margin (float): main market - alternate market, so it's negative if the alternate market is higher
+            venue (str): market we buy on
+            timestamp (int): perf_counter_ns of the event (now by default)
+        """
+        if len(self) == self.capacity:
+            oldest = self.first % self.capacity
+            del self.index[bisect.bisect_left(self.index, (abs(self.margins[oldest]), self.first))]
+            self.first += 1
+
+        slot = self.next % self.capacity
+        flips = 0
+        if len(self):
+            previous = (self.next - 1) % self.capacity
+            flips = self.flips[previous] + ((self.margins[previous] < 0) != (margin < 0))
+
+        self.timestamps[slot] = time.perf_counter_ns() if timestamp is None else timestamp
+        self.margins[slot] = margin
+        self.venues[slot] = venue
+        self.flips[slot] = flips
+        bisect.insort(self.index, (abs(margin), self.next))
+        self.next += 1
+
+    def next_smaller(self, margin):
+        """Finds the event with the biggest |margin| below margin (not the newest event) and the event after it
+
+        Args:
+            margin (float): the margin to compare with (positive)
+
+        Returns:
+            tuple: (event, the event after it), or None if there isn't one
+        """
+        position = bisect.bisect_left(self.index, (abs(margin), -1)) - 1
+        while position >= 0 and self.index[position][1] == self.next - 1:
+            position -= 1
+        if position < 0:
+            return None
+        sequence = self.index[position][1]
+        return self.event(sequence), self.event(sequence + 1)
+
+    def flips_within(self, milliseconds, now=None):
+        """Counts the times the sign of the margin flipped in the last milliseconds
+
+        Args:
+            milliseconds (float): size of the window
+            now (int): perf_counter_ns the window ends at (now by default)
+
+        Returns:
+            int: sign flips between events in the window
+        """
+        if not len(self):
+            return 0
+        now = time.perf_counter_ns() if now is None else now
+        start = now - milliseconds * 1_000_000
+
+        # Timestamps only go up, so binary search the ring buffer for the first event in the window
+        low, high = self.first, self.next
+        while low < high:
+            middle = (low + high) // 2
+            if self.timestamps[middle % self.capacity] < start:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.next:
+            return 0
+        return self.flips[(self.next - 1) % self.capacity] - self.flips[low % self.capacity]
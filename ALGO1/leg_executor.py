@@ -0,0 +1,127 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import rit
+import constants
+import api_helpers
+
+
+def split_quantity(quantity, order_limit):
+    """Splits a quantity into child orders of at most order_limit
+
+    Returns:
+        list of ints: quantity of each child order
+    """
+    children = [order_limit] * (quantity // order_limit)
+    if quantity % order_limit:
+        children.append(quantity % order_limit)
+    return children
+
+
+class LegReport:
+    """What happened to one leg (all of its child orders)"""
+
+    __slots__ = ("ticker", "action", "quantity", "order_ids", "final", "filled", "failed", "latency")
+
+    def __init__(self, ticker, action, quantity):
+        self.ticker = ticker
+        self.action = action
+        self.quantity = quantity
+        self.order_ids = []
+        self.final = {}         # order id to quantity_filled of the children already done (not OPEN) in their response
+        self.filled = 0         # quantity filled according to the order responses
+        self.failed = 0         # quantity of child orders that weren't accepted
+        self.latency = 0.0      # seconds from sending the first child to the last child's response
+
+    def __repr__(self):
+        return (f"LegReport({self.action} {self.quantity} {self.ticker}: filled={self.filled}, failed={self.failed}, "
+                f"orders={len(self.order_ids)}, latency={self.latency * 1000:.1f}ms)")
+
+
+class LegExecutor:
+    """Sends both legs of an arbitrage at the same time
+
+    Each leg is split into child orders of at most ORDER_LIMIT and every child of both legs is sent
+    on a thread pool, alternating between the legs so the governor's order pacing keeps them even.
+    The unhedged window is then about one round trip instead of one per order. The session's
+    governor keeps the children within the rate limit. Every accepted child is passed on to the
+    risk gate, so its exposure includes the fills. Leg latencies (per ticker) and the gap between
+    the legs go in latency histograms.
+    """
+
+    def __init__(self, max_workers=16, risk=None):
+        """
+        Args:
+            max_workers (int): most child orders in flight at the same time (the session's pool size)
+            risk (rit.RiskGate): kept up to date with the children's fills (None for no risk gate)
+        """
+        self.max_workers = max_workers
+        self.risk = risk
+        self._executor = None
+        self.latencies = {}     # ticker to LatencyHistogram of its leg latencies
+        self.gaps = rit.LatencyHistogram()     # time between the two legs finishing
+
+    def execute(self, session, legs):
+        """Sends every leg at the same time
+
+        Args:
+            session (requests.Session): An active session object configured to communicate with the RIT API.
+            legs (list of tuples): (ticker, action, quantity) of each leg, like ("CRZY_A", "BUY", 2500)
+
+        Returns:
+            list of LegReports: one for each leg, in the same order
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        reports = [LegReport(ticker, action, quantity) for ticker, action, quantity in legs]
+        children = [split_quantity(quantity, constants.TRADING_LIMITS["ORDER_LIMIT"]) for ticker, action, quantity in legs]
+
+        # Alternate between the legs so neither leg waits behind all of the other one's children
+        start = time.perf_counter()
+        futures = []
+        for i in range(max(len(leg_children) for leg_children in children)):
+            for report, leg_children in zip(reports, children):
+                if i < len(leg_children):
+                    payload = {"ticker": report.ticker, "type": "MARKET", "quantity": leg_children[i], "action": report.action}
+                    futures.append((report, leg_children[i], self._executor.submit(self._send, session, payload, start)))
+
+        for report, quantity, future in futures:
+            response, finished = future.result()
+            report.latency = max(report.latency, finished)
+            if response is not None and response.status_code == 200:
+                order = response.json()
+                if self.risk is not None:
+                    self.risk.update(order)
+                report.order_ids.append(order["order_id"])
+                if order.get("status", "OPEN") != "OPEN":
+                    report.final[order["order_id"]] = order.get("quantity_filled", 0)
+                report.filled += order.get("quantity_filled", 0)
+            else:
+                report.failed += quantity
+
+        for report in reports:
+            if report.ticker not in self.latencies:
+                self.latencies[report.ticker] = rit.LatencyHistogram()
+            self.latencies[report.ticker].record(report.latency)
+        if len(reports) == 2:
+            self.gaps.record(abs(reports[0].latency - reports[1].latency))
+        return reports
+
+    @staticmethod
+    def _send(session, payload, start):
+        try:
+            response = api_helpers.post_from_api(session, "orders", payload)
+        except Exception as exception:
+            # A child that couldn't be sent shows up as failed quantity instead of stopping the other children
+            print(f"Order {payload} failed: {exception}")
+            response = None
+        return response, time.perf_counter() - start
+
+    def stats(self):
+        """Gets the leg latency histogram per ticker and the gap between legs (ms)
+
+        Returns:
+            dict: {"legs": {ticker: latency}, "gap": latency}, each latency with count, average, p50, p90, p99 and worst
+        """
+        return {"legs": {ticker: histogram.summary() for ticker, histogram in self.latencies.items()},
+                "gap": self.gaps.summary()}
@@ -0,0 +1,121 @@
+import time
+import api_helpers
+
+
+class Reconciler:
+    """Checks that both legs of each arbitrage filled and flattens whatever is left over
+
+    Every arbitrage's order ids are kept until its legs net out. A market order's response
+    usually already has its final fill (TRANSACTED, or CANCELLED with what it filled), so those
+    fills are taken from the leg reports. Only an order that was still OPEN in its response is
+    read again, with one GET /orders/{id}, so a reconcile doesn't read the case's order history.
+    An arbitrage with an order still open waits for the next reconcile. Any residual is traded away
+    right away on the market with the best fee-adjusted price, and the time from the arbitrage to
+    being flat is recorded per security. With a risk gate, every order read again is passed on to
+    it (so fills after the order's response reach its exposure), and the orders of an arbitrage
+    are forgotten by it once the arbitrage is flat.
+    """
+
+    def __init__(self, leg_executor, risk=None):
+        """
+        Args:
+            leg_executor (LegExecutor): sends the hedge orders
+            risk (rit.RiskGate): kept up to date with the fills read by the reconcile (None for no risk gate)
+        """
+        self.leg_executor = leg_executor
+        self.risk = risk
+        self.pending = []           # [security, order ids and the sign of their fills, perf_counter of the arbitrage]
+        self.time_to_flat = {}      # security to list of seconds
+        self.hedged = {}            # security to quantity traded to flatten residuals
+        self.fills = {}             # order id to final quantity_filled of the tracked orders that are done
+        self.lookups = 0            # GET /orders/{id} sent for orders still open in their response
+
+    def track(self, security, reports, started=None):
+        """Starts tracking the orders of one arbitrage
+
+        Args:
+            security (str): underlying security (like CRZY)
+            reports (list of LegReports): the legs sent for the arbitrage
+            started (float): perf_counter when the arbitrage was sent (now by default)
+        """
+        orders = [(order_id, 1 if report.action == "BUY" else -1) for report in reports for order_id in report.order_ids]
+        for report in reports:
+            self.fills.update(report.final)
+        self.pending.append([security, orders, time.perf_counter() if started is None else started])
+
+    def reconcile(self, session, books_with_fees):
+        """Confirms the fills of every arbitrage not yet flat and flattens the residuals
+
+        Args:
+            session (requests.Session): An active session object configured to communicate with the RIT API.
+            books_with_fees (dict of dicts of ArrayBooks): books with fees by security and bids/asks
+
+        Returns:
+            dict: security to the residual that was sent to be flattened
+        """
+        if not self.pending:
+            return {}
+
+        hedges = {}
+        still_pending = []
+        for arbitrage in self.pending:
+            security, orders, started = arbitrage
+
+            # Only the orders whose final fill isn't known yet are read
+            open_orders = False
+            for order_id, sign in orders:
+                if order_id not in self.fills:
+                    order = api_helpers.get_from_api(session, f"orders/{order_id}").json()
+                    self.lookups += 1
+                    if self.risk is not None:
+                        self.risk.update(order)
+                    if order["status"] == "OPEN":
+                        open_orders = True
+                    else:
+                        self.fills[order_id] = order["quantity_filled"]
+            if open_orders:
+                still_pending.append(arbitrage)
+                continue
+
+            residual = sum(sign * self.fills[order_id] for order_id, sign in orders)
+
+            if residual == 0:
+                self.time_to_flat.setdefault(security, []).append(time.perf_counter() - started)
+                for order_id, sign in orders:
+                    del self.fills[order_id]
+                    if self.risk is not None:
+                        self.risk.forget(order_id)
+                continue
+
+            # Long means selling into the best bid, short means buying from the best ask (after fees)
+            side = "bids" if residual > 0 else "asks"
+            book = books_with_fees[security][side]
+            front = book.front()
+            if front >= len(book.prices):
+                # Nothing to trade against yet, try again next time
+                still_pending.append(arbitrage)
+                continue
+            market = str(book.markets[front])
+            reports = self.leg_executor.execute(session, [(security + "_" + market, "SELL" if residual > 0 else "BUY", int(abs(residual)))])
+
+            orders.extend((order_id, 1 if report.action == "BUY" else -1) for report in reports for order_id in report.order_ids)
+            for report in reports:
+                self.fills.update(report.final)
+            self.hedged[security] = self.hedged.get(security, 0) + abs(residual)
+            hedges[security] = hedges.get(security, 0) + residual
+            still_pending.append(arbitrage)
+
+        self.pending = still_pending
+        return hedges
+
+    def stats(self):
+        """Gets the time to flat (seconds) and hedged quantity per security and how many arbitrages aren't flat yet
+
+        Returns:
+            dict: {"securities": {security: {"count", "average", "worst", "hedged"}}, "pending": int, "lookups": int}
+        """
+        securities = {}
+        for security, times in self.time_to_flat.items():
+            securities[security] = {"count": len(times), "average": sum(times) / len(times), "worst": max(times),
+                                    "hedged": self.hedged.get(security, 0)}
+        return {"securities": securities, "pending": len(self.pending), "lookups": self.lookups}
@@ -1,27 +1,75 @@
+import os
+import sys
 import signal
+import threading
 import requests
 import time
 from time import sleep
+# the shared rit package lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import rit
+from rit.governor import CircuitOpen
+from market_snapshot import MarketSnapshot, MarketDataPoller
+from order_store import OrderStore
+from repricer import Repricer
+from fair_value import FairValue
+from quote_table import QuoteTable
+from queue_tracker import QueueTracker
 
 # --------------------------
 # Global settings and API key
 # --------------------------
 API_KEY = {'X-API-Key': 'ABIXYN28'}
-SPREAD = 0.01              # Price offset for bid/ask
-ORDER_VOLUME = 100         # Volume per order (each side)
+TICKERS = ['ALGO']         # Securities quoted at the same time, each by its own quoting loop
+SPREAD = 0.01              # Smallest price offset for bid/ask
+ORDER_VOLUME = 5000        # Volume per order (each side) while flat
 ORDER_RATE = 10            # Maximum orders per second allowed by the API
 MIN_SPEED_BUMP = 0.01      # Minimum delay between orders (in seconds)
 CASE_START = 1             # Case start time (seconds)
 CASE_END = 300             # Case end time (seconds)
 POSITION_LIMIT = 25001     # Maximum allowed net position (positive or negative)
+SNAPSHOT_TTL = 0.05        # Seconds market data is reused within one quoting decision
+POLL_INTERVAL = 0.025      # Seconds between the market data poller's reads of every book
+FAIR_VALUE_THRESHOLD = 0.01  # How far fair value must move before quotes are sent again
+REQUOTE_HORIZON = 0.5      # Orders expected to fill within this many seconds keep their place in the queue
+DEBUG = False
 
 shutdown = False
-total_speed_bump = 0.0
-order_count = 0
 
-# Global orders is a dictionary, keyed by order_id.
-orders = {}
-local_portfolio_position = 0
+# Books and the case tick, kept fresh by the market data poller and shared by every quoting loop.
+snapshot = MarketSnapshot(ttl=SNAPSHOT_TTL)
+
+# Paces the quote pairs of all the loops to hold a share of ORDER_RATE from the orders actually accepted.
+rate_controller = rit.RateController(ORDER_RATE, min_delay=MIN_SPEED_BUMP)
+
+# Checks every quote against POSITION_LIMIT from the exposure of all the tickers' orders, kept up to
+# date by their order stores.
+risk_gate = rit.RiskGate({'SECURITY_LIMIT': POSITION_LIMIT})
+
+class TickerState:
+    """
+    Everything the quoting loop of one ticker keeps to itself: its orders, position and quoting state.
+    """
+    def __init__(self, ticker):
+        self.ticker = ticker
+        # Indexed store of this ticker's orders, keyed by order_id.
+        self.orders = OrderStore(risk=risk_gate)
+        self.position = 0
+        # Moves quotes in batches: one bulk cancel, then the replacements at the same time.
+        self.repricer = Repricer(self.orders, risk=risk_gate)
+        # Fair value from the book that the quotes are centered on.
+        self.fair_value = FairValue(threshold=FAIR_VALUE_THRESHOLD)
+        # Inventory-skewed offsets and sizes by inventory bucket and volatility regime (rebuilt in the
+        # background by quote_table.set_params).
+        self.quote_table = QuoteTable(POSITION_LIMIT, base_size=ORDER_VOLUME, tick=SPREAD)
+        # Shares ahead of each of our resting orders and how soon they are expected to fill.
+        self.queue_tracker = QueueTracker()
+        self.total_speed_bump = 0.0
+        self.order_count = 0
+        self.last_modify_time = 0.0
+
+# One quoting state per ticker.
+states = {ticker: TickerState(ticker) for ticker in TICKERS}
 
 # --------------------------
 # Exception and Signal Handling
@@ -33,6 +81,8 @@ def signal_handler(signum, frame):
     global shutdown
     signal.signal(signal.SIGINT, signal.SIG_DFL)
     shutdown = True
+    # No new quotes from loops that are still finishing a pass
+    risk_gate.kill('shutdown')
 
 # --------------------------
 # Helper Functions for REST API calls
@@ -43,58 +93,108 @@ def get_tick(session):
         raise ApiException('API key error.')
     return resp.json()['tick']
 
-def ticker_close(session, ticker):
+def get_case_tick(session):
+    """
+    The current tick, as last read by the market data poller (read here if it is too old).
+    """
+    return snapshot.get('tick', None, lambda: get_tick(session))
+
+def fetch_history(session, ticker):
     payload = {'ticker': ticker, 'limit': 1}
     resp = session.get('http://localhost:9999/v1/securities/history', params=payload)
     if resp.status_code == 401:
         raise ApiException('API key error.')
-    data = resp.json()
+    return resp.json()
+
+def ticker_close(session, ticker):
+    data = snapshot.get('close', ticker, lambda: fetch_history(session, ticker))
     if data:
         return data[0]['close']
     else:
         raise ApiException('No price history for ticker ' + ticker)
 
-def submit_order(session, payload):
+def submit_order(session, state, payload):
     response = session.post('http://localhost:9999/v1/orders', params=payload)
     if response.status_code == 200:
         print("Order submitted successfully.")
         data = response.json()
-        orders[data.get('order_id')] = data  # Store the order in the dictionary
+        state.orders.upsert(data)  # Store the order in the ticker's order store
     return response.status_code == 200
 
-def update_order_data(session):
-    global orders, local_portfolio_position
-    # Iterate over a copy of the dictionary items.
-    for key, order in list(orders.items()):
-        order_id = order.get('order_id')
-        response = session.get(f'http://localhost:9999/v1/orders/{order_id}')
-        if response.status_code != 200:
-            return False
-        
-        data = response.json()
-        
-        # Update local portfolio position based on changes in quantity_filled.
-        if orders[order_id].get('action') == 'BUY':
-            local_portfolio_position += orders[order_id].get('quantity_filled', 0) - data.get('quantity_filled', 0)
-        else:
-            local_portfolio_position -= orders[order_id].get('quantity_filled', 0) - data.get('quantity_filled', 0)
-        
-        # Remove fully filled orders or update the order data.
-        if data.get('quantity') == data.get('quantity_filled'):
-            del orders[order_id]
-        else:
-            orders[order_id] = data
-    return True
+def fetch_orders(session, status, ticker=None):
+    resp = session.get('http://localhost:9999/v1/orders', params={'status': status})
+    if resp.status_code == 401:
+        raise ApiException('API key error.')
+    if resp.status_code != 200:
+        return None
+    return {order['order_id']: order for order in resp.json() if ticker in (None, order['ticker'])}
 
-def get_best_prices(session, ticker):
+def fetch_order(session, order_id):
     """
-    Retrieve the current best bid and ask prices for a given ticker from the order book.
+    One order by id: the order, None if the API doesn't know it, or False if the request failed.
+    """
+    resp = session.get(f'http://localhost:9999/v1/orders/{order_id}')
+    if resp.status_code == 401:
+        raise ApiException('API key error.')
+    if resp.status_code == 404:
+        return None
+    if resp.status_code != 200:
+        return False
+    return resp.json()
+
+def update_order_data(session, state):
     """
+    Reconcile the ticker's local orders with one GET /orders?status=OPEN, so the cost doesn't grow with the
+    number of resting quotes. Only the orders that are no longer open are looked up, one
+    GET /orders/{id} each (usually one or two), for their final fills, so the cost doesn't grow with the
+    case's order history either. The order store adds the fill deltas to the position (state.position)
+    and orders that are no longer open are evicted.
+    """
+    orders = state.orders
+    open_orders = fetch_orders(session, 'OPEN', state.ticker)
+    if open_orders is None:
+        return False
+
+    final = {}
+    for order_id in orders:
+        if order_id in open_orders:
+            continue
+        data = fetch_order(session, order_id)
+        if data is False:
+            return False
+        # An order the API doesn't know (or of another ticker) is dropped without fills
+        final[order_id] = data if data is not None and data['ticker'] == state.ticker else None
+
+    for order_id, data in list(open_orders.items()) + list(final.items()):
+        if data is not None:
+            orders.upsert(data)
+
+        # Remove the orders that filled or were cancelled.
+        if order_id in final:
+            orders.remove(order_id)
+
+    # Position from every change in quantity_filled, including orders that filled as soon as they were sent
+    state.position = orders.filled_position
+    return True
+
+def fetch_book(session, ticker):
     payload = {'ticker': ticker}
     resp = session.get('http://localhost:9999/v1/securities/book', params=payload)
     if resp.status_code == 401:
         raise ApiException('API key error.')
-    data = resp.json()
+    return resp.json()
+
+def get_book(session, ticker):
+    """
+    The order book of a ticker (fetched once per quoting decision and shared through the snapshot).
+    """
+    return snapshot.get('book', ticker, lambda: fetch_book(session, ticker))
+
+def get_best_prices(session, ticker):
+    """
+    Retrieve the current best bid and ask prices for a given ticker from the order book.
+    """
+    data = get_book(session, ticker)
     best_bid = data["bids"][0]["price"] if "bids" in data and data["bids"] else None
     best_ask = data["asks"][0]["price"] if "asks" in data and data["asks"] else None
 
@@ -104,202 +204,244 @@ def get_best_prices(session, ticker):
 
     return best_bid, best_ask
 
-def buy_sell(session, ticker, last_price, spread, volume):
-    buy_price = last_price - spread
-    sell_price = last_price + spread
-    buy_payload = {'ticker': ticker, 'type': 'LIMIT', 'quantity': volume, 'action': 'BUY', 'price': buy_price}
-    sell_payload = {'ticker': ticker, 'type': 'LIMIT', 'quantity': volume, 'action': 'SELL', 'price': sell_price}
+def buy_sell(client, state, last_price, quote):
+    # Both sides are posted at the same time through the rit client (a side with no size, or that
+    # the risk gate doesn't approve, is skipped)
+    ticker = state.ticker
+    buy_price = round(last_price - quote.bid_offset, 2)
+    sell_price = round(last_price + quote.ask_offset, 2)
     start_time = time.time()
-    submit_order(session, buy_payload)
-    submit_order(session, sell_payload)
+    sides = []
+    if quote.bid_size and risk_gate.check(ticker, 'BUY', quote.bid_size):
+        sides.append(client.async_client.post_order(ticker, 'LIMIT', quote.bid_size, 'BUY', buy_price))
+    if quote.ask_size and risk_gate.check(ticker, 'SELL', quote.ask_size):
+        sides.append(client.async_client.post_order(ticker, 'LIMIT', quote.ask_size, 'SELL', sell_price))
+    if not sides:
+        return None
+    results = client.gather(*sides, return_exceptions=True)
+    for data in results:
+        if not isinstance(data, Exception):
+            print("Order submitted successfully.")
+            state.orders.upsert(data)  # Store the order in the ticker's order store
+    # The pair is one batch for the rate controller
+    accepted = sum(not isinstance(data, Exception) for data in results)
+    rate_controller.record('accepted', accepted)
+    rate_controller.record('rejected', len(results) - accepted)
+    # Our new quotes are in the book now
+    snapshot.invalidate('book', ticker)
     end_time = time.time()
     return end_time - start_time
 
-def get_orders(session, status):
-    # Return orders filtered by status if needed.
-    # If no filtering is required, return all orders as a list.
+def get_orders(session, state, status):
+    # Return the ticker's orders filtered by status if needed.
+    # If no filtering is required, return all of them as a list.
     if status:
-        return [order for order in orders.values() if order.get('status') == status]
+        return state.orders.with_status(status)
     else:
-        return list(orders.values())
+        return [state.orders.get(order_id) for order_id in state.orders]
 
-def modify_order(session, order):
+def requote_price(order, best_bid, best_ask):
     """
-    Modify an order by canceling it and re‑submitting with an updated price.
-    For a BUY order, if the current best bid is higher than the order's price, 
-    set new_price = current_price + (best_bid – current_price)/2.
-    For a SELL order, if the current best ask is lower than the order's price, 
-    set new_price = current_price - (current_price – best_ask)/2.
+    New price for an order that the touch moved away from, or None to leave it where it is.
+    For a BUY order, if the current best bid is higher than the order's price, move it to the best bid.
+    For a SELL order, if the current best ask is lower than the order's price, move it to the best ask.
     """
-    order_id = order.get('order_id')
-    action = order.get('action')
-    ticker = order.get('ticker')
-    volume = order.get('quantity') - order.get('quantity_filled')
-    current_price = order.get('price')
-
-    best_bid, best_ask = get_best_prices(session, ticker)
-
-    if action == 'BUY':
+    current_price = order.price
+    if order.action == 'BUY':
         if best_bid is not None and best_bid > current_price:
             new_price = current_price + (best_bid - current_price) #* 5 / 6
         else:
             new_price = current_price
-    elif action == 'SELL':
+    elif order.action == 'SELL':
         if best_ask is not None and best_ask < current_price:
             new_price = current_price - (current_price - best_ask) #* 5 / 6
         else:
             new_price = current_price
     else:
-        return False
+        return None
 
     new_price = round(new_price, 2)
+    return None if new_price == current_price else new_price
 
-    if new_price == current_price:
+def modify_order(session, state, order, best_prices=None):
+    """
+    Modify an order by canceling it and re‑submitting with an updated price (see requote_price).
+    best_prices is the (best_bid, best_ask) the caller decided with, read from the snapshot if None.
+    """
+    best_bid, best_ask = best_prices if best_prices is not None else get_best_prices(session, order.ticker)
+    new_price = requote_price(order, best_bid, best_ask)
+    if new_price is None:
         return False
 
-    # Cancel the existing order.
-    url = f'http://localhost:9999/v1/orders/{order_id}'
-    response = session.delete(url)
-    if response.status_code == 200:
-        print(f"Modified order ID {order_id}: {action} {volume} shares moved from {current_price:.2f} to {new_price:.2f}.")
-        payload = {
-            'ticker': ticker,
-            'type': 'LIMIT',
-            'quantity': volume,
-            'action': action,
-            'price': new_price
-        }
-        submit_order(session, payload)
-        return True
-    else:
-        return False
+    replaced = state.repricer.reprice(session, [(order, new_price)])
+    rate_controller.record('accepted', replaced)
+    # The cancel and the new quote changed the book
+    snapshot.invalidate('book', order.ticker)
+    return replaced == 1
 
-def modify_farthest_order(session, side, ticker='ALGO'):
+def order_distance(order, best_bid, best_ask):
     """
-    Modify the open order on the given side (BUY or SELL) that is farthest from the current bid/ask.
+    How far an order is from the touch (0 if it is at or through it).
+    """
+    if order.action == 'BUY' and best_bid is not None and order.price < best_bid:
+        return best_bid - order.price
+    elif order.action == 'SELL' and best_ask is not None and order.price > best_ask:
+        return order.price - best_ask
+    return 0
+
+def modify_farthest_order(session, state, side):
     """
-    open_orders = get_orders(session, 'OPEN')
-    orders_side = [order for order in open_orders if order.get('action') == side and order.get('ticker') == ticker]
-    if not orders_side:
+    Modify the ticker's open order on the given side (BUY or SELL) that is farthest from the current bid/ask.
+    """
+    if side not in ('BUY', 'SELL'):
         return False
-    best_bid, best_ask = get_best_prices(session, ticker)
-    if side == 'BUY':
-        distance = lambda o: best_bid - o.get('price') if best_bid is not None and o.get('price') < best_bid else 0
-    elif side == 'SELL':
-        distance = lambda o: o.get('price') - best_ask if best_ask is not None and o.get('price') > best_ask else 0
-    else:
+    # The lowest bid or the highest ask is the top of the side's heap
+    farthest_orders = state.orders.farthest(state.ticker, side, 1)
+    if not farthest_orders:
         return False
-    farthest_order = max(orders_side, key=distance)
-    return modify_order(session, farthest_order)
+    best_bid, best_ask = get_best_prices(session, state.ticker)
+    return modify_order(session, state, farthest_orders[0], (best_bid, best_ask))
 
-def modify_farthest_n_orders(session, n, ticker='ALGO'):
+def modify_farthest_n_orders(session, state, n):
     """
-    Modify the n open orders (across both sides) that are farthest from the current bid/ask spread.
+    Modify the ticker's n open orders (across both sides) that are farthest from the current bid/ask spread.
+    Only the n farthest of each side are looked at, taken from the order store's heaps.
     """
-    open_orders = get_orders(session, 'OPEN')
-    open_orders = [order for order in open_orders if order.get('ticker') == ticker]
+    ticker = state.ticker
+    open_orders = state.orders.farthest(ticker, 'BUY', n) + state.orders.farthest(ticker, 'SELL', n)
     if not open_orders:
         return
     best_bid, best_ask = get_best_prices(session, ticker)
-    def distance(order):
-        action = order.get('action')
-        price = order.get('price')
-        if action == 'BUY' and best_bid is not None and price < best_bid:
-            return best_bid - price
-        elif action == 'SELL' and best_ask is not None and price > best_ask:
-            return price - best_ask
-        return 0
-    open_orders.sort(key=lambda o: distance(o), reverse=True)
+    open_orders.sort(key=lambda o: order_distance(o, best_bid, best_ask), reverse=True)
     
     if len(open_orders) < n:
         n = len(open_orders)
     
     orders_to_modify = open_orders[:n]
+    # Every order is repriced against the same book, fetched once for the whole decision,
+    # and all of them are moved with one bulk cancel
+    decisions = []
     for order in orders_to_modify:
-        modify_order(session, order)
+        # Don't give up a place in the queue that is about to fill
+        if state.queue_tracker.likely_to_fill(order.order_id, REQUOTE_HORIZON):
+            continue
+        new_price = requote_price(order, best_bid, best_ask)
+        if new_price is not None:
+            decisions.append((order, new_price))
+    if decisions:
+        rate_controller.record('accepted', state.repricer.reprice(session, decisions))
+        snapshot.invalidate('book', ticker)
 
-def calculate_speed_bump(transaction_time, order_rate=ORDER_RATE):
-    required_time = 1.0 / order_rate
-    return max(required_time - transaction_time, MIN_SPEED_BUMP)
+def calculate_speed_bump(transaction_time, orders=2):
+    # The rate controller steers the pacing of every loop from the orders accepted and throttled
+    # recently, giving each ticker an equal share and never waiting less than MIN_SPEED_BUMP
+    return rate_controller.delay(orders, transaction_time, share=1.0 / len(TICKERS))
 
-def get_portfolio_position(session):
+def get_portfolio_position(session, state):
     """
-    Compute the net portfolio position for ticker 'ALGO' from executed orders.
+    Net portfolio position of the ticker from executed orders (kept up to date by the order store).
     BUY orders add to the position; SELL orders subtract.
     """
-    transacted_orders = get_orders(session, 'TRANSACTED')
-    position = 0
-    for order in transacted_orders:
-        qty = order.get('quantity', 0)
-        if order.get('action') == 'BUY':
-            position += qty
-        elif order.get('action') == 'SELL':
-            position -= qty
-    return position
-
-def get_pending_volumes(session):
+    return state.orders.transacted_position
+
+def get_pending_volumes(session, state):
+    """
+    Total pending volumes of the ticker separately for BUY and SELL orders (running totals in the order store).
+    """
+    return state.orders.pending['BUY'], state.orders.pending['SELL']
+
+def quote_pass(client, session, state):
+    """
+    One pass of a ticker's quoting loop: reconcile its orders, move the stale quotes and quote again
+    around fair value if it moved.
+    """
+    ticker = state.ticker
+    snapshot.begin()
+    update_order_data(session, state)
+    state.queue_tracker.update(get_book(session, ticker), state.orders)
+    
+    current_real_time = time.time()
+    if current_real_time - state.last_modify_time >= 0.5:
+        modify_farthest_n_orders(session, state, 2)
+        state.last_modify_time = current_real_time
+
+    # Offsets and sizes skewed by our inventory, looked up for the current volatility regime
+    quote = state.quote_table.quote(state.position, state.fair_value.volatility)
+
+    pending_buy, pending_sell = get_pending_volumes(session, state)
+    
+    # Quote around fair value from the book, only once it moved (or a side has nothing resting).
+    # The risk gate checks each side against POSITION_LIMIT, with everything resting on that side.
+    fair = state.fair_value.update(get_book(session, ticker), exclude=state.orders)
+    txn_time = None
+    if state.fair_value.requote(force=not pending_buy or not pending_sell):
+        txn_time = buy_sell(client, state, fair, quote)
+    if txn_time is not None:
+        rate_controller.record_throttles(client.governor.stats()['orders_throttled'])
+        current_speed_bump = calculate_speed_bump(txn_time, (quote.bid_size > 0) + (quote.ask_size > 0))
+        state.order_count += 1
+        state.total_speed_bump += current_speed_bump
+        avg_speed_bump = state.total_speed_bump / state.order_count
+        sleep(current_speed_bump)
+    else:
+        # Nothing moved (or neither side may be quoted): look again after about one order slot
+        # instead of spinning on reads
+        sleep(1.0 / ORDER_RATE)
+
+def quote_ticker(state, governor):
     """
-    Compute total pending volumes separately for BUY and SELL orders.
+    Quoting loop of one ticker, run on its own thread with its own client (the event loop of a
+    client can't be shared between threads) and the governor shared by every ticker. A pass whose
+    requests fail is started again, so one ticker doesn't stop quoting while the others go on.
     """
-    open_orders = get_orders(session, 'OPEN')
-    pending_buy = sum(order.get('quantity', 0) - order.get('quantity_filled', 0)
-                      for order in open_orders if order.get('action') == 'BUY')
-    pending_sell = sum(order.get('quantity', 0) - order.get('quantity_filled', 0)
-                       for order in open_orders if order.get('action') == 'SELL')
-    return pending_buy, pending_sell
+    ticker = state.ticker
+    with rit.Client(API_KEY, governor=governor) as client:
+        session = client.session
+        state.last_modify_time = time.time()
+        
+        while not shutdown:
+            try:
+                tick = get_case_tick(session)
+                if not (tick > CASE_START and tick < CASE_END):
+                    break
+                quote_pass(client, session, state)
+            except CircuitOpen as exception:
+                # The API is down: wait until the circuit breaker lets requests through again
+                print(f"{ticker}: API unavailable, retrying in {exception.retry_in:.2f}s")
+                sleep(exception.retry_in)
+            except requests.exceptions.RequestException as exception:
+                print(f"{ticker}: request failed, starting the pass again: {exception}")
+                sleep(1.0 / ORDER_RATE)
 
 # --------------------------
 # Main Trading Algorithm Logic
 # --------------------------
 def main():
-    global total_speed_bump, order_count, shutdown, ORDER_VOLUME
-    with requests.Session() as session:
-        session.headers.update(API_KEY)
-        tick = get_tick(session)
-        last_modify_time = time.time()
-        
-        while tick > CASE_START and tick < CASE_END and not shutdown:
-            
-            update_order_data(session)
-            
-            current_real_time = time.time()
-            if current_real_time - last_modify_time >= 0.5:
-                modify_farthest_n_orders(session, 2)
-                last_modify_time = current_real_time
-
-            portfolio_position = get_portfolio_position(session)
-            
-            if abs(portfolio_position) < 15000:
-                ORDER_VOLUME = 5000
-            elif abs(portfolio_position) < 20000:
-                ORDER_VOLUME = 500
-            else:
-                ORDER_VOLUME = 100
-
-            pending_buy, pending_sell = get_pending_volumes(session)
-            
-            potential_long = local_portfolio_position + pending_buy + ORDER_VOLUME
-            potential_short = local_portfolio_position - pending_sell - ORDER_VOLUME
-            
-            if potential_long > POSITION_LIMIT:
-                print(f"Potential long position exceeds limit, skipping order.\t{potential_long}")
-                continue
-            if potential_short < -POSITION_LIMIT:
-                print(f"Potential short position exceeds limit, skipping order.\t{potential_short}")
-                continue
-            
-            if (potential_long <= POSITION_LIMIT) and (potential_short >= -POSITION_LIMIT):
-                last_price = ticker_close(session, 'ALGO')
-                txn_time = buy_sell(session, 'ALGO', last_price, SPREAD, ORDER_VOLUME)
-                current_speed_bump = calculate_speed_bump(txn_time)
-                order_count += 1
-                total_speed_bump += current_speed_bump
-                avg_speed_bump = total_speed_bump / order_count
-                sleep(current_speed_bump)
-            else:
-                sleep(1)
-            
-            tick = get_tick(session)
+    # Every ticker quotes on its own loop; the order rate governor, the rate controller and the
+    # market data poller are shared by all of them
+    governor = rit.Governor(order_rate=ORDER_RATE)
+    with rit.Client(API_KEY, governor=governor) as client:
+        poller = MarketDataPoller(client, snapshot, TICKERS, interval=POLL_INTERVAL)
+        poller.start()
+        loops = [threading.Thread(target=quote_ticker, args=(states[ticker], governor), name=f"quote-{ticker}", daemon=True)
+                 for ticker in TICKERS]
+        for loop in loops:
+            loop.start()
+        for loop in loops:
+            loop.join()
+        poller.stop()
+
+        if DEBUG:
+            print(f"snapshot: {snapshot.stats()}")
+            print(f"market data: {poller.stats()}")
+            print(f"rate controller: {rate_controller.stats()}")
+            print(f"governor: {governor.stats()}")
+            print(f"risk gate: {risk_gate.stats()}")
+            for ticker, state in states.items():
+                print(f"{ticker} position: {state.position}")
+                print(f"{ticker} repricer: {state.repricer.stats()}")
+                print(f"{ticker} fair value: {state.fair_value.stats()}")
+                print(f"{ticker} queue tracker: {state.queue_tracker.stats()}")
         
 if __name__ == '__main__':
     signal.signal(signal.SIGINT, signal_handler)
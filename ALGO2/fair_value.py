@@ -0,0 +1,153 @@
+import math
+import time
+
+
+class FairValue:
+    """Streaming fair value of one ticker computed from its book, with churn suppression
+
+    Each book snapshot gives three estimates, with our own orders left out so our quotes don't
+    pull the fair value toward themselves:
+        microprice: the top of book mid weighted toward the side with less size (the price the
+            next trade leans to)
+        depth mid: the mid of the volume-weighted prices of the first `depth` levels of each side
+        last trade: orders that were in the previous snapshot and now have more filled traded at
+            their price, so trades are read off the book without another request
+    They are blended by `weights` (the last trade only once one has been seen) and smoothed with
+    an exponential moving average. The volatility of the blended estimate (price per square root
+    second) is tracked as a moving average of its squared changes per second. requote() says
+    whether fair value moved at least `threshold` from where we last quoted, so quotes are only
+    sent again when the market really moved.
+    """
+
+    def __init__(self, threshold=.01, weights=(.5, .3, .2), depth=5, smoothing=.5, volatility_smoothing=.05):
+        """
+        Args:
+            threshold (float): how far fair value must move from the last quote to quote again
+            weights (tuple of floats): weights of the microprice, the depth mid and the last trade
+            depth (int): levels of each side in the depth mid
+            smoothing (float): weight of the newest estimate in the moving average (1 for none)
+            volatility_smoothing (float): weight of the newest squared change in the volatility's moving average
+        """
+        self.threshold = threshold
+        self.weights = weights
+        self.depth = depth
+        self.smoothing = smoothing
+        self.volatility_smoothing = volatility_smoothing
+
+        self.value = None
+        self.microprice = None
+        self.depth_mid = None
+        self.last_trade = None
+        self.estimate = None    # latest blended estimate before smoothing
+        self.estimated_at = None
+        self.variance = None    # of the estimate, per second
+        self.filled = {}        # order id to quantity_filled in the previous snapshot
+        self.quoted_at = None   # fair value when we last quoted
+        self.updates = 0
+        self.requotes = 0
+        self.suppressed = 0
+
+    def update(self, book, exclude=()):
+        """Updates fair value from a book snapshot
+
+        Args:
+            book (dict): the /securities/book response ({"bids": [orders], "asks": [orders]}, best first)
+            exclude (container): our order ids, left out of the estimates
+
+        Returns:
+            float: fair value (None until both sides of the book have orders from others)
+        """
+        self.updates += 1
+        bids = [order for order in book.get("bids", []) if order["order_id"] not in exclude]
+        asks = [order for order in book.get("asks", []) if order["order_id"] not in exclude]
+
+        # Trades since the last snapshot: orders that filled more, at their price
+        traded_quantity = traded_value = 0
+        filled = {}
+        for order in bids + asks:
+            filled[order["order_id"]] = order["quantity_filled"]
+            change = order["quantity_filled"] - self.filled.get(order["order_id"], order["quantity_filled"])
+            if change > 0:
+                traded_quantity += change
+                traded_value += change * order["price"]
+        self.filled = filled
+        if traded_quantity:
+            self.last_trade = traded_value / traded_quantity
+
+        if not bids or not asks:
+            return self.value
+
+        bid, ask = bids[0], asks[0]
+        bid_size = bid["quantity"] - bid["quantity_filled"]
+        ask_size = ask["quantity"] - ask["quantity_filled"]
+        self.microprice = (bid["price"] * ask_size + ask["price"] * bid_size) / (bid_size + ask_size)
+        self.depth_mid = (self._vwap(bids) + self._vwap(asks)) / 2
+
+        estimates = [(self.weights[0], self.microprice), (self.weights[1], self.depth_mid)]
+        if self.last_trade is not None:
+            estimates.append((self.weights[2], self.last_trade))
+        estimate = sum(weight * price for weight, price in estimates) / sum(weight for weight, price in estimates)
+
+        now = time.monotonic()
+        if self.estimate is not None and now > self.estimated_at:
+            variance = (estimate - self.estimate) ** 2 / (now - self.estimated_at)
+            if self.variance is None:
+                self.variance = variance
+            else:
+                self.variance += self.volatility_smoothing * (variance - self.variance)
+        self.estimate = estimate
+        self.estimated_at = now
+
+        if self.value is None:
+            self.value = estimate
+        else:
+            self.value += self.smoothing * (estimate - self.value)
+        return self.value
+
+    def _vwap(self, orders):
+        quantity = value = 0
+        levels = 0
+        price = None
+        for order in orders:
+            if order["price"] != price:
+                levels += 1
+                if levels > self.depth:
+                    break
+                price = order["price"]
+            remaining = order["quantity"] - order["quantity_filled"]
+            quantity += remaining
+            value += remaining * order["price"]
+        return value / quantity
+
+    def requote(self, force=False):
+        """Tells if fair value moved at least the threshold since we last quoted (and marks it quoted)
+
+        Args:
+            force (bool): quote anyway, like when one side has nothing resting
+
+        Returns:
+            bool: True to send new quotes
+        """
+        if self.value is None:
+            return False
+        if force or self.quoted_at is None or abs(self.value - self.quoted_at) >= self.threshold:
+            self.quoted_at = self.value
+            self.requotes += 1
+            return True
+        self.suppressed += 1
+        return False
+
+    @property
+    def volatility(self):
+        """Volatility of fair value in price per square root second (None until it has changed twice)"""
+        return None if self.variance is None else math.sqrt(self.variance)
+
+    def stats(self):
+        """Gets the fair value, its parts and how many requotes were sent and suppressed
+
+        Returns:
+            dict: value, microprice, depth_mid, last_trade, volatility, updates, requotes and suppressed
+        """
+        return {"value": self.value, "microprice": self.microprice, "depth_mid": self.depth_mid,
+                "last_trade": self.last_trade, "volatility": self.volatility, "updates": self.updates,
+                "requotes": self.requotes, "suppressed": self.suppressed}
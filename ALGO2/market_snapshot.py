@@ -0,0 +1,168 @@
+import collections
+import threading
+import time
+import requests
+
+
+class MarketSnapshot:
+    """Market data for one quoting decision
+
+    The book and the last close of each ticker are fetched the first time a pricing helper asks
+    for them and then served from here, so every helper in one pass of a quoting loop sees the same
+    market. Entries older than `ttl` seconds are fetched again, put() stores what a MarketDataPoller
+    read for every ticker, and invalidate() drops what our own orders just changed (the book after
+    a cancel or a new quote). One snapshot is shared by the quoting loops of all the tickers.
+    """
+
+    def __init__(self, ttl=.05):
+        """
+        Args:
+            ttl (float): seconds an entry is used before it is fetched again
+        """
+        self.ttl = ttl
+        self.entries = {}                       # (kind, ticker) to (monotonic time fetched, value)
+        self.invalidated = {}                   # (kind, ticker) to monotonic time it was last invalidated
+        self.decisions = 0
+        self.hits = 0
+        self.fetches = collections.Counter()    # kind to fetches
+        self.puts = 0
+        self.lock = threading.Lock()
+
+    def begin(self):
+        """Counts a new decision (the entries are kept, other tickers' loops and the poller share them)"""
+        with self.lock:
+            self.decisions += 1
+
+    def get(self, kind, ticker, fetch):
+        """Gets an entry, fetching it if it isn't in the snapshot or is too old
+
+        Args:
+            kind (str): what it is, like "book" or "close"
+            ticker (str): security (like ALGO)
+            fetch (callable): fetches the value from the API
+
+        Returns:
+            what fetch returned
+        """
+        now = time.monotonic()
+        entry = self.entries.get((kind, ticker))
+        if entry is not None and now - entry[0] < self.ttl:
+            with self.lock:
+                self.hits += 1
+            return entry[1]
+
+        value = fetch()
+        with self.lock:
+            self.entries[(kind, ticker)] = (now, value)
+            self.fetches[kind] += 1
+        return value
+
+    def put(self, kind, ticker, value, fetched_at=None):
+        """Stores an entry read somewhere else (like by a MarketDataPoller)
+
+        Args:
+            kind (str): what it is, like "book" or "tick"
+            ticker (str): security (like ALGO), None for the case
+            value: what was read
+            fetched_at (float): monotonic time the read was sent (now by default)
+        """
+        fetched_at = time.monotonic() if fetched_at is None else fetched_at
+        with self.lock:
+            # A read sent before the entry was stored or invalidated doesn't have our latest orders
+            entry = self.entries.get((kind, ticker))
+            if (entry is None or entry[0] <= fetched_at) and self.invalidated.get((kind, ticker), 0) <= fetched_at:
+                self.entries[(kind, ticker)] = (fetched_at, value)
+            self.puts += 1
+
+    def invalidate(self, kind=None, ticker=None):
+        """Drops entries so they are fetched again (all of them if kind and ticker are None)
+
+        Args:
+            kind (str): only drop this kind
+            ticker (str): only drop this ticker
+        """
+        now = time.monotonic()
+        with self.lock:
+            keys = {key for key in self.entries if kind in (None, key[0]) and ticker in (None, key[1])}
+            if kind is not None and ticker is not None:
+                keys.add((kind, ticker))
+            for key in keys:
+                self.entries.pop(key, None)
+                self.invalidated[key] = now
+
+    def stats(self):
+        """Gets the fetches per kind, the hits and the fetches per decision
+
+        Returns:
+            dict: decisions, hits, puts, fetches (kind to count) and per_decision (kind to average fetches)
+        """
+        return {
+            "decisions": self.decisions,
+            "hits": self.hits,
+            "puts": self.puts,
+            "fetches": dict(self.fetches),
+            "per_decision": {kind: count / max(self.decisions, 1) for kind, count in self.fetches.items()},
+        }
+
+
+class MarketDataPoller:
+    """Reads the books of every quoted ticker (and the case tick) from one thread into a MarketSnapshot
+
+    The quoting loops of all the tickers read the market from the shared snapshot instead of each
+    sending its own book and case reads. Every `interval` seconds one round of reads goes out at the
+    same time (the books with get_books), so a loop only fetches by itself when its entry expired
+    or was invalidated by its own orders. The reads go through the client's governor, where they
+    give way to orders.
+    """
+
+    def __init__(self, client, snapshot, tickers, interval=.025):
+        """
+        Args:
+            client (rit.Client): client used only by the poller's thread
+            snapshot (MarketSnapshot): where the reads are put
+            tickers (list of str): securities whose books are read
+            interval (float): seconds between rounds (below the snapshot's ttl, so the books stay fresh)
+        """
+        self.client = client
+        self.snapshot = snapshot
+        self.tickers = list(tickers)
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = None
+        self.polls = 0
+        self.errors = 0
+
+    def start(self):
+        """Starts polling on a daemon thread"""
+        self.thread = threading.Thread(target=self.run, name="market-data", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stops polling and waits for the round in flight"""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def run(self):
+        async_client = self.client.async_client
+        while not self.stopped.is_set():
+            fetched_at = time.monotonic()
+            try:
+                tick, books = self.client.gather(async_client.get_tick(), async_client.get_books(self.tickers))
+            except requests.exceptions.RequestException as exception:
+                self.errors += 1
+                print(f"Market data poll failed: {exception}")
+            else:
+                self.snapshot.put("tick", None, tick, fetched_at)
+                for ticker, book in books.items():
+                    self.snapshot.put("book", ticker, book, fetched_at)
+                self.polls += 1
+            self.stopped.wait(max(self.interval - (time.monotonic() - fetched_at), 0))
+
+    def stats(self):
+        """Gets the rounds of reads done and the ones that failed
+
+        Returns:
+            dict: polls and errors
+        """
+        return {"polls": self.polls, "errors": self.errors}
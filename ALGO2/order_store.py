@@ -0,0 +1,190 @@
+import heapq
+
+
+class OrderRecord:
+    """One of our orders, as last seen in an order response"""
+
+    __slots__ = ("order_id", "ticker", "action", "price", "quantity", "quantity_filled", "status", "heap_entry")
+
+    def __init__(self, order_id, ticker, action):
+        self.order_id = order_id
+        self.ticker = ticker
+        self.action = action
+        self.price = None
+        self.quantity = 0
+        self.quantity_filled = 0
+        self.status = None
+        self.heap_entry = None      # sequence number of the order's live entry in its side's heap
+
+    @property
+    def remaining(self):
+        return self.quantity - self.quantity_filled
+
+    def __repr__(self):
+        return (f"OrderRecord({self.order_id}: {self.action} {self.quantity_filled}/{self.quantity} {self.ticker} "
+                f"@ {self.price}, {self.status})")
+
+
+class OrderStore:
+    """Our orders with indexes so the main loop doesn't scan all of them every pass
+
+    Records are kept by order id, by status and by side. The open quantity left on each side is a
+    running total and so is the position from TRANSACTED orders, both updated as orders change.
+    Every increase of an order's quantity_filled, whichever response it was seen in (including an
+    order that filled as soon as it was sent), goes into the position from fills.
+    Open orders also sit in a heap per (ticker, side) ordered from farthest to closest to the touch
+    (lowest bids and highest asks first), so the k farthest orders are k pops. Heap entries of
+    orders that changed price or stopped being open are skipped when they come up and the heap is
+    rebuilt once they are most of it. An order response that changes nothing about an order leaves
+    it where it is.
+    With a risk gate, every order response and confirmed cancel is passed on to it as well.
+    """
+
+    def __init__(self, risk=None):
+        """
+        Args:
+            risk (rit.RiskGate): kept up to date with our orders' exposure (None for no risk gate)
+        """
+        self.risk = risk
+        self.records = {}               # order id to OrderRecord
+        self.by_status = {}             # status to {order id: OrderRecord}
+        self.by_side = {"BUY": {}, "SELL": {}}
+        self.pending = {"BUY": 0, "SELL": 0}    # open quantity left by side
+        self.transacted_position = 0    # BUY - SELL quantity of the TRANSACTED orders kept
+        self.filled_position = 0        # BUY - SELL quantity filled on every order seen (removed ones too)
+        self.heaps = {}                 # (ticker, side) to [(key, sequence number, OrderRecord)]
+        self.sequence = 0
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, order_id):
+        return order_id in self.records
+
+    def __iter__(self):
+        return iter(list(self.records))
+
+    def get(self, order_id):
+        return self.records.get(order_id)
+
+    def with_status(self, status):
+        """Gets the orders with a status (like OPEN)
+
+        Returns:
+            list of OrderRecords: the orders, oldest first
+        """
+        return list(self.by_status.get(status, {}).values())
+
+    def upsert(self, data):
+        """Adds an order or updates it from an order response
+
+        Args:
+            data (dict): the order as the API returns it
+
+        Returns:
+            int: quantity_filled before this update (0 for a new order)
+        """
+        order_id = data["order_id"]
+        record = self.records.get(order_id)
+        if record is None:
+            record = OrderRecord(order_id, data.get("ticker"), data.get("action"))
+            self.records[order_id] = record
+            self.by_side.setdefault(record.action, {})[order_id] = record
+            previous_filled = 0
+        else:
+            previous_filled = record.quantity_filled
+            # Reconcile passes see every open order again, most of them unchanged: leave their indexes
+            # and heap entries alone
+            if (record.price == data.get("price") and record.quantity == data.get("quantity", 0)
+                    and previous_filled == data.get("quantity_filled", 0) and record.status == data.get("status")):
+                if self.risk is not None:
+                    self.risk.update(data)
+                return previous_filled
+            self._unindex(record)
+
+        record.price = data.get("price")
+        record.quantity = data.get("quantity", 0)
+        record.quantity_filled = data.get("quantity_filled", 0)
+        record.status = data.get("status")
+        self._index(record)
+        self.filled_position += self._sign(record) * (record.quantity_filled - previous_filled)
+        if self.risk is not None:
+            self.risk.update(data)
+        return previous_filled
+
+    def mark(self, order_id, status):
+        """Changes an order's status before the API reports it (like CANCELLED once a cancel is confirmed)"""
+        record = self.records.get(order_id)
+        if record is None:
+            return
+        self._unindex(record)
+        record.status = status
+        self._index(record)
+        if self.risk is not None and status == "CANCELLED":
+            self.risk.cancelled(order_id)
+
+    def remove(self, order_id):
+        """Forgets an order (after it filled or was cancelled)"""
+        record = self.records.pop(order_id, None)
+        if record is None:
+            return
+        self._unindex(record)
+        del self.by_side[record.action][order_id]
+        if self.risk is not None:
+            self.risk.forget(order_id)
+
+    def _sign(self, record):
+        return 1 if record.action == "BUY" else -1
+
+    def _unindex(self, record):
+        del self.by_status[record.status][record.order_id]
+        if record.status == "OPEN":
+            self.pending[record.action] -= record.remaining
+        elif record.status == "TRANSACTED":
+            self.transacted_position -= self._sign(record) * record.quantity
+        # The heap entry stays until it comes up and is skipped
+        record.heap_entry = None
+
+    def _index(self, record):
+        self.by_status.setdefault(record.status, {})[record.order_id] = record
+        if record.status == "OPEN":
+            self.pending[record.action] += record.remaining
+            self._push(record)
+        elif record.status == "TRANSACTED":
+            self.transacted_position += self._sign(record) * record.quantity
+
+    def _push(self, record):
+        # Farthest from the touch first: lowest bids, highest asks
+        key = record.price if record.action == "BUY" else -record.price
+        heap = self.heaps.setdefault((record.ticker, record.action), [])
+        self.sequence += 1
+        record.heap_entry = self.sequence
+        heapq.heappush(heap, (key, self.sequence, record))
+
+        live = len(self.by_status["OPEN"])
+        if len(heap) > 2 * live + 64:
+            heap[:] = [entry for entry in heap if entry[2].heap_entry == entry[1]]
+            heapq.heapify(heap)
+
+    def farthest(self, ticker, side, k):
+        """Gets the k open orders of a side farthest from the touch
+
+        Args:
+            ticker (str): security (like ALGO)
+            side (str): BUY or SELL
+            k (int): number of orders
+
+        Returns:
+            list of OrderRecords: lowest bids or highest asks first
+        """
+        heap = self.heaps.get((ticker, side))
+        if not heap:
+            return []
+        found = []
+        while heap and len(found) < k:
+            entry = heapq.heappop(heap)
+            if entry[2].heap_entry == entry[1]:
+                found.append(entry)
+        for entry in found:
+            heapq.heappush(heap, entry)
+        return [entry[2] for entry in found]
@@ -0,0 +1,121 @@
+import math
+import time
+
+
+class QueuePosition:
+    """Where one of our resting orders sits in the queue at its price"""
+
+    __slots__ = ("ahead", "rate", "seen_at", "price")
+
+    def __init__(self, ahead, price, seen_at):
+        self.ahead = ahead          # shares that fill before the order (better prices, then earlier at its price)
+        self.rate = 0.0             # shares per second the queue ahead has been shrinking (moving average)
+        self.seen_at = seen_at
+        self.price = price
+
+    def time_to_fill(self):
+        """Seconds until the shares ahead are gone at the rate seen so far (inf if they aren't going)"""
+        if self.ahead <= 0:
+            return 0.0
+        return self.ahead / self.rate if self.rate > 0 else math.inf
+
+
+class QueueTracker:
+    """Tracks the shares ahead of each of our resting orders from the book snapshots
+
+    The book lists each side best price first and each price in time priority, so the shares that
+    fill before one of our orders are the remaining quantity of every order listed before it. How
+    fast that shrinks between snapshots (fills and cancels ahead of us, while orders at our price
+    join behind) gives an expected time to fill. When an order isn't in the snapshot (the book was
+    cut off before its price) its last estimate is kept, less what traded on its side since: the
+    orders whose quantity_filled grew, which were all ahead of it. Repricing can then leave alone
+    the orders that are about to fill instead of giving up their place.
+    """
+
+    def __init__(self, smoothing=.3):
+        """
+        Args:
+            smoothing (float): weight of the newest depletion rate in the moving average
+        """
+        self.smoothing = smoothing
+        self.positions = {}     # order id to QueuePosition
+        self.filled = {}        # order id to quantity_filled of everyone's orders in the last snapshot
+        self.updates = 0
+        self.skipped = 0        # requotes skipped because the order was about to fill
+
+    def update(self, book, orders, now=None):
+        """Updates the queue positions of our open orders from a book snapshot
+
+        Args:
+            book (dict): the /securities/book response ({"bids": [orders], "asks": [orders]}, best first)
+            orders (OrderStore): our orders
+            now (float): monotonic time of the snapshot (now by default)
+        """
+        now = time.monotonic() if now is None else now
+        self.updates += 1
+        ours = orders.by_status.get("OPEN", {})
+
+        found = {}
+        traded = {"BUY": 0, "SELL": 0}  # quantity traded on each side since the last snapshot
+        filled = {}
+        for side, action in (("bids", "BUY"), ("asks", "SELL")):
+            queued = 0          # remaining quantity of the orders listed so far (the queue ahead)
+            for order in book.get(side, []):
+                order_id = order["order_id"]
+                filled[order_id] = order["quantity_filled"]
+                change = order["quantity_filled"] - self.filled.get(order_id, order["quantity_filled"])
+                if change > 0:
+                    traded[action] += change
+                if order_id in ours:
+                    found[order_id] = queued
+                queued += order["quantity"] - order["quantity_filled"]
+        self.filled = filled
+
+        positions = {}
+        for order_id, record in ours.items():
+            position = self.positions.get(order_id)
+            if position is None or position.price != record.price:
+                # New order (or moved to a new price): start from where it is in the book
+                ahead = found.get(order_id)
+                if ahead is not None:
+                    positions[order_id] = QueuePosition(ahead, record.price, now)
+                continue
+
+            ahead = found.get(order_id)
+            if ahead is None:
+                ahead = max(position.ahead - traded[record.action], 0)
+            # Only the shares leaving the queue ahead count (better prices joining ahead don't fill us sooner)
+            elapsed = now - position.seen_at
+            if elapsed > 0:
+                rate = max(position.ahead - ahead, 0) / elapsed
+                position.rate += self.smoothing * (rate - position.rate)
+            position.ahead = ahead
+            position.seen_at = now
+            positions[order_id] = position
+        self.positions = positions
+
+    def time_to_fill(self, order_id):
+        """Expected seconds until an order reaches the front of its queue (inf if unknown or not moving)"""
+        position = self.positions.get(order_id)
+        return math.inf if position is None else position.time_to_fill()
+
+    def likely_to_fill(self, order_id, horizon):
+        """Tells if an order is expected to reach the front of its queue within horizon seconds
+
+        Returns:
+            bool: True if it should be left where it is
+        """
+        if self.time_to_fill(order_id) <= horizon:
+            self.skipped += 1
+            return True
+        return False
+
+    def stats(self):
+        """Gets how many orders are tracked, how many are expected to fill within a second and the skipped requotes
+
+        Returns:
+            dict: tracked, filling (within a second), updates and skipped
+        """
+        return {"tracked": len(self.positions),
+                "filling": sum(position.time_to_fill() <= 1 for position in self.positions.values()),
+                "updates": self.updates, "skipped": self.skipped}
@@ -0,0 +1,144 @@
+import bisect
+import math
+import threading
+
+
+class Quote:
+    """Offsets from fair value and sizes of one quote pair"""
+
+    __slots__ = ("bid_offset", "ask_offset", "bid_size", "ask_size")
+
+    def __init__(self, bid_offset, ask_offset, bid_size, ask_size):
+        self.bid_offset = bid_offset    # bid = fair value - bid_offset
+        self.ask_offset = ask_offset    # ask = fair value + ask_offset
+        self.bid_size = bid_size
+        self.ask_size = ask_size
+
+    def __repr__(self):
+        return f"Quote(-{self.bid_offset:.2f} x {self.bid_size}, +{self.ask_offset:.2f} x {self.ask_size})"
+
+
+class QuoteTable:
+    """Inventory-skewed quotes (Avellaneda-Stoikov) worked out ahead of time for every inventory and volatility
+
+    With inventory q, volatility sigma (price per square root second), risk aversion gamma, order
+    arrival decay kappa and horizon tau, Avellaneda-Stoikov quotes around the reservation price
+    fair - q * gamma * sigma^2 * tau with a total spread of gamma * sigma^2 * tau + 2 / gamma * ln(1 + gamma / kappa).
+    So a long book quotes lower (buying less eagerly, selling more eagerly) and a short book higher.
+    The side that adds to the inventory is also shrunk by exp(-size_decay * |q|), and neither side
+    may take the position past position_limit.
+
+    Quotes are worked out for inventory buckets of bucket_size shares (with sizes for the bucket's
+    worst inventory, so a bucket never quotes more than its whole range allows) and for each
+    volatility regime in sigmas. quote() is then two index lookups. set_params() rebuilds the table on a
+    background thread and swaps it in when it is done, so the main loop never waits for it.
+    """
+
+    def __init__(self, position_limit, base_size=5000, min_size=100, gamma=1e-5, kappa=100, horizon=60,
+                 size_decay=1.5e-4, sigmas=(.01, .02, .05, .1), bucket_size=1000, tick=.01):
+        """
+        Args:
+            position_limit (int): largest net position allowed either way
+            base_size (int): size of a side that doesn't add to the inventory
+            min_size (int): sizes below this aren't quoted (and sizes are rounded down to it)
+            gamma (float): risk aversion
+            kappa (float): how fast fills drop off as a quote moves away from fair value (per dollar)
+            horizon (float): seconds the inventory is expected to be held
+            size_decay (float): how fast the size adding to the inventory shrinks per share of inventory
+            sigmas (tuple of floats): volatility of each regime in price per square root second
+            bucket_size (int): shares per inventory bucket
+            tick (float): smallest offset (quotes never cross fair value)
+        """
+        self.params = {"position_limit": position_limit, "base_size": base_size, "min_size": min_size,
+                       "gamma": gamma, "kappa": kappa, "horizon": horizon, "size_decay": size_decay,
+                       "sigmas": tuple(sigmas), "bucket_size": bucket_size, "tick": tick}
+        self.lock = threading.Lock()
+        self.version = 0        # bumped by set_params, so an older rebuild finishing late is dropped
+        self.builds = 0
+        self.table = self.build(self.params)
+
+    @staticmethod
+    def build(params):
+        """Works out every quote for a set of parameters
+
+        Returns:
+            dict: rows (one list of Quotes per volatility regime, by inventory bucket), edges (volatility regime
+                boundaries), params
+        """
+        limit = params["position_limit"]
+        width = params["bucket_size"]
+        gamma, kappa, tau = params["gamma"], params["kappa"], params["horizon"]
+        sigmas = params["sigmas"]
+        buckets = math.ceil(limit / width)
+
+        rows = []
+        for sigma in sigmas:
+            risk = gamma * sigma ** 2 * tau
+            half_spread = (risk + 2 / gamma * math.log(1 + gamma / kappa)) / 2
+            row = []
+            for bucket in range(-buckets, buckets + 1):
+                # quote() truncates toward zero, so bucket b holds inventories from b * width up to (not
+                # including) (b + 1) * width away from flat. The sizes use the bucket's worst inventory
+                # for each side, so they are safe for the whole bucket.
+                inventory = bucket * width
+                low = inventory - (width - 1 if bucket <= 0 else 0)
+                high = inventory + (width - 1 if bucket >= 0 else 0)
+                skew = inventory * risk
+                bid_offset = max(half_spread + skew, params["tick"])
+                ask_offset = max(half_spread - skew, params["tick"])
+
+                bid_size = params["base_size"] * (math.exp(-params["size_decay"] * high) if high > 0 else 1)
+                ask_size = params["base_size"] * (math.exp(params["size_decay"] * low) if low < 0 else 1)
+                bid_size = min(bid_size, limit - high)
+                ask_size = min(ask_size, limit + low)
+                row.append(Quote(round(bid_offset, 2), round(ask_offset, 2),
+                                 QuoteTable._round_size(bid_size, params["min_size"]),
+                                 QuoteTable._round_size(ask_size, params["min_size"])))
+            rows.append(row)
+
+        # Regime boundaries halfway (geometrically) between the regimes
+        edges = [math.sqrt(low * high) for low, high in zip(sigmas, sigmas[1:])]
+        return {"rows": rows, "edges": edges, "buckets": buckets, "params": params}
+
+    @staticmethod
+    def _round_size(size, min_size):
+        return int(max(size, 0) // min_size * min_size)
+
+    def quote(self, inventory, sigma):
+        """Gets the quote for an inventory and a volatility
+
+        Args:
+            inventory (float): net position
+            sigma (float): volatility in price per square root second (the middle regime if None)
+
+        Returns:
+            Quote: offsets from fair value and sizes
+        """
+        table = self.table
+        rows = table["rows"]
+        regime = len(rows) // 2 if sigma is None else bisect.bisect(table["edges"], sigma)
+        width = table["params"]["bucket_size"]
+        bucket = int(inventory / width) + table["buckets"]
+        return rows[regime][min(max(bucket, 0), 2 * table["buckets"])]
+
+    def set_params(self, **changes):
+        """Changes parameters and rebuilds the table on a background thread
+
+        Returns:
+            threading.Thread: the rebuild (join it to wait for the new table)
+        """
+        with self.lock:
+            self.params = dict(self.params, **changes)
+            self.version += 1
+            params, version = self.params, self.version
+
+        def rebuild():
+            table = self.build(params)
+            with self.lock:
+                if version == self.version:
+                    self.table = table
+                    self.builds += 1
+
+        thread = threading.Thread(target=rebuild, name="quote-table", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,131 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import rit
+
+
+class Repricer:
+    """Moves a batch of quotes to new prices with one cancel request
+
+    All the requotes decided in one pass go out as a single POST /commands/cancel with their ids.
+    Only the orders the response confirms as cancelled are replaced, so an old quote and its
+    replacement are never resting at the same time (an order that filled before the cancel got
+    there isn't replaced). The response only has ids, so the final state of each cancelled order is
+    read with GET /orders/{id} (all at the same time) and upserted, and the replacement is sized
+    from what it had left when it was cancelled: a quote that partly filled after the last
+    reconcile doesn't have its filled shares posted again. A cancelled order whose final state
+    can't be read isn't replaced. The lookups and replacements are sent on a thread pool and the
+    session's governor keeps them within the order rate. With a risk gate, a replacement is only
+    sent if the gate approves it (the cancel has already given back its old quote's exposure). The
+    time from sending the cancel to each replacement being accepted goes in a latency histogram.
+    """
+
+    def __init__(self, orders, max_workers=16, risk=None):
+        """
+        Args:
+            orders (OrderStore): our orders (cancelled orders are marked and replacements added)
+            max_workers (int): most replacement orders in flight at the same time (the session's pool size)
+            risk (rit.RiskGate): checks each replacement before it is sent (None for no checks)
+        """
+        self.orders = orders
+        self.risk = risk
+        self.max_workers = max_workers
+        self._executor = None
+        self.latency = rit.LatencyHistogram()
+        self.batches = 0
+        self.cancelled = 0
+        self.replaced = 0
+        self.skipped = 0        # requotes whose order was no longer open when the cancel got there
+        self.unknown = 0        # cancelled orders not replaced because their final state couldn't be read
+        self.rejected = 0       # replacements the risk gate didn't approve
+
+    def reprice(self, session, decisions):
+        """Cancels the orders in one request and submits their replacements at the same time
+
+        Args:
+            session (requests.Session): An active session object configured to communicate with the RIT API.
+            decisions (list of tuples): (OrderRecord, new price) for every quote to move
+
+        Returns:
+            int: number of quotes replaced
+        """
+        if not decisions:
+            return 0
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.batches += 1
+
+        # Cancel every old quote first and only replace the ones that really were cancelled
+        start = time.perf_counter()
+        ids = ",".join(str(order.order_id) for order, price in decisions)
+        response = session.post('http://localhost:9999/v1/commands/cancel', params={'ids': ids})
+        if response.status_code != 200:
+            print(f"Bulk cancel failed: {response.status_code} {response.text}")
+            return 0
+        cancelled = set(response.json().get('cancelled_order_ids', []))
+        self.cancelled += len(cancelled)
+        self.skipped += len(decisions) - len(cancelled)
+
+        # Read what each cancelled order filled before the cancel got there
+        lookups = [(order, price, self._executor.submit(self._lookup, session, order.order_id))
+                   for order, price in decisions if order.order_id in cancelled]
+
+        futures = []
+        for order, price, lookup in lookups:
+            self.orders.mark(order.order_id, 'CANCELLED')
+            final = lookup.result()
+            if final is None:
+                self.unknown += 1
+                continue
+            # Its fills go into the position (and the risk gate) and what it had left is what we replace
+            self.orders.upsert(final)
+            if order.remaining <= 0:
+                continue
+            if self.risk is not None and not self.risk.check(order.ticker, order.action, order.remaining):
+                self.rejected += 1
+                continue
+            payload = {'ticker': order.ticker, 'type': 'LIMIT', 'quantity': order.remaining,
+                       'action': order.action, 'price': price}
+            futures.append((order, price, self._executor.submit(self._send, session, payload)))
+
+        replaced = 0
+        for order, price, future in futures:
+            response, finished = future.result()
+            if response is not None and response.status_code == 200:
+                self.orders.upsert(response.json())
+                self.latency.record(finished - start)
+                replaced += 1
+                print(f"Modified order ID {order.order_id}: {order.action} {order.remaining} shares moved from "
+                      f"{order.price:.2f} to {price:.2f}.")
+        self.replaced += replaced
+        return replaced
+
+    @staticmethod
+    def _lookup(session, order_id):
+        try:
+            response = session.get(f'http://localhost:9999/v1/orders/{order_id}')
+        except Exception as exception:
+            print(f"Lookup of order {order_id} failed: {exception}")
+            return None
+        if response.status_code != 200:
+            print(f"Lookup of order {order_id} failed: {response.status_code} {response.text}")
+            return None
+        return response.json()
+
+    @staticmethod
+    def _send(session, payload):
+        try:
+            response = session.post('http://localhost:9999/v1/orders', params=payload)
+        except Exception as exception:
+            print(f"Order {payload} failed: {exception}")
+            response = None
+        return response, time.perf_counter()
+
+    def stats(self):
+        """Gets the batch counters and the quote refresh latency histogram (ms)
+
+        Returns:
+            dict: batches, cancelled, replaced, skipped, unknown, rejected and latency (count, average, p50, p90, p99, worst)
+        """
+        return {"batches": self.batches, "cancelled": self.cancelled, "replaced": self.replaced,
+                "skipped": self.skipped, "unknown": self.unknown, "rejected": self.rejected,
+                "latency": self.latency.summary()}
@@ -1,14 +1,20 @@
 import os
+import sys
 import functools
 import operator
 import itertools
 from time import sleep
 import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from tqdm.auto import tqdm
+# the shared rit package lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
 
 import helpers
 import constants_6 as constants
+from rit.book_store import BookStore
+from rit.governor import CircuitOpen, backoff_delay
 
 
 class ApiException(Exception):
@@ -73,17 +79,26 @@ def get_from_api(session, url):
         requests.Response: The HTTP response object returned by the API call.
     """
         
-    response = session.get(f'http://localhost:9999/v1/{url}')
-    while(response.status_code != 200):
-    
+    # The session's governor paces the reads, waits out 429s and backs off on server errors, so
+    # this loop only sends the read again (after a jittered backoff) if that still didn't work
+    attempt = 0
+    while True:
+        try:
+            response = session.get(f'http://localhost:9999/v1/{url}')
+        except CircuitOpen as exception:
+            sleep(exception.retry_in)
+            continue
+        
+        if response.status_code == 200:
+            return response
+        
         if response.status_code == 401:
             raise ApiException(
                 'The API key provided in this Python code must match that in the RIT client '
                 '(please refer to the API hyperlink in the client toolbar and/or the RIT – User Guide – REST API Documentation.pdf)'
             )
-        response = session.get(f'http://localhost:9999/v1/{url}')
-
-    return response
+        sleep(backoff_delay(attempt))
+        attempt += 1
 
 def get_original_books(session):
     """This function gets a list of all the books
@@ -137,36 +152,117 @@ def get_book(session, underlying_security, bid_or_ask, with_fees):
     Returns:
         List: List of dicts where each dict is an order
     """
-    markets_books = []
-    for market in constants.MARKETS.keys():
-        if len(constants.MARKETS.keys()) > 1:
-            markets_books.append(get_from_api(session, f"securities/book?ticker={underlying_security}_{market}").json())
-        else:
-            markets_books.append(get_from_api(session, f"securities/book?ticker={underlying_security}").json())
+    markets_books = [get_from_api(session, f"securities/book?ticker={ticker}").json() for ticker in get_market_tickers(underlying_security)]
+
+    return build_book(markets_books, bid_or_ask, with_fees)
+
+
+def get_market_tickers(underlying_security):
+    """Gets the tickers the RIT client uses for a security on every market
+
+    Args:
+        underlying_security (string): the underlying security (like CRZY)
+
+    Returns:
+        list of strings: tickers like ["CRZY_M", "CRZY_A"] (or just ["CRZY"] if there is one market)
+    """
+    if len(constants.MARKETS.keys()) > 1:
+        return [f"{underlying_security}_{market}" for market in constants.MARKETS.keys()]
+    return [underlying_security]
+
+
+def build_book(markets_books, bid_or_ask, with_fees):
+    """Merges the raw books of every market into one sorted side of the book
+
+    The orders are copied, so the raw responses can be used to build more than one view.
+
+    Args:
+        markets_books (list of dicts): raw securities/book responses, one for each market
+        bid_or_ask (string): "bids" or "asks" depending on which one we want
+        with_fees (bool): if the MARKET_COST of each market should be included in the price (bids pay less, asks cost more)
 
+    Returns:
+        List: List of dicts where each dict is an order
+    """
     book = []
 
     for market in markets_books:
-        for order in market[bid_or_ask]:
+        for raw_order in market[bid_or_ask]:
+            order = dict(raw_order)
             helpers.split_market_from_ticker(order)
             order["quantity"] = (order["quantity"] - order["quantity_filled"])
             if with_fees:
                 if bid_or_ask == "bids":
-                    order["price"] += constants.MARKETS[order["market"]]["MARKET_COST"]
-                else:
                     order["price"] -= constants.MARKETS[order["market"]]["MARKET_COST"]
+                else:
+                    order["price"] += constants.MARKETS[order["market"]]["MARKET_COST"]
             book.append(order)
 
-    # Sort the books by 
+    # Sort the books by price (best price first)
     book.sort(key=lambda x: x["price"], reverse=(bid_or_ask == "bids"))
     
-    # print(f"{underlying_security, bid_or_ask}")
-    # for order in book:
-    #     print(order)
-    #     print(order["price"])
-    
     return book
 
+
+# Thread pool used to send the snapshot requests at the same time
+_snapshot_executor = None
+
+# Merged books of each security, updated from the orders that changed between snapshots
+book_stores = {}
+
+def get_snapshot(session):
+    """Gets one consistent snapshot of every book, fetching each TICKER_MARKET book exactly once
+
+    All the books (and the tick) are requested at the same time over the session's connection pool
+    (rit.Client's session keeps a connection alive for each of them),
+    then both the raw view and the view with MARKET_COST fees are built from the same responses.
+    The books (don't change them) are the same objects as last snapshot's if nothing changed.
+
+    Args:
+        session (requests.Session): An active session object configured to communicate with the RIT API.
+
+    Returns:
+        dict: {"tick": tick the books were fetched on, "time": wall-clock time (seconds) the fetch finished,
+               "books": books without fees, "books_with_fees": books with fees as ArrayBooks (bids pay less, asks cost more),
+               "changes": BookChanges of each security since the last snapshot}
+    """
+    global _snapshot_executor
+    
+    tickers = {security: get_market_tickers(security) for security in constants.SECURITIES.keys()}
+    all_tickers = [ticker for security_tickers in tickers.values() for ticker in security_tickers]
+
+    if _snapshot_executor is None:
+        _snapshot_executor = ThreadPoolExecutor(max_workers=len(all_tickers) + 1)
+
+    # Send every request before waiting on any of them
+    tick_future = _snapshot_executor.submit(get_tick, session)
+    book_futures = {ticker: _snapshot_executor.submit(get_from_api, session, f"securities/book?ticker={ticker}") for ticker in all_tickers}
+    raw_books = {ticker: future.result().json() for ticker, future in book_futures.items()}
+    tick = tick_future.result()
+
+    snapshot = {"tick": tick, "time": time.time(), "books": {}, "books_with_fees": {}, "changes": {}}
+    
+    # Fees make bids worth less and asks cost more (same as build_book)
+    bid_fees = {market: -info["MARKET_COST"] for market, info in constants.MARKETS.items()}
+    ask_fees = {market: info["MARKET_COST"] for market, info in constants.MARKETS.items()}
+    
+    for security, security_tickers in tickers.items():
+        if security not in book_stores:
+            book_stores[security] = BookStore(constants.MARKETS.keys())
+        store = book_stores[security]
+        
+        # Only the orders that changed since the last snapshot are re-sorted, and the views are reused if nothing changed
+        snapshot["changes"][security] = store.update({market: raw_books[ticker] for market, ticker in zip(constants.MARKETS.keys(), security_tickers)})
+        snapshot["books"][security] = {"bids": store.book("bids"), "asks": store.book("asks")}
+        
+        # The fee view is only used for vwap and depth, so it is kept as arrays
+        snapshot["books_with_fees"][security] = {
+            "bids": store.array_book("bids", bid_fees),
+            "asks": store.array_book("asks", ask_fees),
+        }
+
+    return snapshot
+
 def get_tenders(session):
     """Gets all the current tender offers 
 
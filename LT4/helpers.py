@@ -6,9 +6,10 @@ from time import sleep
 import signal
 import requests
 import constants_6 as constants
-from scipy.stats import norm
+from rit.stats import norm_ppf
+from rit.risk import RiskGate
 import math
-from tqdm.auto import tqdm
+from rit.lazy import tqdm
 
 NORMAL_TENDER = 1
 WINNER_TAKES_ALL = 2
@@ -16,6 +17,9 @@ COMPETATIVE_TENDERS = 3
 
 underlying_price = {}
 
+# Net and gross exposure for the tender limit checks, synced with the portfolio every time lt4 trades
+risk_gate = RiskGate(constants.TRADING_LIMITS)
+
 def type_of_tender(tender):
     """Figures out what type of tender it is
 
@@ -71,25 +75,12 @@ def remove_quantity_from_book(quantity, book):
 
     Args:
         quantity (int): the quantity being removed
-        book (list of dicts): list of dicts representing orders
+        book (ArrayBook): one side of the book
+
+    Returns:
+        ArrayBook: the book left over (empty if there weren't enough shares)
     """
-    
-    # While the quantity isn't 0, keep going 
-    while quantity != 0:
-        
-        # If no more orders in book, return -1 to signal no more orders
-        if len(book) == 0:
-            return -1
-        
-        # The next order is bigger than the quantity left
-        if book[0]["quantity"] > quantity:
-            book[0]["quantity"] -= quantity
-            quantity = 0
-            
-        # The quantity left is bigger than the next order quantity
-        else:
-            order = book.pop(0)
-            quantity -= order["quantity"]
+    return book.consume(min(quantity, book.total_quantity))
             
 def get_underlying_price(books, tick):
     """
@@ -166,13 +157,16 @@ def get_underlying_price(books, tick):
 
 
 
-def evaluate_tender(books, books_with_fees, portfolio, tender, tick):
+def evaluate_tender(books, view, tender, tick):
     """Evaluate if a tender is profitable
 
+    Nothing passed in is changed: the book and portfolio changes are made on a fork of the view, so
+    every tender can be evaluated against the same snapshot. SECURITY_LIMIT and GROSS_LIMIT are
+    checked by risk_gate, which holds the exposure of the portfolio the view starts from.
+
     Args:
         books (dict of dict of list of dicts): represents the book seperated by securities and bids/asks
-        books_with_fees (dict of dict of list of dicts): same as above but includes fees
-        portfolio (dict): dict where key is security and value is portfolio quantity
+        view (BookView): what-if view of the books with fees (ArrayBooks) and the portfolio
         tender (dict): dict representing information about tender
         tick (int): tick we are on
 
@@ -187,50 +181,52 @@ def evaluate_tender(books, books_with_fees, portfolio, tender, tick):
         tqdm.write("No Selling")
         return True
     
-    total_portfolio_quantity = total = sum(abs(value) for value in portfolio.values())
+    view = view.fork()
+    ticker = tender["ticker"]
+    quantity = tender["quantity"]
+    position = view.position(ticker)
+    
+    # Exceeds Limit (the tender is offloaded in ORDER_LIMIT pieces, so only the position limits apply)
+    if not risk_gate.check(ticker, tender["action"], quantity, split=True):
+        tqdm.write(f"Tender over the trading limits: {risk_gate.last_rejection}")
+        return False
     
     # Step 1: Remove Portfolio Quantity
-    if portfolio[tender["ticker"]] != 0:
+    if position != 0:
         
         # Same direction (either negative quantity and we're selling or positive quantity and we're buying)
-        if (portfolio[tender["ticker"]] < 0) == (tender["action"] == "SELL"):
-            
-            # Exceeds Limit
-            if (abs(portfolio[tender["ticker"]]) + abs(tender["quantity"]) > constants.TRADING_LIMITS["SECURITY_LIMIT"] or total_portfolio_quantity + abs(tender["quantity"]) > constants.TRADING_LIMITS["GROSS_LIMIT"]):
-                print("Here")
-                return False
+        if (position < 0) == (tender["action"] == "SELL"):
 
             # Remove portfolio quantity from book
-            else:
-                remove_quantity_from_book(abs(portfolio[tender["ticker"]]), books_with_fees[tender["ticker"]]["asks" if portfolio[tender["ticker"]] < 0 else "bids"])
-                portfolio[tender["ticker"]] = 0
+            view.consume(ticker, "asks" if position < 0 else "bids", abs(position))
+            view.set_position(ticker, 0)
 
 
         # Opposite direction (like we're short and we are buying stock)
         else:
             # Portfolio Quantity is greater
-            if portfolio[tender["ticker"]] > tender["quantity"]:
-                remove_quantity_from_book(abs(portfolio[tender["ticker"]] - tender["quantity"]), books_with_fees[tender["ticker"]]["asks" if portfolio[tender["ticker"]] < 0 else "bids"])
-                tender["quantity"] -= tender["quantity"]
+            if position > quantity:
+                view.consume(ticker, "asks" if position < 0 else "bids", abs(position - quantity))
+                quantity -= quantity
             
             # Tender quantity is greater
             else:
-                tender["quantity"] -= tender["quantity"]
+                quantity -= quantity
 
     # Step 2: Account for market Change
-    vwap = calculate_vwap(tender["quantity"], books_with_fees[tender["ticker"]]["asks" if tender["action"] == "SELL" else "bids"])
+    vwap = calculate_vwap(quantity, view.side(ticker, "asks" if tender["action"] == "SELL" else "bids"))
     
     # We want a lower bound if we're buying (we want price to be higher than) or a higher bound if selling
     probability = .05 if tender["action"] == "BUY" else .95
     
-    orders = math.ceil(tender["quantity"]/constants.TRADING_LIMITS["ORDER_LIMIT"])
+    orders = math.ceil(quantity/constants.TRADING_LIMITS["ORDER_LIMIT"])
     
     order_time = orders * constants.RATE_LIMIT
     
     ticks_to_offload = order_time / constants.SPEED
     
     # Factor in the volitility
-    val = underlying_price[tender["ticker"]] * (1 + constants.SECURITIES[tender["ticker"]]["VOLITILITY"] * norm.ppf(probability, 0, constants.SECURITIES[tender["ticker"]]["VOLITILITY"] * math.sqrt(ticks_to_offload / constants.TICKS)))
+    val = underlying_price[tender["ticker"]] * (1 + constants.SECURITIES[tender["ticker"]]["VOLITILITY"] * norm_ppf(probability, 0, constants.SECURITIES[tender["ticker"]]["VOLITILITY"] * math.sqrt(ticks_to_offload / constants.TICKS)))
     
     # Average between worst case price and vwap or if vwap isn't deep enough just the worst case underlying price
     average = (val + vwap) / 2 if vwap != -1 else val
@@ -259,42 +255,14 @@ def calculate_vwap(quantity, book):
 
     Args:
         quantity (int): quantity to find vwap for
-        book (list of dicts): list of orders
+        book (ArrayBook): one side of the book
 
     Returns:
-        float: vwap
+        float: vwap (-1 if quantity is 0 or the book isn't deep enough, otherwise vwap might be a lot less than it should be)
     """
     
-    book_copy = book.copy()
-    
-    # If quantity is 0 (doesn't make sense for this context), we return 0
-    if quantity == 0:
-        return -1
-    
-    # Initialize variables
-    sum = 0
-    original_quantity = quantity
-    
-    # While quantity isn't 0
-    while quantity != 0:
-        
-        # If no more orders in book, we return -1 (otherwise vwap might be a lot less than it should be)
-        if len(book_copy) <= 0:
-            return -1
-        
-        # If first order is bigger, calculated based on quantity
-        if book_copy[0]["quantity"] > quantity:
-            sum += book_copy[0]["price"] * quantity
-            book_copy[0]["quantity"] -= quantity
-            quantity = 0
-            
-        # If quantity is bigger, remove the first one (which only doesn't cause errors because we're working with a copy of the book)
-        else:
-            order = book_copy.pop(0)
-            sum += order["price"] * order["quantity"]
-            quantity -= order["quantity"]
-    
-    vwap = float(sum) / float(original_quantity)
+    # Binary search over the prefix sums of the book, which isn't changed
+    vwap = book.vwap(quantity)
     
     if constants.DEBUG:
         tqdm.write(f"VWAP: {vwap}")
@@ -321,7 +289,7 @@ def try_not_selling(tick, tender, underlying_price):
     
     # Factor in the volitility
     # TODO: the line below and above is repeated so modulize 
-    val = underlying_price[tender["ticker"]] * (1 + norm.ppf(probability, 0, constants.SECURITIES[tender["ticker"]]["VOLITILITY"] * constants.SECURITIES[tender["ticker"]]["VOLITILITY"] * math.sqrt(ticks_left / constants.TICKS)))
+    val = underlying_price[tender["ticker"]] * (1 + norm_ppf(probability, 0, constants.SECURITIES[tender["ticker"]]["VOLITILITY"] * constants.SECURITIES[tender["ticker"]]["VOLITILITY"] * math.sqrt(ticks_left / constants.TICKS)))
     
     tender_price = tender["price"]
     
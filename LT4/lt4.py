@@ -1,50 +1,88 @@
 import os
+import sys
 import functools
 import operator
 import itertools
 from time import sleep
 import signal
-from tqdm.auto import tqdm
 import requests
+# the shared rit package lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import rit
+from rit.lazy import tqdm
 import api_helpers
 import helpers
+from tender_cache import TenderCache
+import tender_optimizer
 import constants_6 as constants
 
 
 # this is the main method containing the actual order routing logic
 def main():
     # creates a session to manage connections and requests to the RIT Client
-    with requests.Session() as s:
-            
+    # orders are paced at one every RATE_LIMIT seconds
+    with rit.Client(constants.API_KEY, governor=rit.Governor(order_rate=1 / constants.RATE_LIMIT)) as client:
+        s = client.session
+
         if constants.PROGRESS_BAR:
             # Create Progress Bar
             max_progress = 300        
             pbar = tqdm(total=max_progress, desc="Processing")
         
-        # add the API key to the session to authenticate during requests
-        s.headers.update(constants.API_KEY)
-        
-        while True:
+        # Decisions are reused until the tender, its book or our position changes (or 5 ticks pass)
+        tender_cache = TenderCache(horizon=5)
 
-            # get the current time of the case
-            tick = api_helpers.get_tick(s)
+        def trade(tick, snapshot):
+            # every book comes from one snapshot (its tick is the one the books were read on)
+            tick = snapshot["tick"]
 
-            books = api_helpers.get_books(s, False)
-            books_with_fees = api_helpers.get_books(s, True)
+            books = snapshot["books"]
+            books_with_fees = snapshot["books_with_fees"]
             portfolio = api_helpers.get_portfolio(s)
+            # Only the securities whose position changed are updated in the risk gate
+            helpers.risk_gate.sync(portfolio)
+
+            # Every tender is evaluated against the same snapshot, and the ones we accept are added
+            # to the what-if view so the next tender sees the position they leave us with
+            what_if = rit.BookView(books_with_fees, portfolio)
             tenders = api_helpers.get_tenders(s)
+            tender_cache.retain(tender["tender_id"] for tender in tenders)
+            candidates = []
             for tender in tenders:
                 print("Here")
                 helpers.split_market_from_ticker(tender)
-                if helpers.evaluate_tender(books, books_with_fees, portfolio, tender, tick):
-                    api_helpers.accept_tender(s, tender["tender_id"])
+                if tender_cache.evaluate(books, what_if, tender, tick):
+                    candidates.append(tender)
                 else:
                     print("Not taking it yet")
 
+            # Pick which of the good tenders to take together (they share the limits and the liquidity)
+            plan = tender_optimizer.optimize(what_if, candidates, budget=.005)
+            if plan.fell_back:
+                tqdm.write(f"tender optimizer ran out of time, using the best plan so far (greedy or better): {plan}")
+            for tender in plan.tenders:
+                api_helpers.accept_tender(s, tender["tender_id"])
+                tender_optimizer.accept(what_if, tender)
+
+            if constants.DEBUG:
+                tqdm.write(f"tender cache: {tender_cache.stats()}")
+                tqdm.write(f"tender plan: {plan}")
+                tqdm.write(f"risk gate: {helpers.risk_gate.stats()}")
+
+        def update_progress(tick):
             if constants.PROGRESS_BAR:
                 # Update Progress Bar
                 pbar.n = tick
                 pbar.refresh()
+            if constants.DEBUG:
+                tqdm.write(f"scheduler: {scheduler.stats()}")
+
+        # Trade when a book changes (and at least once a tick, since tenders come without the books changing)
+        scheduler = rit.Scheduler(client.get_case, tick_seconds=1 / constants.SPEED)
+        scheduler.on_change(lambda: api_helpers.get_snapshot(s), trade, milliseconds=50,
+                            changed=lambda snapshot: any(snapshot["changes"].values()))
+        scheduler.every_tick(update_progress)
+        scheduler.run()
 
 
 # this calls the main() method when you type 'python lt3.py' into the command prompt
@@ -0,0 +1,91 @@
+import time
+import helpers
+
+
+class TenderCache:
+    """Remembers the accept/reject decision for each tender until one of its inputs changes
+
+    A decision is reused while the tender, the underlying price of its security, the VWAP of the book
+    side it would be offloaded into and the portfolio positions are the same (to the cent), and for at
+    most `horizon` ticks (the price bounds in evaluate_tender depend on the tick).
+    """
+
+    def __init__(self, horizon=5):
+        """
+        Args:
+            horizon (int): ticks a decision can be reused for
+        """
+        self.horizon = horizon
+        self.decisions = {}     # tender_id to (fingerprint, tick, decision)
+        self.hits = 0
+        self.misses = 0
+        self.evaluation_time = 0.0
+
+    def fingerprint(self, books, view, tender, tick):
+        """Cheap summary of everything evaluate_tender reads for this tender
+
+        Args:
+            books (dict of dict of list of dicts): books without fees
+            view (BookView): what-if view of the books with fees and the portfolio
+            tender (dict): tender with its market split from the ticker
+            tick (int): tick we are on
+
+        Returns:
+            tuple: fingerprint (equal fingerprints give the same decision)
+        """
+        ticker = tender["ticker"]
+        side = view.side(ticker, "asks" if tender["action"] == "SELL" else "bids")
+        return (
+            tender["price"], tender["quantity"], tender["action"],
+            round(helpers.get_underlying_price({ticker: books[ticker]}, tick)[ticker], 2),
+            round(side.vwap(tender["quantity"]), 2),
+            view.position(ticker),
+            helpers.risk_gate.gross,
+            helpers.risk_gate.killed,
+        )
+
+    def evaluate(self, books, view, tender, tick):
+        """Same as helpers.evaluate_tender, but reuses the last decision if nothing changed
+
+        Returns:
+            bool: boolean for if it is profitible or not profitible
+        """
+        key = self.fingerprint(books, view, tender, tick)
+        cached = self.decisions.get(tender["tender_id"])
+        if cached is not None and cached[0] == key and tick - cached[1] < self.horizon:
+            self.hits += 1
+            return cached[2]
+
+        self.misses += 1
+        start = time.perf_counter()
+        decision = helpers.evaluate_tender(books, view, tender, tick)
+        self.evaluation_time += time.perf_counter() - start
+        self.decisions[tender["tender_id"]] = (key, tick, decision)
+        return decision
+
+    def retain(self, tender_ids):
+        """Forgets the decisions for tenders that are no longer open
+
+        Args:
+            tender_ids (iterable of ints): ids of the open tenders
+        """
+        tender_ids = set(tender_ids)
+        for tender_id in list(self.decisions):
+            if tender_id not in tender_ids:
+                del self.decisions[tender_id]
+
+    def stats(self):
+        """Gets the hit and miss counts and an estimate of the evaluation time the cache saved
+
+        Returns:
+            dict: hits, misses, hit_rate, evaluation_time and saved_time (seconds)
+        """
+        average = self.evaluation_time / self.misses if self.misses else 0
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0,
+            "evaluation_time": self.evaluation_time,
+            "saved_time": self.hits * average,
+        }
@@ -0,0 +1,148 @@
+import time
+import constants_6 as constants
+
+
+class TenderPlan:
+    """The tenders to accept (in order) and how the plan was found"""
+
+    __slots__ = ("tenders", "edge", "fell_back", "nodes", "elapsed")
+
+    def __init__(self, tenders, edge, fell_back, nodes, elapsed):
+        self.tenders = tenders          # tenders to accept, in the order to accept them
+        self.edge = edge                # expected edge of accepting them
+        self.fell_back = fell_back      # True if the search ran out of time (the plan is the greedy one or better)
+        self.nodes = nodes              # search nodes visited
+        self.elapsed = elapsed          # seconds spent
+
+    def __repr__(self):
+        return (f"TenderPlan(tenders={[tender['tender_id'] for tender in self.tenders]}, edge={self.edge:.2f}, "
+                f"fell_back={self.fell_back}, nodes={self.nodes}, elapsed={self.elapsed * 1000:.2f}ms)")
+
+
+def signed_quantity(tender):
+    """Change in our position from accepting a tender (negative if we sell to it)"""
+    return tender["quantity"] if tender["action"] == "BUY" else -tender["quantity"]
+
+
+def offload_side(tender):
+    """Side of the book we take from to get rid of a tender's position"""
+    return "bids" if tender["action"] == "BUY" else "asks"
+
+
+def within_limits(view, tender):
+    """Checks that accepting a tender keeps the what-if position inside SECURITY_LIMIT and GROSS_LIMIT"""
+    position = view.position(tender["ticker"])
+    new_position = position + signed_quantity(tender)
+    gross = view.gross() - abs(position) + abs(new_position)
+    return (abs(new_position) <= constants.TRADING_LIMITS["SECURITY_LIMIT"]
+            and gross <= constants.TRADING_LIMITS["GROSS_LIMIT"])
+
+
+def edge(view, tender):
+    """Expected edge of accepting a tender and offloading it into what is left of the book
+
+    Args:
+        view (BookView): what-if view of the books with fees (bids pay less, asks cost more) and the portfolio
+        tender (dict): tender with its market split from the ticker
+
+    Returns:
+        float: edge in dollars, or None if the book isn't deep enough to offload the tender
+    """
+    vwap = view.side(tender["ticker"], offload_side(tender)).vwap(tender["quantity"])
+    if vwap == -1:
+        return None
+    return (vwap - tender["price"] if tender["action"] == "BUY" else tender["price"] - vwap) * tender["quantity"]
+
+
+def accept(view, tender):
+    """Adds an accepted tender to a view (its position, and the liquidity used to offload it)"""
+    view.consume(tender["ticker"], offload_side(tender), tender["quantity"])
+    view.add_position(tender["ticker"], signed_quantity(tender))
+
+
+def greedy(view, tenders):
+    """Accepts tenders best standalone edge first while they still have edge and fit in the limits
+
+    Returns:
+        tuple: (list of accepted tenders, total edge)
+    """
+    view = view.fork()
+    accepted = []
+    total = 0
+    for tender in tenders:
+        value = edge(view, tender)
+        if value is not None and value > 0 and within_limits(view, tender):
+            accept(view, tender)
+            accepted.append(tender)
+            total += value
+    return accepted, total
+
+
+def optimize(view, tenders, budget=.005):
+    """Picks the set and order of tenders to accept that maximizes the expected edge within the limits
+
+    Tenders interact through SECURITY_LIMIT, GROSS_LIMIT and the liquidity they are offloaded into, so
+    this is a branch-and-bound over accept/skip for each tender (best standalone edge first). Taking
+    liquidity only makes the next tender's offload price worse, so the standalone edges of the tenders
+    left are an upper bound on what they can add. The greedy plan is the starting incumbent and is
+    used if the search doesn't finish within the budget.
+
+    Args:
+        view (BookView): what-if view of the books with fees and the portfolio (it isn't changed)
+        tenders (list of dicts): open tenders with their market split from the ticker
+        budget (float): seconds the search may take
+
+    Returns:
+        TenderPlan: the tenders to accept, in order
+    """
+    start = time.perf_counter()
+    deadline = start + budget
+
+    # Tenders that can't make money on their own never make money next to others
+    standalone = []
+    for tender in tenders:
+        value = edge(view, tender)
+        if value is not None and value > 0:
+            standalone.append((value, tender))
+    standalone.sort(key=lambda item: -item[0])
+    candidates = [tender for value, tender in standalone]
+
+    # Upper bound on the edge the tenders from index i on can add
+    bounds = [0] * (len(standalone) + 1)
+    for i in range(len(standalone) - 1, -1, -1):
+        bounds[i] = bounds[i + 1] + standalone[i][0]
+
+    best_tenders, best_edge = greedy(view, candidates)
+    best = {"tenders": best_tenders, "edge": best_edge}
+    nodes = 0
+    timed_out = False
+
+    def search(i, node_view, accepted, total):
+        nonlocal nodes, timed_out
+        nodes += 1
+        if total > best["edge"]:
+            best["tenders"], best["edge"] = list(accepted), total
+        if i == len(candidates) or total + bounds[i] <= best["edge"] or timed_out:
+            return
+        if time.perf_counter() > deadline:
+            timed_out = True
+            return
+
+        tender = candidates[i]
+
+        # Accept it (if it fits and still has edge after the tenders already accepted)
+        if within_limits(node_view, tender):
+            value = edge(node_view, tender)
+            if value is not None and value > 0:
+                next_view = node_view.fork()
+                accept(next_view, tender)
+                accepted.append(tender)
+                search(i + 1, next_view, accepted, total + value)
+                accepted.pop()
+
+        # Skip it
+        search(i + 1, node_view, accepted, total)
+
+    search(0, view, [], 0)
+
+    return TenderPlan(best["tenders"], best["edge"], timed_out, nodes, time.perf_counter() - start)
@@ -0,0 +1,105 @@
+"""Benchmark of ALGO1's cross-venue crossing scan
+
+Compares the original arbitrage_opportunity scan (deepcopy of the fee-adjusted book, then popping
+levels) with the ArrayBook two-pointer scan (ArrayBook.crossings) and binary search
+(ArrayBook.crossable_quantity) on books of 10 to 10,000 levels per side, where about half of each
+side crosses. The original scan pops from the back of the book, so its quantity is also checked
+against a plain walk of the merged book.
+
+Run it from the repository root:
+    python benchmarks/arbitrage_scan.py
+"""
+import argparse
+import copy
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rit.book import ArrayBook
+
+LEVELS = [10, 100, 1000, 10000]
+
+
+def original_scan(book):
+    """The crossing loop of ALGO1's original arbitrage_opportunity (without the history)"""
+    book_copy = copy.deepcopy(book)
+    amounts = {}
+    for security, security_book in book_copy.items():
+        margin = -1
+        amount = 0
+        bid_index = 0
+        ask_index = 0
+        while (len(security_book["asks"]) > ask_index and len(security_book["bids"]) > bid_index and (security_book["asks"][ask_index]["price"] < security_book["bids"][bid_index]["price"])):
+            if margin == -1:
+                margin = security_book["bids"][0]["price"] - security_book["asks"][0]["price"]
+            amount += min(security_book["asks"][0]["quantity"], security_book["bids"][0]["quantity"])
+            ask_market = security_book["asks"][0]["market"]
+            bid_market = security_book["bids"][0]["market"]
+            if (security_book["asks"][0]["quantity"] < security_book["bids"][0]["quantity"]):
+                security_book["bids"][0]["quantity"] -= security_book["asks"][0]["quantity"]
+                security_book["asks"].pop()
+            else:
+                security_book["asks"][0]["quantity"] -= security_book["bids"][0]["quantity"]
+                security_book["bids"].pop()
+            amounts[security] = {"amount": amount, "margin": margin, "ask_market": ask_market, "bid_market": bid_market}
+    return amounts
+
+
+def reference_quantity(bids, asks):
+    """Crossable quantity from a plain share-by-level walk of copies of the order lists"""
+    bids = [[order["price"], order["quantity"]] for order in bids]
+    asks = [[order["price"], order["quantity"]] for order in asks]
+    quantity = 0
+    while bids and asks and asks[0][0] < bids[0][0]:
+        taken = min(bids[0][1], asks[0][1])
+        quantity += taken
+        bids[0][1] -= taken
+        asks[0][1] -= taken
+        if bids[0][1] == 0:
+            bids.pop(0)
+        if asks[0][1] == 0:
+            asks.pop(0)
+    return quantity
+
+
+def make_book(levels, seed):
+    """Merged fee-adjusted book of two markets where about half of each side crosses"""
+    rng = random.Random(seed)
+    sides = {}
+    for side, start, step in (("bids", 10 + levels * .0005, -.001), ("asks", 10 - levels * .0005, .001)):
+        orders = [{"price": round(start + i * step + rng.uniform(-.0004, .0004), 4), "quantity": rng.randrange(100, 5000, 100),
+                   "market": rng.choice("MA")} for i in range(levels)]
+        orders.sort(key=lambda order: order["price"], reverse=(side == "bids"))
+        sides[side] = orders
+    return {"CRZY": sides}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats (the best one counts)")
+    args = parser.parse_args()
+
+    print(f"{'levels':>7} {'original':>12} {'two-pointer':>12} {'bisect':>12} {'speedup':>8}  quantity (original / two-pointer / reference)")
+    for levels in LEVELS:
+        book = make_book(levels, seed=levels)
+        bids = ArrayBook.from_orders(book["CRZY"]["bids"], "bids")
+        asks = ArrayBook.from_orders(book["CRZY"]["asks"], "asks")
+
+        number = max(1, 2000 // levels)
+        original = min(timeit.repeat(lambda: original_scan(book), number=number, repeat=args.repeat)) / number
+        two_pointer = min(timeit.repeat(lambda: bids.crossings(asks), number=number, repeat=args.repeat)) / number
+        bisect = min(timeit.repeat(lambda: bids.crossable_quantity(asks), number=number, repeat=args.repeat)) / number
+
+        original_quantity = original_scan(book).get("CRZY", {}).get("amount", 0)
+        quantity = bids.crossings(asks).quantity
+        reference = reference_quantity(book["CRZY"]["bids"], book["CRZY"]["asks"])
+        assert quantity == reference == bids.crossable_quantity(asks), (quantity, reference)
+
+        print(f"{levels:>7} {original * 1e6:>10.1f}us {two_pointer * 1e6:>10.1f}us {bisect * 1e6:>10.1f}us "
+              f"{original / two_pointer:>7.1f}x  {original_quantity:.0f} / {quantity:.0f} / {reference:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Order pacing benchmark against the stand-in with a configured order rate limit
+
+Sends ALGO2-style quote pairs (a BUY and a SELL limit order far enough from the market not to fill)
+to a stand-in that allows `--server-rate` orders per second, while the strategy is told the limit is
+`--limit` (ALGO2's ORDER_RATE). Compares the fixed speed bump ALGO2 used (sleep 1 / ORDER_RATE minus
+the time the pair took) with rit.RateController, reporting accepted orders per second, throttles
+and rejections. Run it with --server-rate below --limit to see the controller find the real limit.
+Before that, simulated loops (pairs with a fixed response time, no server, one loop and two
+sharing the controller) check that the controller settles on utilization * limit, and when the stand-in allows the full limit the
+controller's run is checked to get within TOLERANCE of it too.
+
+Run it from the repository root:
+    python benchmarks/order_rate.py --limit 10 --server-rate 10 --seconds 5
+    python benchmarks/order_rate.py --limit 10 --server-rate 6 --seconds 5
+"""
+import argparse
+import heapq
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import rit
+from rit.server import load_constants, make_server, serve_in_background
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+MIN_SPEED_BUMP = 0.01
+TOLERANCE = .05     # share of the target the controller's accepted orders per second may miss it by
+
+
+def fixed_delay(limit):
+    """ALGO2's original calculate_speed_bump"""
+    def delay(orders, elapsed):
+        return max(1.0 / limit - elapsed, MIN_SPEED_BUMP)
+    return delay
+
+
+def simulate(limit, loops=1, response=.03, pairs=800):
+    """Pairs from `loops` loops sharing a controller on simulated time, each response taking `response` seconds
+
+    Returns:
+        float: accepted orders per second over the second half of the pairs
+    """
+    controller = rit.RateController(limit)
+    controller.started = controller.updated = 0.0
+    # (simulated time the loop sends its next pair, loop), the loops starting a millisecond apart
+    loops_due = [(loop * .001, loop) for loop in range(loops)]
+    for i in range(pairs):
+        now, loop = heapq.heappop(loops_due)
+        now += response
+        controller.record("accepted", 2, now=now)
+        if i == pairs // 2:
+            start, accepted = now, 0
+        elif i > pairs // 2:
+            accepted += 2
+        # Same wait as RateController.delay, on simulated time
+        wait = max(2 / (controller.update(now) / loops) - response, controller.min_delay)
+        heapq.heappush(loops_due, (now + wait, loop))
+    return accepted / (now - start)
+
+
+def run(port, limit, seconds, controller=None):
+    """Quotes pairs for a number of seconds
+
+    Returns:
+        dict: accepted and rejected orders, throttles (429s the governor retried) and accepted orders per second
+    """
+    delay = controller.delay if controller is not None else fixed_delay(limit)
+    accepted = rejected = 0
+    with rit.Client({"X-API-Key": "ABIXYN28"}, base_url=f"http://localhost:{port}/v1",
+                    governor=rit.Governor(order_rate=limit)) as client:
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            sent = time.perf_counter()
+            results = client.gather(
+                client.async_client.post_order("ALGO", "LIMIT", 1, "BUY", 1.0),
+                client.async_client.post_order("ALGO", "LIMIT", 1, "SELL", 100.0),
+                return_exceptions=True,
+            )
+            ok = sum(not isinstance(result, Exception) for result in results)
+            accepted += ok
+            rejected += len(results) - ok
+            if controller is not None:
+                controller.record("accepted", ok)
+                controller.record("rejected", len(results) - ok)
+                controller.record_throttles(client.governor.stats()["orders_throttled"])
+            time.sleep(delay(len(results), time.perf_counter() - sent))
+        elapsed = time.perf_counter() - start
+        throttled = client.governor.stats()["orders_throttled"]
+        client.cancel_orders(all=True)
+    return {"accepted": accepted, "rejected": rejected, "throttled": throttled, "rate": accepted / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=float, default=10, help="orders per second the strategy is told it may send")
+    parser.add_argument("--server-rate", type=float, default=10, help="orders per second the stand-in allows")
+    parser.add_argument("--seconds", type=float, default=5, help="seconds each run quotes for")
+    args = parser.parse_args()
+
+    constants = load_constants(os.path.join(ROOT, "LT4", "constants_6.py"))
+    constants.SECURITIES = {"ALGO": {"VOLITILITY": .07, "START_PRICE": 10}}
+    constants.MARKETS = {"M": {"LIMIT_COST": 0, "MARKET_COST": 0}}
+    server = make_server(constants, port=0, tick_seconds=.2, order_rate=args.server_rate, start_tick=6)
+    stop = serve_in_background(server)
+    port = server.server_address[1]
+
+    target = args.limit * rit.RateController(args.limit).utilization
+    for loops in (1, 2):
+        simulated = simulate(args.limit, loops)
+        assert abs(simulated - target) <= TOLERANCE * target, \
+            f"simulated controller with {loops} loops settled at {simulated:.2f}/s, target {target:.2f}/s"
+        print(f"simulated controller, {loops} loop(s): {simulated:.2f}/s (target {target:.2f}/s)")
+
+    try:
+        print(f"limit {args.limit:g}/s, stand-in allows {args.server_rate:g}/s, {args.seconds:g} s per run")
+        print(f"{'pacing':>10} {'orders/s':>9} {'of server':>10} {'accepted':>9} {'rejected':>9} {'throttled':>10}")
+        for name in ("fixed", "controller"):
+            controller = rit.RateController(args.limit) if name == "controller" else None
+            result = run(port, args.limit, args.seconds, controller)
+            print(f"{name:>10} {result['rate']:>9.2f} {result['rate'] / args.server_rate:>9.0%} "
+                  f"{result['accepted']:>9} {result['rejected']:>9} {result['throttled']:>10}")
+            if controller is not None:
+                stats = controller.stats()
+                print(f"{'':>10} controller: pacing {stats['rate']:.2f}/s, limit estimate {stats['ceiling']:.2f}/s, "
+                      f"headroom {stats['headroom']:.2f}/s")
+                if args.server_rate >= args.limit:
+                    assert abs(result["rate"] - target) <= TOLERANCE * target, \
+                        f"controller reached {result['rate']:.2f}/s, target {target:.2f}/s"
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    main()
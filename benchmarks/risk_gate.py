@@ -0,0 +1,159 @@
+"""Benchmark and accounting check of rit.RiskGate
+
+Replays random order flow (submits with immediate partial fills, later fills, confirmed cancels,
+final states and responses seen twice) on two markets of a few securities, and after every event
+checks the gate's positions, gross and pending quantities, and its answer to a random proposed
+order, against a reference that sums everything from scratch like the strategies used to. The
+cross-venue case (selling CRZY_A against a long CRZY_M adds to gross) is checked on its own first.
+Then times one check against the from-scratch check for portfolios of 2 to 2,000 tickers.
+
+Run it from the repository root:
+    python benchmarks/risk_gate.py
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rit.risk import RiskGate, underlying
+
+LIMITS = {"SECURITY_LIMIT": 100000, "GROSS_LIMIT": 200000, "ORDER_LIMIT": 50000}
+TICKERS = [security + "_" + market for security in ("CRZY", "TAME", "ALGO") for market in ("M", "A")]
+
+
+def reference_check(limits, orders, positions, ticker, action, quantity, split=False):
+    """RiskGate's rules with every sum done from scratch
+
+    Args:
+        orders (dict): order id to {"ticker", "action", "left"} of the orders still pending
+        positions (dict): ticker to position
+    """
+    sign = 1 if action == "BUY" else -1
+    if not split and quantity > limits["ORDER_LIMIT"]:
+        return False
+    security = underlying(ticker)
+    net = sum(position for t, position in positions.items() if underlying(t) == security)
+    pending_side = sum(order["left"] for order in orders.values()
+                       if underlying(order["ticker"]) == security and order["action"] == action)
+    if abs(net + sign * (pending_side + quantity)) > limits["SECURITY_LIMIT"]:
+        return False
+    position = positions.get(ticker, 0)
+    gross = sum(abs(p) for p in positions.values())
+    pending = sum(order["left"] for order in orders.values())
+    if abs(position + sign * quantity) > abs(position) and gross + pending + quantity > limits["GROSS_LIMIT"]:
+        return False
+    return True
+
+
+def cross_venue():
+    """Gross is per ticker: a sell on one market against a long on the other adds to it"""
+    gate = RiskGate({"GROSS_LIMIT": 50000})
+    gate.sync({"CRZY_M": 20000})
+    assert not gate.check("CRZY_A", "SELL", 35000), "55000 gross approved"
+    assert gate.check("CRZY_A", "SELL", 30000)
+    assert gate.check("CRZY_M", "SELL", 35000), "reducing CRZY_M rejected"
+
+
+def replay(seed, events):
+    """Random order flow through the gate, compared with the reference after every event
+
+    Returns:
+        int: events replayed
+    """
+    rng = random.Random(seed)
+    gate = RiskGate(LIMITS)
+    positions = {}
+    orders = {}         # order id to the order as the API would report it, plus what is still pending
+    finished = []       # final states, sent again later like a reconcile reading them twice
+    next_id = 1
+
+    def fill(order, quantity):
+        order["quantity_filled"] += quantity
+        order["left"] = max(order["left"] - quantity, 0)
+        sign = 1 if order["action"] == "BUY" else -1
+        positions[order["ticker"]] = positions.get(order["ticker"], 0) + sign * quantity
+
+    for event in range(events):
+        kind = rng.random()
+        live = [order for order in orders.values() if order["status"] == "OPEN"]
+        if kind < .4 or not live:
+            # Submit, sometimes partly filled in the response
+            quantity = rng.randrange(100, 20000, 100)
+            order = {"order_id": next_id, "ticker": rng.choice(TICKERS), "action": rng.choice(("BUY", "SELL")),
+                     "quantity": quantity, "quantity_filled": 0, "status": "OPEN", "left": quantity}
+            next_id += 1
+            orders[order["order_id"]] = order
+            if rng.random() < .3:
+                fill(order, rng.randrange(0, quantity + 1, 100))
+            if order["quantity_filled"] == quantity:
+                order["status"] = "TRANSACTED"
+            gate.update(order)
+        elif kind < .7:
+            # A fill seen in a later response
+            order = rng.choice(live)
+            fill(order, rng.randrange(0, order["quantity"] - order["quantity_filled"] + 1, 100))
+            if order["quantity_filled"] == order["quantity"]:
+                order["status"] = "TRANSACTED"
+                finished.append(order)
+            gate.update(order)
+        elif kind < .85:
+            # Cancel confirmed, then (maybe after a last fill) the final state
+            order = rng.choice(live)
+            order["status"] = "CANCELLED"
+            order["left"] = 0
+            gate.cancelled(order["order_id"])
+            if rng.random() < .5:
+                fill(order, rng.randrange(0, order["quantity"] - order["quantity_filled"] + 1, 100))
+            gate.update(order)
+            finished.append(order)
+        elif finished:
+            # A final state seen again, then forgotten
+            order = finished.pop(rng.randrange(len(finished)))
+            gate.update(order)
+            gate.forget(order["order_id"])
+
+        pending = {order_id: order for order_id, order in orders.items() if order["left"]}
+        assert {t: p for t, p in gate.positions.items() if p} == {t: p for t, p in positions.items() if p}, event
+        assert gate.gross == sum(abs(p) for p in positions.values()), event
+        assert gate.pending == sum(order["left"] for order in pending.values()), event
+        for security, exposure in gate.exposures.items():
+            for action in ("BUY", "SELL"):
+                assert exposure.pending[action] == sum(order["left"] for order in pending.values()
+                                                       if underlying(order["ticker"]) == security
+                                                       and order["action"] == action), (event, security, action)
+
+        proposal = (rng.choice(TICKERS), rng.choice(("BUY", "SELL")), rng.randrange(100, 120000, 100))
+        assert gate.check(*proposal) == reference_check(LIMITS, pending, positions, *proposal), (event, proposal)
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=5000, help="order events per replay")
+    parser.add_argument("--seeds", type=int, default=5, help="replays with different seeds")
+    args = parser.parse_args()
+
+    cross_venue()
+    replayed = sum(replay(seed, args.events) for seed in range(args.seeds))
+    print(f"accounting matches the reference after {replayed} events ({args.seeds} replays), cross-venue gross ok")
+
+    print(f"{'tickers':>8} {'gate (µs)':>10} {'from scratch (µs)':>18}")
+    for count in (2, 20, 200, 2000):
+        positions = {f"S{i}_{market}": (i * 37 % 200 - 100) * 10 for i in range(count // 2) for market in ("M", "A")}
+        orders = {i: {"ticker": ticker, "action": "BUY", "left": 100} for i, ticker in enumerate(positions)}
+        gate = RiskGate(LIMITS)
+        gate.sync(positions)
+        for order_id, order in orders.items():
+            gate.update({"order_id": order_id, "ticker": order["ticker"], "action": "BUY", "quantity": 100,
+                         "quantity_filled": 0, "status": "OPEN"})
+        number = 2000
+        gate_time = timeit.timeit(lambda: gate.check("S0_M", "BUY", 1000), number=number) / number
+        scratch_time = timeit.timeit(lambda: reference_check(LIMITS, orders, positions, "S0_M", "BUY", 1000),
+                                     number=number // 10) / (number // 10)
+        print(f"{count:>8} {gate_time * 1e6:>10.2f} {scratch_time * 1e6:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
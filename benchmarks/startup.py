@@ -0,0 +1,70 @@
+"""Startup-time benchmark for the strategy entry points
+
+Each entry point is imported in a fresh interpreter from its own folder (like `python lt4.py` would
+run it, but without calling main) and then a rit.Client is made, which is everything that happens
+before the first API call. Fails if any entry point is over the budget or imports a heavy module
+that is meant to load on demand.
+
+Run it from the repository root:
+    python benchmarks/startup.py --budget 300 --runs 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# (folder, module) of each strategy entry point
+ENTRY_POINTS = [("LT4", "lt4"), ("ALGO1", "algo1"), ("ALGO2", "ALGO_2")]
+
+# Modules that must not be imported before the first API call
+HEAVY_MODULES = ["scipy", "tqdm", "pandas"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+import rit
+client = rit.Client({{"X-API-Key": "startup"}})
+elapsed = time.perf_counter() - start
+client.close()
+print(json.dumps({{"elapsed": elapsed, "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measure(folder, module):
+    """Imports an entry point in a fresh interpreter
+
+    Returns:
+        dict: elapsed (seconds) and heavy (heavy modules that were imported)
+    """
+    result = subprocess.run([sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                            cwd=os.path.join(ROOT, folder), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {folder}/{module}.py failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", type=float, default=300, help="milliseconds each entry point may take")
+    parser.add_argument("--runs", type=int, default=5, help="runs per entry point (the best one counts)")
+    args = parser.parse_args()
+
+    failed = False
+    for folder, module in ENTRY_POINTS:
+        runs = [measure(folder, module) for i in range(args.runs)]
+        best = min(run["elapsed"] for run in runs) * 1000
+        heavy = sorted(set(name for run in runs for name in run["heavy"]))
+        ok = best <= args.budget and not heavy
+        failed = failed or not ok
+        print(f"{folder}/{module}.py: {best:.0f} ms (budget {args.budget:.0f} ms)"
+              f"{', imports ' + ', '.join(heavy) if heavy else ''} {'ok' if ok else 'FAILED'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Benchmark and correctness check of LT4's tender optimizer
+
+Builds the fee view of random two-market books the way LT4's get_snapshot does (BookStore ArrayBooks
+with each market's MARKET_COST taken off the bids and added to the asks) and checks that:
+    a tender's edge is what offloading it really pays after MARKET_COST (the cheaper venue first)
+    the plan is the best set of tenders, against trying every subset, when the search finishes
+    20 open tenders are planned within the 5 ms budget LT4 gives the optimizer
+Then prints the planning time for 5 to 40 tenders.
+
+Run it from the repository root:
+    python benchmarks/tender_optimizer.py
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "LT4"))
+import rit
+from rit.book_store import BookStore
+import constants_6 as constants
+import tender_optimizer
+
+BUDGET = .005       # seconds LT4 gives the optimizer
+OVERRUN = .001      # seconds past the budget a plan may take (the greedy plan and the last search node)
+
+
+def fee_books(books):
+    """Fee view of raw books like LT4's get_snapshot builds it
+
+    Args:
+        books (dict): security to market to {"bids": [orders], "asks": [orders]}
+
+    Returns:
+        dict of dicts of ArrayBooks: {security: {"bids": ArrayBook, "asks": ArrayBook}}
+    """
+    bid_fees = {market: -info["MARKET_COST"] for market, info in constants.MARKETS.items()}
+    ask_fees = {market: info["MARKET_COST"] for market, info in constants.MARKETS.items()}
+    views = {}
+    for security, responses in books.items():
+        store = BookStore(constants.MARKETS.keys())
+        store.update(responses)
+        views[security] = {"bids": store.array_book("bids", bid_fees), "asks": store.array_book("asks", ask_fees)}
+    return views
+
+
+def random_case(rng, tenders):
+    """Random books, portfolio and open tenders for every security of the case
+
+    Returns:
+        tuple: (BookView, list of tenders)
+    """
+    order_ids = itertools.count(1)
+    books = {}
+    for security, info in constants.SECURITIES.items():
+        price = info["START_PRICE"]
+        books[security] = {}
+        for market in constants.MARKETS:
+            books[security][market] = {
+                side: [{"order_id": next(order_ids), "price": round(price + sign * rng.randrange(1, 60) / 100, 2),
+                        "quantity": rng.randrange(1000, 20000, 100), "quantity_filled": 0}
+                       for level in range(40)]
+                for side, sign in (("bids", -1), ("asks", 1))
+            }
+    portfolio = {security: rng.randrange(-40000, 40000, 1000) for security in constants.SECURITIES}
+    offers = []
+    for tender_id in range(tenders):
+        security = rng.choice(list(constants.SECURITIES))
+        action = rng.choice(("BUY", "SELL"))
+        price = constants.SECURITIES[security]["START_PRICE"] + (-1 if action == "BUY" else 1) * rng.randrange(-20, 60) / 100
+        offers.append({"tender_id": tender_id, "ticker": security, "action": action, "price": round(price, 2),
+                       "quantity": rng.randrange(5000, 60000, 1000)})
+    return rit.BookView(fee_books(books), portfolio), offers
+
+
+def venue_costs():
+    """A tender offloaded into one level on each market gets the cheaper market's bid after its cost first"""
+    order = lambda order_id, price: {"order_id": order_id, "price": price, "quantity": 1000, "quantity_filled": 0}
+    books = {"CRZY": {"M": {"bids": [order(1, 10.0)], "asks": []}, "A": {"bids": [order(2, 10.0)], "asks": []}}}
+    view = rit.BookView(fee_books(books), {"CRZY": 0})
+    tender = {"tender_id": 0, "ticker": "CRZY", "action": "BUY", "price": 9.9, "quantity": 1500}
+    cheap, dear = sorted(info["MARKET_COST"] for info in constants.MARKETS.values())
+    expected = (10.0 - 9.9) * 1500 - cheap * 1000 - dear * 500
+    value = tender_optimizer.edge(view, tender)
+    assert abs(value - expected) < 1e-6, f"edge {value:.4f}, expected {expected:.4f} after MARKET_COST"
+
+
+def exhaustive(view, tenders):
+    """Best total edge over every subset of the tenders with positive standalone edge, accepted best first"""
+    standalone = sorted(((tender_optimizer.edge(view, tender), tender) for tender in tenders), key=lambda item: -(item[0] or 0))
+    candidates = [tender for value, tender in standalone if value is not None and value > 0]
+    best = 0
+    for mask in range(1 << len(candidates)):
+        subset_view = view.fork()
+        total = 0
+        for i, tender in enumerate(candidates):
+            if not mask >> i & 1:
+                continue
+            value = tender_optimizer.edge(subset_view, tender)
+            if value is None or value <= 0 or not tender_optimizer.within_limits(subset_view, tender):
+                break
+            tender_optimizer.accept(subset_view, tender)
+            total += value
+        else:
+            best = max(best, total)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=200, help="random cases of 20 tenders timed against the budget")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    venue_costs()
+
+    checked = 0
+    for case in range(50):
+        view, tenders = random_case(rng, 10)
+        plan = tender_optimizer.optimize(view, tenders, budget=1.0)
+        if not plan.fell_back:
+            best = exhaustive(view, tenders)
+            assert abs(plan.edge - best) < 1e-6, f"case {case}: plan edge {plan.edge:.2f}, best {best:.2f}"
+            checked += 1
+    print(f"edge is net of MARKET_COST, plans match every subset tried in {checked} cases of 10 tenders")
+
+    times = []
+    fell_back = 0
+    for case in range(args.cases):
+        view, tenders = random_case(rng, 20)
+        plan = tender_optimizer.optimize(view, tenders, budget=BUDGET)
+        times.append(plan.elapsed)
+        fell_back += plan.fell_back
+    times.sort()
+    worst = times[-1]
+    assert worst <= BUDGET + OVERRUN, f"20 tenders took {worst * 1000:.2f} ms, budget {BUDGET * 1000:g} ms"
+    print(f"20 tenders, {args.cases} cases: p50 {times[len(times) // 2] * 1000:.2f} ms, "
+          f"p99 {times[int(len(times) * .99)] * 1000:.2f} ms, worst {worst * 1000:.2f} ms "
+          f"(budget {BUDGET * 1000:g} ms), {fell_back} fell back to the best plan so far")
+
+    print(f"{'tenders':>8} {'p50 (ms)':>9} {'worst (ms)':>11} {'fell back':>10}")
+    for count in (5, 10, 20, 40):
+        results = [tender_optimizer.optimize(*random_case(rng, count), budget=BUDGET) for case in range(50)]
+        elapsed = sorted(plan.elapsed for plan in results)
+        print(f"{count:>8} {elapsed[len(elapsed) // 2] * 1000:>9.2f} {elapsed[-1] * 1000:>11.2f} "
+              f"{sum(plan.fell_back for plan in results):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""Shared RIT Client REST API layer used by the LT4, ALGO1 and ALGO2 strategies.
+
+The strategies run as scripts from their own folders, so they add the repository root to
+sys.path before importing this package.
+"""
+from rit.client import ApiException, AsyncClient, BASE_URL
+from rit.governor import CircuitOpen, Governor
+from rit.rate_controller import RateController
+from rit.risk import RiskGate
+from rit.scheduler import Scheduler
+from rit.stats import LatencyHistogram
+from rit.sync_client import Client
+
+
+def __getattr__(name):
+    # The books need numpy, so they are only imported once a strategy uses them
+    if name in ("ArrayBook", "BookView", "Crossing"):
+        from rit import book
+        return getattr(book, name)
+    raise AttributeError(f"module 'rit' has no attribute {name!r}")
@@ -0,0 +1,379 @@
+import numpy as np
+
+
+class ArrayBook:
+    """One side of a merged (every market) book stored as NumPy arrays
+
+    Levels are kept best price first with prefix sums of quantity and notional, so "VWAP to fill Q",
+    "depth within X" and "consume Q" are binary searches instead of walks over lists of order dicts.
+    Consuming quantity returns a new ArrayBook that shares the arrays and only moves its start, so
+    the book it came from is never changed.
+    """
+
+    __slots__ = ("side", "prices", "quantities", "markets", "order_ids", "keys", "cum_quantity",
+                 "cum_notional", "consumed")
+
+    # Orders crossed on both sides past which crossings() works on the arrays instead of walking
+    WALK_DEPTH = 32
+
+    def __init__(self, side, prices, quantities, markets, order_ids=None, consumed=0):
+        """
+        Args:
+            side (str): "bids" or "asks"
+            prices (np.ndarray): price of each order, best first
+            quantities (np.ndarray): quantity left on each order
+            markets (np.ndarray): market of each order (like "M" or "A")
+            order_ids (np.ndarray): order id of each order
+            consumed (float): quantity already taken from the front of the book
+        """
+        self.side = side
+        self.prices = prices
+        self.quantities = quantities
+        self.markets = markets
+        self.order_ids = order_ids if order_ids is not None else np.zeros(len(prices), dtype=np.int64)
+
+        # Sorting key that is increasing from the best price (negative prices for bids)
+        self.keys = -prices if side == "bids" else prices
+        self.cum_quantity = np.cumsum(quantities)
+        self.cum_notional = np.cumsum(prices * quantities)
+        self.consumed = consumed
+
+    @classmethod
+    def from_responses(cls, markets_books, side, price_adjustments=None):
+        """Builds one side of the merged book straight from the securities/book responses
+
+        Args:
+            markets_books (list of tuples): (market, securities/book response) for each market
+            side (str): "bids" or "asks"
+            price_adjustments (dict): amount added to the price of each market's orders (for fees)
+
+        Returns:
+            ArrayBook: the merged side of the book
+        """
+        prices = []
+        quantities = []
+        markets = []
+        order_ids = []
+        for market, response in markets_books:
+            adjustment = price_adjustments[market] if price_adjustments else 0
+            for order in response[side]:
+                prices.append(order["price"] + adjustment)
+                quantities.append(order["quantity"] - order["quantity_filled"])
+                markets.append(market)
+                order_ids.append(order.get("order_id", 0))
+
+        prices = np.array(prices, dtype=np.float64)
+        quantities = np.array(quantities, dtype=np.float64)
+        markets = np.array(markets, dtype="<U8")
+        order_ids = np.array(order_ids, dtype=np.int64)
+
+        # Stable sort so orders at the same price keep the order they came in (like list.sort)
+        order = np.argsort(-prices if side == "bids" else prices, kind="stable")
+        return cls(side, prices[order], quantities[order], markets[order], order_ids[order])
+
+    @classmethod
+    def from_orders(cls, orders, side):
+        """Builds an ArrayBook from a sorted list of order dicts (like get_book returns)"""
+        return cls(side,
+                   np.array([order["price"] for order in orders], dtype=np.float64),
+                   np.array([order["quantity"] for order in orders], dtype=np.float64),
+                   np.array([order.get("market", "M") for order in orders], dtype="<U8"),
+                   np.array([order.get("order_id", 0) for order in orders], dtype=np.int64))
+
+    def __len__(self):
+        return len(self.prices) - self.front()
+
+    @property
+    def total_quantity(self):
+        """Quantity left in the book"""
+        return (self.cum_quantity[-1] if len(self.cum_quantity) else 0) - self.consumed
+
+    def level_of(self, quantity):
+        """Index of the order that holds the share `quantity` shares past the front of the book"""
+        return int(np.searchsorted(self.cum_quantity, self.consumed + quantity, side="right"))
+
+    def front(self):
+        """Index of the first order that still has quantity"""
+        return self.level_of(0)
+
+    def front_quantity(self, index):
+        """Quantity left on the order at index (taking the consumed quantity into account)"""
+        return self.cum_quantity[index] - max(self.consumed, self.cum_quantity[index] - self.quantities[index])
+
+    def best_price(self):
+        """Price of the first order that still has quantity (None if the book is empty)"""
+        index = self.front()
+        return float(self.prices[index]) if index < len(self.prices) else None
+
+    def notional_to(self, quantity):
+        """Notional of the first `quantity` shares from the very start of the arrays"""
+        index = int(np.searchsorted(self.cum_quantity, quantity, side="left"))
+        if index == 0:
+            return quantity * self.prices[0]
+        return self.cum_notional[index - 1] + (quantity - self.cum_quantity[index - 1]) * self.prices[index]
+
+    def vwap(self, quantity):
+        """Volume weighted average price of taking quantity from the front of the book
+
+        Args:
+            quantity (float): quantity to find the vwap for
+
+        Returns:
+            float: vwap, or -1 if quantity is 0 or the book isn't deep enough
+        """
+        if quantity <= 0 or quantity > self.total_quantity:
+            return -1
+        start = self.consumed
+        return float((self.notional_to(start + quantity) - (self.notional_to(start) if start else 0)) / quantity)
+
+    def depth_within(self, distance):
+        """Quantity resting within distance of the best price (inclusive)
+
+        Args:
+            distance (float): price distance, like .05 for 5 cents
+
+        Returns:
+            float: quantity within distance of the best price
+        """
+        index = self.front()
+        if index >= len(self.prices):
+            return 0
+        end = int(np.searchsorted(self.keys, self.keys[index] + distance + 1e-9, side="right"))
+        return float(self.cum_quantity[end - 1] - self.consumed)
+
+    def consume(self, quantity):
+        """Takes quantity from the front of the book
+
+        Args:
+            quantity (float): the quantity being removed
+
+        Returns:
+            ArrayBook: the book left over, or -1 if the book didn't have enough quantity
+        """
+        if quantity > self.total_quantity:
+            return -1
+        return self._shifted(self.consumed + quantity)
+
+    def _shifted(self, consumed):
+        book = ArrayBook.__new__(ArrayBook)
+        for name in ArrayBook.__slots__:
+            setattr(book, name, getattr(self, name))
+        book.consumed = consumed
+        return book
+
+    def price_at(self, quantity):
+        """Price of the order holding the share `quantity` shares past the front (None if past the end)"""
+        index = self.level_of(quantity)
+        return float(self.prices[index]) if index < len(self.prices) else None
+
+    def crossable_quantity(self, asks):
+        """Quantity that can be bought from asks and sold to these bids at a profit
+
+        Since the ask price only goes up and the bid price only goes down as quantity is taken, the
+        crossing point is found with a binary search over the quantity.
+
+        Args:
+            asks (ArrayBook): the ask side (self must be the bid side)
+
+        Returns:
+            float: crossable quantity (0 if the books don't cross)
+        """
+        low, high = 0, int(min(self.total_quantity, asks.total_quantity))
+        if high == 0 or not asks.price_at(0) < self.price_at(0):
+            return 0
+
+        # Share low always crosses and share high is the first one that might not
+        while low + 1 < high:
+            middle = (low + high) // 2
+            if asks.price_at(middle) < self.price_at(middle):
+                low = middle
+            else:
+                high = middle
+        return float(high)
+
+    def crossings(self, asks):
+        """Finds every profitable cross between these bids and the asks
+
+        Both sides are walked from the front with two pointers: take the smaller of the two front
+        orders and move on from the one that ran out, keeping what is left of the other in a local
+        variable. Nothing is copied or changed. When the books cross deeper than WALK_DEPTH orders
+        the same walk is done with arrays instead: the crossable quantity comes from the binary
+        search, every point where a crossing order runs out splits it into crosses, and the orders
+        of each cross are binary searches over the prefix sums.
+
+        Args:
+            asks (ArrayBook): the ask side (self must be the bid side)
+
+        Returns:
+            Crossing: the quantity, margin and markets of each cross, best margin first
+        """
+        bid_index, ask_index = self.front(), asks.front()
+        if bid_index >= len(self.prices) or ask_index >= len(asks.prices):
+            return Crossing.empty()
+
+        # Still crossing WALK_DEPTH orders into both sides means a deep cross, so use the arrays
+        bid_deep, ask_deep = bid_index + self.WALK_DEPTH, ask_index + self.WALK_DEPTH
+        if bid_deep < len(self.prices) and ask_deep < len(asks.prices) and asks.prices[ask_deep] < self.prices[bid_deep]:
+            return self._crossings_from_arrays(asks)
+
+        bid_prices, bid_quantities, bid_markets = self.prices, self.quantities, self.markets
+        ask_prices, ask_quantities, ask_markets = asks.prices, asks.quantities, asks.markets
+        bid_left = float(self.front_quantity(bid_index))
+        ask_left = float(asks.front_quantity(ask_index))
+        quantities, margins, cross_bid_markets, cross_ask_markets = [], [], [], []
+
+        while True:
+            margin = float(bid_prices[bid_index] - ask_prices[ask_index])
+            if margin <= 0:
+                break
+
+            quantity = min(bid_left, ask_left)
+            quantities.append(quantity)
+            margins.append(margin)
+            cross_bid_markets.append(bid_markets[bid_index])
+            cross_ask_markets.append(ask_markets[ask_index])
+            bid_left -= quantity
+            ask_left -= quantity
+
+            # Move on from whichever order ran out (or both)
+            if bid_left == 0:
+                bid_index += 1
+                if bid_index == len(bid_prices):
+                    break
+                bid_left = float(bid_quantities[bid_index])
+            if ask_left == 0:
+                ask_index += 1
+                if ask_index == len(ask_prices):
+                    break
+                ask_left = float(ask_quantities[ask_index])
+
+        return Crossing(np.array(quantities, dtype=np.float64), np.array(margins, dtype=np.float64),
+                        np.array(cross_bid_markets, dtype="<U8"), np.array(cross_ask_markets, dtype="<U8"))
+
+    def _crossings_from_arrays(self, asks):
+        quantity = self.crossable_quantity(asks)
+        if quantity == 0:
+            return Crossing.empty()
+
+        # Where each crossing order runs out, measured from the front of its side
+        bid_ends = self.cum_quantity[self.front():self.level_of(quantity - 1) + 1] - self.consumed
+        ask_ends = asks.cum_quantity[asks.front():asks.level_of(quantity - 1) + 1] - asks.consumed
+        ends = np.union1d(bid_ends, ask_ends)
+        ends = np.append(ends[ends < quantity], quantity)
+        starts = np.concatenate(([0], ends[:-1]))
+
+        bid_levels = np.searchsorted(self.cum_quantity, starts + self.consumed, side="right")
+        ask_levels = np.searchsorted(asks.cum_quantity, starts + asks.consumed, side="right")
+        return Crossing(ends - starts, self.prices[bid_levels] - asks.prices[ask_levels],
+                        self.markets[bid_levels], asks.markets[ask_levels])
+
+
+class Crossing:
+    """The crosses between a bid side and an ask side (one per pair of orders), best margin first"""
+
+    __slots__ = ("quantities", "margins", "bid_markets", "ask_markets")
+
+    def __init__(self, quantities, margins, bid_markets, ask_markets):
+        """
+        Args:
+            quantities (np.ndarray): quantity of each cross
+            margins (np.ndarray): bid price - ask price (with fees) of each cross
+            bid_markets (np.ndarray): market the bid of each cross is on
+            ask_markets (np.ndarray): market the ask of each cross is on
+        """
+        self.quantities = quantities
+        self.margins = margins
+        self.bid_markets = bid_markets
+        self.ask_markets = ask_markets
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros(0), np.zeros(0), np.zeros(0, dtype="<U8"), np.zeros(0, dtype="<U8"))
+
+    def __len__(self):
+        return len(self.quantities)
+
+    def __bool__(self):
+        return len(self.quantities) > 0
+
+    @property
+    def quantity(self):
+        """Quantity that can be bought from the asks and sold to the bids at a profit"""
+        return float(self.quantities.sum())
+
+    @property
+    def profit(self):
+        """Profit of crossing all of it"""
+        return float(self.quantities @ self.margins)
+
+    def level(self, index):
+        """Gets one cross as (quantity, margin, bid market, ask market)"""
+        return (float(self.quantities[index]), float(self.margins[index]),
+                str(self.bid_markets[index]), str(self.ask_markets[index]))
+
+    @property
+    def levels(self):
+        """Every cross as (quantity, margin, bid market, ask market)"""
+        return [self.level(index) for index in range(len(self))]
+
+    def __repr__(self):
+        return f"Crossing(quantity={self.quantity}, profit={self.profit:.2f}, levels={len(self)})"
+
+
+class BookView:
+    """What-if overlay on a snapshot's books (ArrayBooks) and portfolio
+
+    The overlay only records how much has been consumed from each side and how each position has
+    changed, so the snapshot itself is never copied or changed. Fork a view to try something out
+    independently, or keep using the same view to let the effects build on each other.
+    """
+
+    __slots__ = ("books", "portfolio", "consumed", "position_changes")
+
+    def __init__(self, books, portfolio, consumed=None, position_changes=None):
+        """
+        Args:
+            books (dict of dicts of ArrayBooks): {security: {"bids": ArrayBook, "asks": ArrayBook}}
+            portfolio (dict): dict where key is security and value is portfolio quantity
+            consumed (dict): (security, side) to the quantity consumed from it
+            position_changes (dict): security to the change in its position
+        """
+        self.books = books
+        self.portfolio = portfolio
+        self.consumed = consumed if consumed is not None else {}
+        self.position_changes = position_changes if position_changes is not None else {}
+
+    def fork(self):
+        """Gets an independent view starting from this one (only the overlay is copied)"""
+        return BookView(self.books, self.portfolio, dict(self.consumed), dict(self.position_changes))
+
+    def side(self, security, side):
+        """Gets one side of a security's book with the consumed quantity taken off the front
+
+        Returns:
+            ArrayBook: view of the book
+        """
+        book = self.books[security][side]
+        consumed = self.consumed.get((security, side))
+        return book.consume(consumed) if consumed else book
+
+    def consume(self, security, side, quantity):
+        """Takes quantity from the front of one side of a security's book (as much as there is)"""
+        available = self.side(security, side).total_quantity
+        self.consumed[(security, side)] = self.consumed.get((security, side), 0) + min(quantity, available)
+
+    def position(self, security):
+        """Gets the position of a security including the what-if changes"""
+        return self.portfolio[security] + self.position_changes.get(security, 0)
+
+    def add_position(self, security, quantity):
+        """Changes the position of a security (quantity is negative for selling)"""
+        self.position_changes[security] = self.position_changes.get(security, 0) + quantity
+
+    def set_position(self, security, quantity):
+        """Sets the position of a security"""
+        self.add_position(security, quantity - self.position(security))
+
+    def gross(self):
+        """Gets the sum of the absolute positions of every security"""
+        return sum(abs(self.position(security)) for security in self.portfolio)
@@ -0,0 +1,194 @@
+import bisect
+import heapq
+import itertools
+
+import numpy as np
+
+from rit.book import ArrayBook
+
+
+class BookChanges:
+    """What changed in a book between two polls"""
+
+    __slots__ = ("added", "removed", "filled", "best_changed")
+
+    def __init__(self):
+        self.added = []         # order ids that are new
+        self.removed = []       # order ids that are gone (filled or cancelled)
+        self.filled = []        # (order id, newly filled quantity) for orders that were partially filled
+        self.best_changed = False
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.filled)
+
+    def __repr__(self):
+        return (f"BookChanges(added={len(self.added)}, removed={len(self.removed)}, "
+                f"filled={len(self.filled)}, best_changed={self.best_changed})")
+
+
+class _MarketSide:
+    """The orders on one side of one market, sorted in price-time priority by (price key, sequence)"""
+
+    __slots__ = ("side", "keys", "ids")
+
+    def __init__(self, side):
+        self.side = side
+        self.keys = []
+        self.ids = []
+
+    def key(self, price, sequence):
+        return (-price if self.side == "bids" else price, sequence)
+
+    def insert(self, key, order_id):
+        index = bisect.bisect(self.keys, key)
+        self.keys.insert(index, key)
+        self.ids.insert(index, order_id)
+
+    def remove(self, key):
+        index = bisect.bisect_left(self.keys, key)
+        del self.keys[index]
+        del self.ids[index]
+
+
+class BookStore:
+    """Merged book of one security on every market, kept up to date by diffing each poll by order_id
+
+    Each poll only inserts the new orders, removes the missing ones and updates the remaining quantity
+    of partially filled ones, so the sorting cost is the size of the change instead of the whole book.
+    The order dicts of the responses are never changed. The merged views (order dicts and ArrayBooks)
+    are built by merging the already sorted markets and are cached until the book changes.
+    """
+
+    def __init__(self, markets):
+        """
+        Args:
+            markets (list of str): markets in the order their books are merged (like ["M", "A"])
+        """
+        self.markets = list(markets)
+        self.sides = {market: {"bids": _MarketSide("bids"), "asks": _MarketSide("asks")} for market in self.markets}
+        self.orders = {}        # order id to [order dict, market, side, key]
+        self.sequence = itertools.count()
+        self.version = 0
+        self._views = {}
+
+    def update(self, responses):
+        """Applies a new poll of the books
+
+        Args:
+            responses (dict): market to its securities/book response
+
+        Returns:
+            BookChanges: the orders added, removed and partially filled since the last poll
+        """
+        changes = BookChanges()
+        best_before = self.best()
+        seen = set()
+
+        for market, response in responses.items():
+            for side in ("bids", "asks"):
+                market_side = self.sides[market][side]
+                for order in response[side]:
+                    order_id = order["order_id"]
+                    seen.add(order_id)
+                    entry = self.orders.get(order_id)
+
+                    if entry is None:
+                        key = market_side.key(order["price"], next(self.sequence))
+                        market_side.insert(key, order_id)
+                        self.orders[order_id] = [order, market, side, key]
+                        changes.added.append(order_id)
+                        continue
+
+                    previous = entry[0]
+                    if previous["price"] != order["price"]:
+                        # Orders don't normally change price, but if one does it moves to the back of its new level
+                        market_side.remove(entry[3])
+                        entry[3] = market_side.key(order["price"], next(self.sequence))
+                        market_side.insert(entry[3], order_id)
+                        changes.added.append(order_id)
+                    elif previous["quantity_filled"] != order["quantity_filled"] or previous["quantity"] != order["quantity"]:
+                        changes.filled.append((order_id, order["quantity_filled"] - previous["quantity_filled"]))
+                    entry[0] = order
+
+        for order_id in [order_id for order_id in self.orders if order_id not in seen]:
+            order, market, side, key = self.orders.pop(order_id)
+            self.sides[market][side].remove(key)
+            changes.removed.append(order_id)
+
+        if changes:
+            self.version += 1
+            self._views = {}
+            changes.best_changed = self.best() != best_before
+        return changes
+
+    def _remaining(self, order_id):
+        order = self.orders[order_id][0]
+        return order["quantity"] - order["quantity_filled"]
+
+    def best(self):
+        """Gets the best (price, remaining quantity) of each side
+
+        Returns:
+            tuple: (best bid, best ask), each (price, quantity) or None
+        """
+        best = []
+        for side in ("bids", "asks"):
+            fronts = [self.sides[market][side] for market in self.markets if self.sides[market][side].ids]
+            if not fronts:
+                best.append(None)
+                continue
+            front = min(fronts, key=lambda market_side: market_side.keys[0][0])
+            order_id = front.ids[0]
+            best.append((self.orders[order_id][0]["price"], self._remaining(order_id)))
+        return tuple(best)
+
+    def _merged_ids(self, side, price_adjustments=None):
+        """Order ids of one side of every market merged best first (with each market's price adjustment)"""
+        sign = -1 if side == "bids" else 1
+        market_lists = []
+        for market in self.markets:
+            market_side = self.sides[market][side]
+            adjustment = sign * price_adjustments[market] if price_adjustments else 0
+            market_lists.append([(key[0] + adjustment, order_id) for key, order_id in zip(market_side.keys, market_side.ids)])
+        # heapq.merge is stable, so equal prices keep the market order then time priority
+        return [order_id for key, order_id in heapq.merge(*market_lists, key=lambda item: item[0])]
+
+    def book(self, side):
+        """Gets one side of the merged book like build_book (without fees)
+
+        Returns:
+            list of dicts: orders best first, with "market" split from "ticker" and "quantity" being the quantity left
+        """
+        if ("book", side) not in self._views:
+            book = []
+            for order_id in self._merged_ids(side):
+                order, market = self.orders[order_id][:2]
+                order = dict(order)
+                order["market"] = market
+                if order["ticker"].endswith("_" + market):
+                    order["ticker"] = order["ticker"][:-len(market) - 1]
+                order["quantity"] = order["quantity"] - order["quantity_filled"]
+                book.append(order)
+            self._views[("book", side)] = book
+        return self._views[("book", side)]
+
+    def array_book(self, side, price_adjustments=None):
+        """Gets one side of the merged book as an ArrayBook
+
+        Args:
+            side (str): "bids" or "asks"
+            price_adjustments (dict): amount added to the price of each market's orders (for fees)
+
+        Returns:
+            ArrayBook: the merged side of the book
+        """
+        view = ("array", side, tuple(sorted(price_adjustments.items())) if price_adjustments else None)
+        if view not in self._views:
+            ids = self._merged_ids(side, price_adjustments)
+            entries = [self.orders[order_id] for order_id in ids]
+            prices = np.array([entry[0]["price"] + (price_adjustments[entry[1]] if price_adjustments else 0)
+                               for entry in entries], dtype=np.float64)
+            quantities = np.array([entry[0]["quantity"] - entry[0]["quantity_filled"] for entry in entries], dtype=np.float64)
+            markets = np.array([entry[1] for entry in entries], dtype="<U8")
+            self._views[view] = ArrayBook(side, prices, quantities, markets, np.array(ids, dtype=np.int64))
+        return self._views[view]
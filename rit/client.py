@@ -0,0 +1,252 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from rit.governor import CircuitOpen, GovernedSession, Governor, backoff_delay
+
+BASE_URL = "http://localhost:9999/v1"
+
+
+class ApiException(Exception):
+    pass
+
+
+class AsyncClient:
+    """Async client for the RIT Client REST API
+
+    Every request is sent over one requests.Session whose connection pool keeps a connection alive
+    for each worker, so independent reads and order posts can be awaited together (asyncio.gather)
+    instead of one after the other. Every request on the session goes through the governor, which
+    keeps them under the rate limits.
+    """
+
+    def __init__(self, api_key, base_url=BASE_URL, pool_size=16, governor=None):
+        """
+        Args:
+            api_key (dict): header with the API key, like {'X-API-Key': 'ABIXYN28'}
+            base_url (str): base endpoint of the RIT Client REST API
+            pool_size (int): how many requests can be in flight at the same time
+            governor (Governor): rate limits and backoff (one with no rate limits by default)
+        """
+        self.base_url = base_url
+        self.governor = governor or Governor()
+        self.session = GovernedSession(self.governor)
+        self.session.headers.update(api_key)
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self._executor = ThreadPoolExecutor(max_workers=pool_size)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Closes the connection pool and the worker threads"""
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+    def _send(self, method, url, params):
+        """Sends one request on a worker thread
+
+        Raises:
+            ApiException: If the API returns a 401 Unauthorized status code, indicating that the API key is incorrect.
+
+        Returns:
+            requests.Response: The HTTP response object returned by the API call.
+        """
+        response = self.session.request(method, f"{self.base_url}/{url}", params=params)
+        if response.status_code == 401:
+            raise ApiException(
+                'The API key provided in this Python code must match that in the RIT client '
+                '(please refer to the API hyperlink in the client toolbar and/or the RIT – User Guide – REST API Documentation.pdf)'
+            )
+        return response
+
+    async def request(self, method, url, params=None):
+        """Sends a request without blocking the event loop
+
+        Args:
+            method (str): HTTP method ("GET", "POST" or "DELETE")
+            url (str): The URL segment (appended to the base endpoint), like "securities/book"
+            params (dict): query parameters
+
+        Raises:
+            ApiException: If the API key is wrong or the request was not successful.
+
+        Returns:
+            dict or list: the decoded JSON body
+        """
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(self._executor, self._send, method, url, params)
+        if response.status_code != 200:
+            raise ApiException(f"{method} {url} returned {response.status_code}: {response.text}")
+        return response.json()
+
+    async def get(self, url, params=None):
+        """Reads from the API, sending the read again until it is successful (like get_from_api)
+
+        Args:
+            url (str): The URL segment (appended to the base endpoint)
+            params (dict): query parameters
+
+        Returns:
+            dict or list: the decoded JSON body
+        """
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            try:
+                response = await loop.run_in_executor(self._executor, self._send, "GET", url, params)
+            except CircuitOpen as exception:
+                await asyncio.sleep(exception.retry_in)
+                continue
+            if response.status_code == 200:
+                return response.json()
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+
+    # /case
+
+    async def get_case(self):
+        """Gets the case information (name, period, tick, ticks_per_period, total_periods, status)"""
+        return await self.get("case")
+
+    async def get_tick(self):
+        """Gets the current tick of the running case"""
+        case = await self.get_case()
+        return case["tick"]
+
+    # /securities
+
+    async def get_securities(self, ticker=None):
+        """Gets every security (or just one) with its position, last price and limits
+
+        Args:
+            ticker (str): only return this security
+
+        Returns:
+            list of dicts: one dict for each security
+        """
+        return await self.get("securities", {"ticker": ticker} if ticker else None)
+
+    async def get_book(self, ticker, limit=None):
+        """Gets the order book of one security
+
+        Args:
+            ticker (str): the full ticker (like CRZY_M)
+            limit (int): maximum number of orders on each side
+
+        Returns:
+            dict: {"bids": [orders], "asks": [orders]}
+        """
+        params = {"ticker": ticker}
+        if limit is not None:
+            params["limit"] = limit
+        return await self.get("securities/book", params)
+
+    async def get_books(self, tickers):
+        """Gets the order books of many securities at the same time
+
+        Args:
+            tickers (list of str): full tickers (like ["CRZY_M", "CRZY_A"])
+
+        Returns:
+            dict: ticker to {"bids": [orders], "asks": [orders]}
+        """
+        books = await asyncio.gather(*(self.get_book(ticker) for ticker in tickers))
+        return dict(zip(tickers, books))
+
+    async def get_history(self, ticker, limit=None):
+        """Gets the OHLC history of a security, newest tick first
+
+        Args:
+            ticker (str): the full ticker
+            limit (int): number of ticks to return
+
+        Returns:
+            list of dicts: {"tick", "open", "high", "low", "close"} for each tick
+        """
+        params = {"ticker": ticker}
+        if limit is not None:
+            params["limit"] = limit
+        return await self.get("securities/history", params)
+
+    # /orders
+
+    async def get_orders(self, status=None):
+        """Gets our orders
+
+        Args:
+            status (str): "OPEN", "TRANSACTED" or "CANCELLED" (OPEN if None, like the RIT client)
+
+        Returns:
+            list of dicts: one dict for each order
+        """
+        return await self.get("orders", {"status": status} if status else None)
+
+    async def get_order(self, order_id):
+        """Gets one of our orders by its id"""
+        return await self.get(f"orders/{order_id}")
+
+    async def post_order(self, ticker, type, quantity, action, price=None):
+        """Submits an order
+
+        Args:
+            ticker (str): the full ticker (like CRZY_M)
+            type (str): "MARKET" or "LIMIT"
+            quantity (int): number of shares
+            action (str): "BUY" or "SELL"
+            price (float): limit price (only for LIMIT orders)
+
+        Raises:
+            ApiException: If the order was not accepted. Orders are never sent twice.
+
+        Returns:
+            dict: the order the RIT client created
+        """
+        params = {"ticker": ticker, "type": type, "quantity": quantity, "action": action}
+        if price is not None:
+            params["price"] = price
+        return await self.request("POST", "orders", params)
+
+    async def cancel_order(self, order_id):
+        """Cancels one of our open orders
+
+        Returns:
+            dict: {"success": bool}
+        """
+        return await self.request("DELETE", f"orders/{order_id}")
+
+    async def cancel_orders(self, ids=None, ticker=None, all=False):
+        """Cancels several of our open orders in one request (/commands/cancel)
+
+        Args:
+            ids (list of ints): orders to cancel
+            ticker (str): cancel every open order of this ticker instead
+            all (bool): cancel every open order instead
+
+        Returns:
+            dict: {"cancelled_order_ids": list of ints}
+        """
+        if ids is not None:
+            params = {"ids": ",".join(str(order_id) for order_id in ids)}
+        elif ticker is not None:
+            params = {"ticker": ticker}
+        else:
+            params = {"all": 1 if all else 0}
+        return await self.request("POST", "commands/cancel", params)
+
+    # /tenders
+
+    async def get_tenders(self):
+        """Gets all the current tender offers"""
+        return await self.get("tenders")
+
+    async def accept_tender(self, tender_id, price=None):
+        """Accepts a tender (price is only needed for competitive tenders)"""
+        return await self.request("POST", f"tenders/{tender_id}", {"price": price} if price is not None else None)
+
+    async def decline_tender(self, tender_id):
+        """Declines a tender"""
+        return await self.request("DELETE", f"tenders/{tender_id}")
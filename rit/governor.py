@@ -0,0 +1,265 @@
+import collections
+import functools
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+
+class CircuitOpen(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request while the server looks down"""
+
+    def __init__(self, retry_in):
+        super().__init__(f"the RIT API looks down, not sending requests for another {retry_in:.2f} s")
+        self.retry_in = retry_in
+
+
+def backoff_delay(attempt, base=.05, cap=2.0):
+    """Exponential backoff with jitter (between half and all of base * 2^attempt, at most cap)
+
+    Args:
+        attempt (int): retries so far (0 for the first retry)
+        base (float): delay of the first retry in seconds
+        cap (float): longest delay in seconds
+
+    Returns:
+        float: seconds to wait before the next retry
+    """
+    return min(cap, base * 2 ** attempt) * random.uniform(.5, 1)
+
+
+def retry_after(response):
+    """Seconds a 429 response asks us to wait (Retry-After header, or "wait" in RIT's JSON body)
+
+    Returns:
+        float: seconds to wait, or None if the response doesn't say
+    """
+    header = response.headers.get("Retry-After")
+    if header is not None:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    try:
+        return float(response.json()["wait"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+class TokenBucket:
+    """`rate` tokens per second with bursts of up to `burst` tokens"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait(self):
+        """Seconds until a token is available (0 if one is available now)"""
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class Governor:
+    """Every request to the RIT API goes through here so the strategies stay under the rate limits
+
+    Orders (POST/DELETE) and reads (GET) are paced by token buckets: order submissions by
+    `order_rate` (1 / RATE_LIMIT, or ORDER_RATE in ALGO2) and every request by `request_rate` if
+    the case limits it. Orders go first: reads wait while an order is waiting for a token. A 429
+    blocks that kind of request for as long as Retry-After (or RIT's "wait") says, or a jittered
+    exponential backoff if it doesn't say. Reads are sent again after server errors and dropped
+    connections, orders aren't (they might have gone through). After `failure_threshold` failures
+    in a row the circuit breaker opens and requests raise CircuitOpen for `reset_timeout` seconds,
+    after which the next request tries the server again.
+    """
+
+    def __init__(self, order_rate=None, request_rate=None, burst=None, max_attempts=8, backoff_base=.05,
+                 backoff_cap=2.0, failure_threshold=5, reset_timeout=1.0):
+        """
+        Args:
+            order_rate (float): orders per second (None for no limit)
+            request_rate (float): requests per second on every endpoint (None for no limit)
+            burst (int): tokens each bucket can save up (the rate by default)
+            max_attempts (int): times a request is sent before its last response is returned
+            backoff_base (float): first backoff delay in seconds
+            backoff_cap (float): longest backoff delay in seconds
+            failure_threshold (int): failures in a row that open the circuit breaker
+            reset_timeout (float): seconds the circuit breaker stays open
+        """
+        self.order_bucket = TokenBucket(order_rate, burst) if order_rate else None
+        self.request_bucket = TokenBucket(request_rate, burst) if request_rate else None
+        self.max_attempts = max_attempts
+        self.backoff = functools.partial(backoff_delay, base=backoff_base, cap=backoff_cap)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.condition = threading.Condition()
+        self.blocked_until = {"order": 0, "read": 0}
+        self.orders_waiting = 0
+        self.failures = 0               # failures in a row
+        self.open_until = 0             # time the circuit breaker closes again
+        self.counters = collections.Counter()
+
+    @staticmethod
+    def kind(method):
+        return "read" if method.upper() == "GET" else "order"
+
+    @staticmethod
+    def takes_order_token(method, url):
+        return method.upper() == "POST" and urlparse(url).path.rstrip("/").endswith("/orders")
+
+    def acquire(self, kind, order_token=False):
+        """Waits until a request of this kind may be sent
+
+        Raises:
+            CircuitOpen: if the circuit breaker is open
+        """
+        with self.condition:
+            if kind == "order":
+                self.orders_waiting += 1
+            started = time.monotonic()
+            waited = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    if now < self.open_until:
+                        self.counters["breaker_rejections"] += 1
+                        raise CircuitOpen(self.open_until - now)
+
+                    # Reads give way to orders
+                    if kind == "read" and self.orders_waiting:
+                        self.counters["read_yields"] += 1
+                        waited = True
+                        self.condition.wait(.01)
+                        continue
+
+                    buckets = [bucket for bucket in (self.request_bucket, self.order_bucket if order_token else None) if bucket]
+                    for bucket in buckets:
+                        bucket.refill(now)
+                    wait = max([self.blocked_until[kind] - now] + [bucket.wait() for bucket in buckets])
+                    if wait <= 0:
+                        for bucket in buckets:
+                            bucket.tokens -= 1
+                        if waited:
+                            self.counters["waits"] += 1
+                            self.counters["wait_time"] += now - started
+                        return
+
+                    waited = True
+                    self.condition.wait(wait)
+            finally:
+                if kind == "order":
+                    self.orders_waiting -= 1
+                    self.condition.notify_all()
+
+    def request(self, send, method, url, *args, **kwargs):
+        """Sends a request through the governor
+
+        Args:
+            send (callable): sends the request, like requests.Session.request
+            method (str): HTTP method
+            url (str): full URL
+
+        Raises:
+            CircuitOpen: if the circuit breaker is open
+            requests.exceptions.ConnectionError: if an order couldn't be sent, or a read failed every attempt
+
+        Returns:
+            requests.Response: the response (the last one if every attempt failed)
+        """
+        kind = self.kind(method)
+        order_token = self.takes_order_token(method, url)
+        attempt = 0
+        while True:
+            self.acquire(kind, order_token)
+            self.counters[kind + "s"] += 1
+            try:
+                response = send(method, url, *args, **kwargs)
+            except requests.exceptions.ConnectionError:
+                self._failed()
+                if kind == "order" or attempt + 1 >= self.max_attempts:
+                    raise
+                attempt = self._retry(attempt)
+                continue
+
+            if response.status_code == 429:
+                self._succeeded()
+                wait = retry_after(response)
+                with self.condition:
+                    self.counters["throttled"] += 1
+                    if order_token:
+                        # Order submissions are limited separately from the reads
+                        self.counters["orders_throttled"] += 1
+                    self.blocked_until[kind] = max(self.blocked_until[kind],
+                                                   time.monotonic() + (wait if wait is not None else self.backoff(attempt)))
+                if attempt + 1 >= self.max_attempts:
+                    return response
+                self.counters["retries"] += 1
+                attempt += 1
+                continue
+
+            if response.status_code >= 500:
+                self._failed()
+                if kind == "order" or attempt + 1 >= self.max_attempts:
+                    return response
+                attempt = self._retry(attempt)
+                continue
+
+            self._succeeded()
+            return response
+
+    def _retry(self, attempt):
+        delay = self.backoff(attempt)
+        self.counters["retries"] += 1
+        self.counters["backoff_time"] += delay
+        time.sleep(delay)
+        return attempt + 1
+
+    def _failed(self):
+        with self.condition:
+            self.counters["failures"] += 1
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                if time.monotonic() >= self.open_until:
+                    self.counters["breaker_trips"] += 1
+                self.open_until = time.monotonic() + self.reset_timeout
+
+    def _succeeded(self):
+        with self.condition:
+            self.failures = 0
+
+    def stats(self):
+        """Gets the counters
+
+        Returns:
+            dict: reads, orders, waits (requests that had to wait), wait_time, read_yields, throttled (429s),
+                orders_throttled (429s on order submissions), retries, backoff_time, failures, breaker_trips,
+                breaker_rejections and breaker_open
+        """
+        with self.condition:
+            stats = {name: self.counters[name] for name in ("reads", "orders", "waits", "wait_time", "read_yields", "throttled",
+                                                            "orders_throttled", "retries", "backoff_time", "failures", "breaker_trips",
+                                                            "breaker_rejections")}
+            stats["breaker_open"] = time.monotonic() < self.open_until
+        return stats
+
+
+class GovernedSession(requests.Session):
+    """requests.Session whose every request goes through a Governor
+
+    The strategies' helpers take a session and call session.get/post/delete directly, so governing
+    the session covers every outbound call without changing them.
+    """
+
+    def __init__(self, governor):
+        super().__init__()
+        self.governor = governor
+
+    def request(self, method, url, *args, **kwargs):
+        return self.governor.request(super().request, method, url, *args, **kwargs)
@@ -0,0 +1,37 @@
+import importlib
+
+
+class LazyImport:
+    """Stands in for a module (or one attribute of it) and only imports it the first time it's used
+
+    Heavy modules like tqdm stay out of the import time of the strategy entry points this way, so a
+    restart mid-case reaches its first API call sooner.
+    """
+
+    __slots__ = ("_module_name", "_attribute", "_target")
+
+    def __init__(self, module_name, attribute=None):
+        """
+        Args:
+            module_name (str): module to import, like "tqdm.auto"
+            attribute (str): attribute of the module to stand in for, like "tqdm" (None for the module)
+        """
+        self._module_name = module_name
+        self._attribute = attribute
+        self._target = None
+
+    def _load(self):
+        if self._target is None:
+            module = importlib.import_module(self._module_name)
+            self._target = getattr(module, self._attribute) if self._attribute else module
+        return self._target
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+
+# tqdm.auto.tqdm, imported the first time a progress bar is made or tqdm.write is called
+tqdm = LazyImport("tqdm.auto", "tqdm")
@@ -0,0 +1,436 @@
+import bisect
+import itertools
+
+
+class EngineException(Exception):
+    pass
+
+
+def market_tickers(securities, markets):
+    """Gets the ticker of every security on every market, named like the RIT client does
+
+    Args:
+        securities (dict): underlying securities (like constants.SECURITIES)
+        markets (dict): markets (like constants.MARKETS)
+
+    Returns:
+        dict: ticker (like CRZY_M, or CRZY if there is one market) to (underlying security, market)
+    """
+    tickers = {}
+    for security in securities.keys():
+        for market in markets.keys():
+            ticker = f"{security}_{market}" if len(markets.keys()) > 1 else security
+            tickers[ticker] = (security, market)
+    return tickers
+
+
+class Order:
+    """One order resting in (or sent to) the matching engine"""
+
+    __slots__ = ("order_id", "period", "tick", "trader_id", "ticker", "type", "quantity", "action",
+                 "price", "quantity_filled", "notional_filled", "status")
+
+    def __init__(self, order_id, tick, trader_id, ticker, type, quantity, action, price):
+        self.order_id = order_id
+        self.period = 1
+        self.tick = tick
+        self.trader_id = trader_id
+        self.ticker = ticker
+        self.type = type
+        self.quantity = quantity
+        self.action = action
+        self.price = price
+        self.quantity_filled = 0
+        self.notional_filled = 0.0
+        self.status = "OPEN"
+
+    @property
+    def remaining(self):
+        return self.quantity - self.quantity_filled
+
+    def to_dict(self):
+        """Gets the order in the same format as the RIT client's /orders and /securities/book"""
+        return {
+            "order_id": self.order_id,
+            "period": self.period,
+            "tick": self.tick,
+            "trader_id": self.trader_id,
+            "ticker": self.ticker,
+            "type": self.type,
+            "quantity": float(self.quantity),
+            "action": self.action,
+            "price": self.price,
+            "quantity_filled": float(self.quantity_filled),
+            "vwap": round(self.notional_filled / self.quantity_filled, 4) if self.quantity_filled else None,
+            "status": self.status,
+        }
+
+
+class Position:
+    """Average cost position of one trader in one ticker"""
+
+    __slots__ = ("position", "vwap", "realized", "volume")
+
+    def __init__(self):
+        self.position = 0
+        self.vwap = 0.0
+        self.realized = 0.0
+        self.volume = 0
+
+    def trade(self, quantity, price, fee):
+        """Books a trade (quantity is positive for buys and negative for sells) and the fee paid on it"""
+        self.volume += abs(quantity)
+        self.realized -= fee
+
+        # Adding to the position (or opening it) moves the average cost
+        if self.position == 0 or (self.position > 0) == (quantity > 0):
+            total = self.position + quantity
+            self.vwap = (self.vwap * self.position + price * quantity) / total
+            self.position = total
+            return
+
+        # Reducing the position realizes profit on the closed part
+        closed = min(abs(quantity), abs(self.position))
+        direction = 1 if self.position > 0 else -1
+        self.realized += closed * (price - self.vwap) * direction
+        self.position += quantity
+
+        # If the trade flipped the position, the rest opens at the trade price
+        if self.position != 0 and (self.position > 0) != (direction > 0):
+            self.vwap = price
+        elif self.position == 0:
+            self.vwap = 0.0
+
+
+class SideBook:
+    """One side of one ticker's book, kept in price-time priority
+
+    Orders are stored in a sorted list keyed by (price key, sequence number), where the price key is
+    the negative price for bids, so the best order is always first.
+    """
+
+    def __init__(self, action):
+        self.action = action
+        self.keys = []
+        self.orders = []
+
+    def _key(self, order, sequence):
+        return (-order.price if self.action == "BUY" else order.price, sequence)
+
+    def add(self, order, sequence):
+        key = self._key(order, sequence)
+        index = bisect.bisect(self.keys, key)
+        self.keys.insert(index, key)
+        self.orders.insert(index, order)
+
+    def remove(self, order):
+        """Removes an order (starting the search at its price level)"""
+        index = bisect.bisect_left(self.keys, (self._key(order, 0)[0],))
+        while index < len(self.orders):
+            if self.orders[index] is order:
+                del self.keys[index]
+                del self.orders[index]
+                return True
+            index += 1
+        return False
+
+    def best(self):
+        return self.orders[0] if self.orders else None
+
+    def pop_best(self):
+        del self.keys[0]
+        return self.orders.pop(0)
+
+    def crosses(self, order):
+        """Checks if an incoming order on the other side can trade with the best order on this side"""
+        best = self.best()
+        if best is None:
+            return False
+        if order.type == "MARKET":
+            return True
+        return order.price >= best.price if self.action == "SELL" else order.price <= best.price
+
+
+class MatchingEngine:
+    """Price-time priority matching engine for the securities of a case on every market
+
+    Each market charges its MARKET_COST per share to the order that takes liquidity and its
+    LIMIT_COST per share to the resting order. Tenders are offered to the traders and are booked at
+    their price when accepted.
+    """
+
+    def __init__(self, securities, markets, trading_limits, ticks=300, start_tick=1):
+        """
+        Args:
+            securities (dict): like constants.SECURITIES ({"CRZY": {"VOLITILITY": .07, "START_PRICE": 10}})
+            markets (dict): like constants.MARKETS ({"M": {"LIMIT_COST": 0, "MARKET_COST": .07}})
+            trading_limits (dict): like constants.TRADING_LIMITS
+            ticks (int): number of ticks in the case
+            start_tick (int): tick the case starts at
+        """
+        self.securities = securities
+        self.markets = markets
+        self.trading_limits = trading_limits
+        self.ticks = ticks
+        self.tick = start_tick
+        self.tickers = market_tickers(securities, markets)
+
+        self.order_ids = itertools.count(1)
+        self.sequence = itertools.count()
+        self.tender_ids = itertools.count(1)
+        self.books = {ticker: {"BUY": SideBook("BUY"), "SELL": SideBook("SELL")} for ticker in self.tickers}
+        self.orders = {}
+        self.positions = {}
+        self.last = {ticker: float(securities[security]["START_PRICE"]) for ticker, (security, market) in self.tickers.items()}
+        self.history = {ticker: [] for ticker in self.tickers}
+        self.current_bar = {ticker: None for ticker in self.tickers}
+        self.tenders = {}
+
+    @property
+    def status(self):
+        return "ACTIVE" if self.tick < self.ticks else "STOPPED"
+
+    def case(self):
+        """Gets the case information like the RIT client's /case"""
+        return {
+            "name": "RIT stand-in",
+            "period": 1,
+            "tick": self.tick,
+            "ticks_per_period": self.ticks,
+            "total_periods": 1,
+            "status": self.status,
+            "is_enforce_trading_limits": True,
+        }
+
+    def get_position(self, trader_id, ticker):
+        if (trader_id, ticker) not in self.positions:
+            self.positions[(trader_id, ticker)] = Position()
+        return self.positions[(trader_id, ticker)]
+
+    def _fee(self, ticker, taker):
+        market = self.markets[self.tickers[ticker][1]]
+        return market["MARKET_COST"] if taker else market["LIMIT_COST"]
+
+    def _check_limits(self, trader_id, ticker, quantity, action):
+        """Raises an EngineException if the order would break the trading limits"""
+        if quantity <= 0:
+            raise EngineException("Quantity must be positive")
+
+        # The scripted order flow is not limited
+        if trader_id == "ANON":
+            return
+        if quantity > self.trading_limits["ORDER_LIMIT"]:
+            raise EngineException(f"Order quantity {quantity} is above the order limit of {self.trading_limits['ORDER_LIMIT']}")
+
+        # The security limit is on the position across every market of the underlying security
+        security = self.tickers[ticker][0]
+        change = quantity if action == "BUY" else -quantity
+        net = sum(self.get_position(trader_id, t).position for t, (s, m) in self.tickers.items() if s == security)
+        if abs(net + change) > self.trading_limits["SECURITY_LIMIT"]:
+            raise EngineException(f"Order would put {security} over the security limit")
+        gross = sum(abs(p.position) for (t_id, t), p in self.positions.items() if t_id == trader_id)
+        if gross + quantity > self.trading_limits["GROSS_LIMIT"] and abs(net + change) > abs(net):
+            raise EngineException("Order would go over the gross limit")
+
+    def submit(self, trader_id, ticker, type, quantity, action, price=None):
+        """Submits an order, matching it against the other side of its book
+
+        Args:
+            trader_id (str): who is sending the order ("ANON" for the scripted order flow)
+            ticker (str): ticker including the market (like CRZY_M)
+            type (str): "MARKET" or "LIMIT"
+            quantity (int): number of shares
+            action (str): "BUY" or "SELL"
+            price (float): limit price (only for LIMIT orders)
+
+        Raises:
+            EngineException: if the order is not valid or would break a trading limit
+
+        Returns:
+            Order: the order (its status is TRANSACTED if it fully traded)
+        """
+        if self.status != "ACTIVE":
+            raise EngineException("The case is not running")
+        if ticker not in self.tickers:
+            raise EngineException(f"Unknown ticker {ticker}")
+        if action not in ("BUY", "SELL") or type not in ("MARKET", "LIMIT"):
+            raise EngineException("Orders must be a BUY or SELL and a MARKET or LIMIT order")
+        if type == "LIMIT" and price is None:
+            raise EngineException("LIMIT orders need a price")
+        self._check_limits(trader_id, ticker, quantity, action)
+
+        order = Order(next(self.order_ids), self.tick, trader_id, ticker, type, quantity, action,
+                      round(float(price), 2) if type == "LIMIT" else None)
+        self.orders[order.order_id] = order
+
+        other_side = self.books[ticker]["SELL" if action == "BUY" else "BUY"]
+        while order.remaining > 0 and other_side.crosses(order):
+            resting = other_side.best()
+            self._trade(ticker, order, resting, min(order.remaining, resting.remaining), resting.price)
+            if resting.remaining == 0:
+                resting.status = "TRANSACTED"
+                other_side.pop_best()
+
+        if order.remaining == 0:
+            order.status = "TRANSACTED"
+        elif type == "MARKET":
+            # Whatever a market order could not fill is cancelled
+            order.quantity = order.quantity_filled
+            order.status = "TRANSACTED" if order.quantity_filled else "CANCELLED"
+        else:
+            self.books[ticker][action].add(order, next(self.sequence))
+
+        if order.type == "MARKET" and order.quantity_filled:
+            order.price = round(order.notional_filled / order.quantity_filled, 2)
+        return order
+
+    def _trade(self, ticker, taker, maker, quantity, price):
+        """Fills quantity between the incoming and the resting order at the resting price"""
+        for order, is_taker in ((taker, True), (maker, False)):
+            order.quantity_filled += quantity
+            order.notional_filled += quantity * price
+            signed = quantity if order.action == "BUY" else -quantity
+            self.get_position(order.trader_id, ticker).trade(signed, price, quantity * self._fee(ticker, is_taker))
+
+        self.last[ticker] = price
+        bar = self.current_bar[ticker]
+        if bar is None:
+            self.current_bar[ticker] = {"tick": self.tick, "open": price, "high": price, "low": price, "close": price}
+        else:
+            bar["high"] = max(bar["high"], price)
+            bar["low"] = min(bar["low"], price)
+            bar["close"] = price
+
+    def cancel(self, order_id, trader_id=None):
+        """Cancels an open order
+
+        Args:
+            order_id (int): order to cancel
+            trader_id (str): if given, only cancel the order if it belongs to this trader
+
+        Returns:
+            bool: if the order was open and is now cancelled
+        """
+        order = self.orders.get(order_id)
+        if order is None or order.status != "OPEN" or (trader_id is not None and order.trader_id != trader_id):
+            return False
+        self.books[order.ticker][order.action].remove(order)
+        order.status = "CANCELLED"
+        return True
+
+    def book(self, ticker, limit=None):
+        """Gets the open orders of a ticker like the RIT client's /securities/book
+
+        Returns:
+            dict: {"bids": [orders], "asks": [orders]} with the best orders first
+        """
+        if ticker not in self.tickers:
+            raise EngineException(f"Unknown ticker {ticker}")
+        bids = self.books[ticker]["BUY"].orders
+        asks = self.books[ticker]["SELL"].orders
+        if limit is not None:
+            bids = bids[:limit]
+            asks = asks[:limit]
+        return {"bids": [order.to_dict() for order in bids], "asks": [order.to_dict() for order in asks]}
+
+    def trader_orders(self, trader_id, status=None):
+        """Gets a trader's orders like the RIT client's /orders (only OPEN orders if no status is given)"""
+        status = status or "OPEN"
+        return [order.to_dict() for order in self.orders.values() if order.trader_id == trader_id and order.status == status]
+
+    def security(self, trader_id, ticker):
+        """Gets a ticker's market data and a trader's position like one entry of the RIT client's /securities"""
+        position = self.get_position(trader_id, ticker)
+        security, market = self.tickers[ticker]
+        bids = self.books[ticker]["BUY"]
+        asks = self.books[ticker]["SELL"]
+        last = self.last[ticker]
+        return {
+            "ticker": ticker,
+            "type": "STOCK",
+            "size": 1,
+            "position": float(position.position),
+            "vwap": position.vwap,
+            "nlv": position.position * last,
+            "last": last,
+            "bid": bids.best().price if bids.best() else 0,
+            "bid_size": float(bids.best().remaining) if bids.best() else 0,
+            "ask": asks.best().price if asks.best() else 0,
+            "ask_size": float(asks.best().remaining) if asks.best() else 0,
+            "volume": float(position.volume),
+            "unrealized": position.position * (last - position.vwap),
+            "realized": position.realized,
+            "start_price": float(self.securities[security]["START_PRICE"]),
+            "trading_fee": self.markets[market]["MARKET_COST"],
+            "limit_order_rebate": -self.markets[market]["LIMIT_COST"],
+            "max_trade_size": self.trading_limits["ORDER_LIMIT"],
+        }
+
+    def price_history(self, ticker, limit=None):
+        """Gets the OHLC history of a ticker (newest tick first) like the RIT client's /securities/history"""
+        if ticker not in self.tickers:
+            raise EngineException(f"Unknown ticker {ticker}")
+        bars = list(reversed(self.history[ticker]))
+        if self.current_bar[ticker] is not None:
+            bars.insert(0, dict(self.current_bar[ticker]))
+        return bars[:limit] if limit is not None else bars
+
+    def add_tender(self, ticker, action, quantity, price, expires_in, caption="", is_fixed_bid=True):
+        """Offers a tender to every trader
+
+        Returns:
+            dict: the tender like the RIT client's /tenders
+        """
+        tender = {
+            "tender_id": next(self.tender_ids),
+            "period": 1,
+            "tick": self.tick,
+            "expires": self.tick + expires_in,
+            "caption": caption,
+            "quantity": float(quantity),
+            "action": action,
+            "is_fixed_bid": is_fixed_bid,
+            "price": round(price, 2) if price is not None else None,
+            "ticker": ticker,
+        }
+        self.tenders[tender["tender_id"]] = tender
+        return tender
+
+    def accept_tender(self, trader_id, tender_id, price=None):
+        """Accepts a tender, booking its whole quantity at the tender price
+
+        Raises:
+            EngineException: if the tender does not exist or a competitive tender has no price
+        """
+        tender = self.tenders.get(tender_id)
+        if tender is None:
+            raise EngineException(f"Tender {tender_id} does not exist")
+        if not tender["is_fixed_bid"] and price is None:
+            raise EngineException("Competitive tenders need a price")
+        price = tender["price"] if tender["is_fixed_bid"] else float(price)
+        quantity = tender["quantity"] if tender["action"] == "BUY" else -tender["quantity"]
+        self.get_position(trader_id, tender["ticker"]).trade(int(quantity), price, 0)
+        del self.tenders[tender_id]
+
+    def decline_tender(self, tender_id):
+        """Declines a tender
+
+        Returns:
+            bool: if the tender existed
+        """
+        return self.tenders.pop(tender_id, None) is not None
+
+    def advance_tick(self):
+        """Moves the case to the next tick, closing the tick's bars and expiring tenders"""
+        for ticker in self.tickers:
+            bar = self.current_bar[ticker]
+            if bar is None:
+                last = self.last[ticker]
+                bar = {"tick": self.tick, "open": last, "high": last, "low": last, "close": last}
+            self.history[ticker].append(bar)
+            self.current_bar[ticker] = None
+
+        self.tick += 1
+        for tender_id, tender in list(self.tenders.items()):
+            if tender["expires"] < self.tick:
+                del self.tenders[tender_id]
@@ -0,0 +1,90 @@
+import math
+import random
+
+
+class ScriptedOrderFlow:
+    """Reproducible ANON order flow for the matching engine
+
+    Every tick, each security's fair price takes a random walk step sized by its VOLITILITY. On every
+    market, ANON limit orders are posted around the fair price (like the orders in LT4/old_code/book.json),
+    old ANON orders are cancelled, and some ANON market orders take liquidity. Every so often a tender
+    is offered. The same seed always gives the same flow.
+    """
+
+    def __init__(self, engine, seed=0, orders_per_tick=6, order_sizes=(1000, 2500, 5000, 7000),
+                 market_orders_per_tick=1, order_lifetime=5, tender_every=15, tender_edge=.05):
+        """
+        Args:
+            engine (MatchingEngine): the engine to send orders to
+            seed (int): seed of the random numbers
+            orders_per_tick (int): ANON limit orders posted on each side of each market every tick
+            order_sizes (tuple of ints): sizes the ANON orders are picked from
+            market_orders_per_tick (int): ANON market orders sent to each market every tick
+            order_lifetime (int): ticks before an ANON limit order is cancelled
+            tender_every (int): ticks between tenders (0 for no tenders)
+            tender_edge (float): how far (as a fraction of the price) a tender can be from the fair price
+        """
+        self.engine = engine
+        self.random = random.Random(seed)
+        self.orders_per_tick = orders_per_tick
+        self.order_sizes = order_sizes
+        self.market_orders_per_tick = market_orders_per_tick
+        self.order_lifetime = order_lifetime
+        self.tender_every = tender_every
+        self.tender_edge = tender_edge
+        self.fair_price = {security: float(info["START_PRICE"]) for security, info in engine.securities.items()}
+        self.anon_orders = []
+
+    def step(self):
+        """Sends one tick of order flow (call it once per tick, before advance_tick)"""
+        engine = self.engine
+        tick = engine.tick
+
+        # Cancel ANON orders that have been resting too long
+        still_resting = []
+        for order in self.anon_orders:
+            if order.status != "OPEN":
+                continue
+            if tick - order.tick >= self.order_lifetime:
+                engine.cancel(order.order_id)
+            else:
+                still_resting.append(order)
+        self.anon_orders = still_resting
+
+        for security, info in engine.securities.items():
+            # Random walk of the fair price, with each tick being 1 / TICKS of the case volatility
+            step = info["VOLITILITY"] * self.random.gauss(0, 1) / math.sqrt(engine.ticks)
+            self.fair_price[security] = max(.01, self.fair_price[security] * (1 + step))
+            fair = self.fair_price[security]
+
+            for ticker, (ticker_security, market) in engine.tickers.items():
+                if ticker_security != security:
+                    continue
+
+                # Limit orders a few cents around the fair price
+                for _ in range(self.orders_per_tick):
+                    for action in ("BUY", "SELL"):
+                        offset = .01 * self.random.randint(1, 10)
+                        price = round(fair - offset if action == "BUY" else fair + offset, 2)
+                        order = engine.submit("ANON", ticker, "LIMIT", self.random.choice(self.order_sizes), action, price)
+                        if order.status == "OPEN":
+                            self.anon_orders.append(order)
+
+                # Market orders that take liquidity from whoever is at the top of the book
+                for _ in range(self.market_orders_per_tick):
+                    action = self.random.choice(("BUY", "SELL"))
+                    engine.submit("ANON", ticker, "MARKET", self.random.choice(self.order_sizes) // 5, action)
+
+        if self.tender_every and tick % self.tender_every == 0:
+            self._offer_tender()
+
+    def _offer_tender(self):
+        """Offers a fixed bid tender a little away from the fair price"""
+        engine = self.engine
+        ticker, (security, market) = self.random.choice(list(engine.tickers.items()))
+        action = self.random.choice(("BUY", "SELL"))
+        edge = self.random.uniform(-self.tender_edge, self.tender_edge)
+        quantity = self.random.choice((10000, 20000, 40000, 60000))
+        price = self.fair_price[security] * (1 + edge)
+        engine.add_tender(ticker, action, quantity, price, expires_in=30,
+                          caption=f"A client wants to {action.lower()} {quantity} shares of {security}")
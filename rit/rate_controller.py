@@ -0,0 +1,160 @@
+import collections
+import threading
+import time
+
+
+class RateController:
+    """Paces order submissions to hold a target share of the order rate limit
+
+    Every order response is recorded as accepted, rejected (the order wasn't accepted, like a limit
+    breach) or throttled (429) in a sliding window. Each time the caller asks how long to wait, the
+    pacing rate is steered by how far the accepted orders per second in the window are from the
+    target (`utilization` of the limit), so time lost to queueing and slow responses is made up
+    instead of being added on top of a fixed sleep. A throttle means the real limit is lower than
+    the one we were given: the estimate of the limit drops to the rate that got throttled and the
+    pacing rate is cut, then both creep back up while nothing is throttled.
+
+    Several loops can pace on one controller (from their own threads), each asking for its `share`
+    of the pacing rate. The achieved rate counts all of them, so when one loop has nothing to send
+    the others are let go faster.
+    """
+
+    KINDS = ("accepted", "rejected", "throttled")
+
+    def __init__(self, limit, utilization=.9, window=1.0, min_delay=.01, gain=.5, backoff=.7, probe=.05):
+        """
+        Args:
+            limit (float): orders per second the case allows (ORDER_RATE or 1 / RATE_LIMIT)
+            utilization (float): share of the limit to aim for
+            window (float): seconds of responses the achieved rate is measured over
+            min_delay (float): shortest wait between submissions in seconds
+            gain (float): share of the gap between the target and the achieved rate made up on each update
+            backoff (float): the pacing rate is multiplied by this after a throttle
+            probe (float): share the limit estimate grows by per second without throttles
+        """
+        self.limit = limit
+        self.utilization = utilization
+        self.window = window
+        self.min_delay = min_delay
+        self.gain = gain
+        self.backoff = backoff
+        self.probe = probe
+
+        self.ceiling = limit                # estimate of the real limit
+        self.rate = limit * utilization     # orders per second we pace to
+        self.events = collections.deque()   # (monotonic time, kind, count)
+        self.in_window = dict.fromkeys(self.KINDS, 0)
+        self.totals = dict.fromkeys(self.KINDS, 0)
+        self.last_trimmed = None            # monotonic time of the last accepted batch that left the window
+        self.throttles_seen = 0             # throttles already steered on
+        self.started = time.monotonic()
+        self.updated = self.started
+        self.lock = threading.RLock()
+
+    def record(self, kind, count=1, now=None):
+        """Records order responses
+
+        Args:
+            kind (str): "accepted", "rejected" or "throttled"
+            count (int): number of responses
+            now (float): monotonic time of the responses (now by default)
+        """
+        if not count:
+            return
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self.events.append((now, kind, count))
+            self.in_window[kind] += count
+            self.totals[kind] += count
+
+    def record_throttles(self, throttled):
+        """Records the throttled orders a Governor retried on its own
+
+        Args:
+            throttled (int): the governor's "orders_throttled" counter (429s on reads don't say anything about the order limit)
+        """
+        with self.lock:
+            if throttled > self.totals["throttled"]:
+                self.record("throttled", throttled - self.totals["throttled"])
+
+    def _trim(self, now):
+        while self.events and self.events[0][0] < now - self.window:
+            when, kind, count = self.events.popleft()
+            self.in_window[kind] -= count
+            if kind == "accepted":
+                self.last_trimmed = when
+
+    def achieved(self, now=None):
+        """Accepted orders per second over the time the window's accepted orders took
+
+        Orders go out in batches (like a quote pair), so counting every batch in the window over the
+        window reads high by one batch. Each batch is instead counted over the time since the batch
+        before it: the window's accepted orders over the time since the last accepted batch that left
+        the window (never less than the window, so it is low for the first window, which only raises
+        the pacing rate, and time with nothing to send counts).
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self._trim(now)
+            span = self.window if self.last_trimmed is None else max(now - self.last_trimmed, self.window)
+            return self.in_window["accepted"] / span
+
+    def target(self):
+        """Accepted orders per second we aim for"""
+        return self.ceiling * self.utilization
+
+    def update(self, now=None):
+        """Steers the pacing rate from what happened in the window
+
+        Returns:
+            float: the pacing rate in orders per second
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            achieved = self.achieved(now)
+            elapsed, self.updated = now - self.updated, now
+            if self.totals["throttled"] > self.throttles_seen:
+                # Throttled: the real limit is at most what we were doing (once there is a whole window to go by)
+                self.throttles_seen = self.totals["throttled"]
+                if now - self.started >= self.window:
+                    self.ceiling = max(min(self.ceiling, achieved), self.limit * .1)
+                self.rate = max(self.rate * self.backoff, self.limit * .05)
+            else:
+                if not self.in_window["throttled"]:
+                    self.ceiling = min(self.limit, self.ceiling * (1 + self.probe * elapsed))
+                self.rate += self.gain * (self.target() - achieved)
+                self.rate = min(max(self.rate, self.limit * .05), self.ceiling)
+            return self.rate
+
+    def delay(self, orders, elapsed=0.0, share=1.0):
+        """Seconds to wait after sending orders so the pacing rate is kept
+
+        Args:
+            orders (int): orders just sent
+            elapsed (float): seconds the sending took
+            share (float): share of the pacing rate this caller gets (1 / the loops pacing on this controller)
+
+        Returns:
+            float: seconds to sleep (at least min_delay)
+        """
+        rate = self.update()
+        return max(orders / (rate * share) - elapsed, self.min_delay)
+
+    def stats(self):
+        """Gets the achieved rate, the headroom left under the limit and the response counts
+
+        Returns:
+            dict: achieved, target, rate, ceiling, headroom (orders per second), utilization (of the limit
+                estimate), window (responses by kind in the window) and totals (responses by kind)
+        """
+        achieved = self.achieved()
+        return {
+            "achieved": achieved,
+            "target": self.target(),
+            "rate": self.rate,
+            "ceiling": self.ceiling,
+            "headroom": max(self.ceiling - achieved, 0.0),
+            "utilization": achieved / self.ceiling,
+            "window": dict(self.in_window),
+            "totals": dict(self.totals),
+        }
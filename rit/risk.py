@@ -0,0 +1,232 @@
+import collections
+import threading
+import time
+from rit.stats import LatencyHistogram
+
+
+def underlying(ticker):
+    """Underlying security of a ticker (CRZY for CRZY_M, ALGO for ALGO)"""
+    return ticker.split("_")[0]
+
+
+class Exposure:
+    """Net position and resting quantity of one underlying security (every market of it together)"""
+
+    __slots__ = ("net", "pending")
+
+    def __init__(self):
+        self.net = 0
+        self.pending = {"BUY": 0, "SELL": 0}   # quantity of the open orders on each side still to fill
+
+
+class RiskGate:
+    """Pre-trade checks of orders against the case's TRADING_LIMITS in constant time
+
+    The exposure every check needs is kept up to date as the strategy's orders change instead of
+    being summed from the portfolio for each check: each order response (the submit, then every
+    later update of it) adds its change in quantity_filled to the position of its ticker and to the
+    net position of its underlying security, and takes it off the security's pending quantity on
+    that side. An order that is no longer open, or whose cancel was confirmed, gives back the
+    pending quantity it had left (fills it got before the cancel are still counted when its final
+    state is seen). Orders are remembered until forget() so a response seen again doesn't count
+    its fills twice. Gross is the sum of the absolute positions of every ticker (like
+    RIT counts it) and is moved by the change in the absolute position of the ticker that filled.
+
+    A check assumes the worst: every open order on the order's side fills along with it. It is
+    rejected if
+        the kill switch is on
+        the order is larger than ORDER_LIMIT
+        the security's net position could go over SECURITY_LIMIT
+        it adds to its ticker's absolute position (gross is per ticker, so selling CRZY_A against a long
+            CRZY_M adds to it) and gross plus every pending quantity could go over GROSS_LIMIT
+    Limits missing from trading_limits aren't checked. Orders that only reduce risk (like
+    flattening what is left of an arbitrage) don't need a check. The time of every check goes
+    in a latency histogram.
+    """
+
+    def __init__(self, trading_limits, security_of=underlying):
+        """
+        Args:
+            trading_limits (dict): like constants.TRADING_LIMITS (SECURITY_LIMIT, GROSS_LIMIT and ORDER_LIMIT)
+            security_of (callable): underlying security of a ticker, the SECURITY_LIMIT is on its net position
+        """
+        self.security_limit = trading_limits.get("SECURITY_LIMIT")
+        self.gross_limit = trading_limits.get("GROSS_LIMIT")
+        self.order_limit = trading_limits.get("ORDER_LIMIT")
+        self.security_of = security_of
+
+        self.positions = {}         # ticker to position
+        self.exposures = {}         # security to Exposure
+        self.orders = {}            # order id to [ticker, action, quantity_filled, pending quantity left]
+        self.gross = 0
+        self.pending = 0            # pending quantity of every open order
+        self.killed = None          # why the kill switch was turned on (None while it is off)
+        self.lock = threading.Lock()
+
+        self.latency = LatencyHistogram()
+        self.approved = 0
+        self.rejected = collections.Counter()   # reason to rejections
+        self.last_rejection = None
+
+    @staticmethod
+    def _sign(action):
+        return 1 if action == "BUY" else -1
+
+    def _exposure(self, ticker):
+        security = self.security_of(ticker)
+        exposure = self.exposures.get(security)
+        if exposure is None:
+            exposure = self.exposures[security] = Exposure()
+        return exposure
+
+    # Exposure updates
+
+    def _move(self, ticker, change):
+        # The caller holds the lock
+        position = self.positions.get(ticker, 0)
+        self.positions[ticker] = position + change
+        self.gross += abs(position + change) - abs(position)
+        self._exposure(ticker).net += change
+
+    def _release(self, record):
+        ticker, action, filled, left = record
+        self._exposure(ticker).pending[action] -= left
+        self.pending -= left
+        record[3] = 0
+
+    def update(self, order):
+        """Updates the exposure from an order response (a new order or a later state of one)
+
+        Args:
+            order (dict): the order as the API returns it (order_id, ticker, action, quantity, quantity_filled, status)
+        """
+        with self.lock:
+            record = self.orders.get(order["order_id"])
+            if record is None:
+                left = order["quantity"]
+                record = self.orders[order["order_id"]] = [order["ticker"], order["action"], 0, left]
+                self._exposure(order["ticker"]).pending[order["action"]] += left
+                self.pending += left
+
+            ticker, action, filled, left = record
+            change = order.get("quantity_filled", 0) - filled
+            if change > 0:
+                self._move(ticker, self._sign(action) * change)
+                record[2] += change
+                # Only what was still pending comes off it (nothing after a confirmed cancel)
+                taken = min(change, left)
+                record[3] -= taken
+                self._exposure(ticker).pending[action] -= taken
+                self.pending -= taken
+            if order.get("status", "OPEN") != "OPEN":
+                self._release(record)
+
+    def cancelled(self, order_id):
+        """Gives back what an order had left once its cancel is confirmed"""
+        with self.lock:
+            record = self.orders.get(order_id)
+            if record is not None:
+                self._release(record)
+
+    def forget(self, order_id):
+        """Drops an order whose final state has been seen (what it had left is given back)"""
+        with self.lock:
+            record = self.orders.pop(order_id, None)
+            if record is not None:
+                self._release(record)
+
+    def sync(self, positions):
+        """Sets positions read from the API (only the tickers that changed are touched)
+
+        Args:
+            positions (dict): ticker to position
+        """
+        with self.lock:
+            for ticker, position in positions.items():
+                change = position - self.positions.get(ticker, 0)
+                if change:
+                    self._move(ticker, change)
+
+    # Checks
+
+    def _reason(self, ticker, action, quantity, split, batch):
+        # The caller holds the lock. batch is the quantity on each (security, side) and in total
+        # approved earlier in the same check_all
+        if self.killed is not None:
+            return "killed"
+        if self.order_limit is not None and not split and quantity > self.order_limit:
+            return "ORDER_LIMIT"
+        exposure = self._exposure(ticker)
+        sign = self._sign(action)
+        key = (self.security_of(ticker), action)
+        worst = exposure.net + sign * (exposure.pending[action] + batch.get(key, 0) + quantity)
+        if self.security_limit is not None and abs(worst) > self.security_limit:
+            return "SECURITY_LIMIT"
+        position = self.positions.get(ticker, 0)
+        if (self.gross_limit is not None and abs(position + sign * quantity) > abs(position)
+                and self.gross + self.pending + batch.get(None, 0) + quantity > self.gross_limit):
+            return "GROSS_LIMIT"
+        batch[key] = batch.get(key, 0) + quantity
+        batch[None] = batch.get(None, 0) + quantity
+        return None
+
+    def check_all(self, orders, split=False):
+        """Approves or rejects orders that go out together (all of them or none)
+
+        Args:
+            orders (list of tuples): (ticker, action, quantity) of each order
+            split (bool): the quantities are sent as several orders or taken as tenders (ORDER_LIMIT isn't checked)
+
+        Returns:
+            bool: True if every order may be sent
+        """
+        start = time.perf_counter()
+        reason = None
+        with self.lock:
+            batch = {}
+            for ticker, action, quantity in orders:
+                reason = self._reason(ticker, action, quantity, split, batch)
+                if reason is not None:
+                    self.rejected[reason] += 1
+                    self.last_rejection = f"{reason}: {action} {quantity} {ticker}"
+                    break
+            else:
+                self.approved += 1
+        self.latency.record(time.perf_counter() - start)
+        return reason is None
+
+    def check(self, ticker, action, quantity, split=False):
+        """Approves or rejects one order
+
+        Args:
+            ticker (str): ticker including the market if there is more than one (like CRZY_M)
+            action (str): "BUY" or "SELL"
+            quantity (int): number of shares
+            split (bool): the quantity is sent as several orders or taken as a tender (ORDER_LIMIT isn't checked)
+
+        Returns:
+            bool: True if the order may be sent
+        """
+        return self.check_all([(ticker, action, quantity)], split)
+
+    # Kill switch
+
+    def kill(self, reason="kill switch"):
+        """Rejects every check from now on (orders that only reduce risk can still be sent unchecked)"""
+        self.killed = reason
+
+    def resume(self):
+        """Turns the kill switch off"""
+        self.killed = None
+
+    def stats(self):
+        """Gets the exposure, the checks by outcome and the check latency histogram (ms)
+
+        Returns:
+            dict: gross, pending, net (security to net position), killed, approved, rejected (reason to count),
+                last_rejection and latency (count, average, p50, p90, p99, worst)
+        """
+        return {"gross": self.gross, "pending": self.pending,
+                "net": {security: exposure.net for security, exposure in self.exposures.items()},
+                "killed": self.killed, "approved": self.approved, "rejected": dict(self.rejected),
+                "last_rejection": self.last_rejection, "latency": self.latency.summary()}
@@ -0,0 +1,194 @@
+import time
+
+
+class Job:
+    """A handler registered with the Scheduler and its counters"""
+
+    __slots__ = ("name", "handler", "period", "poll", "changed", "next_run", "last_tick",
+                 "runs", "overruns", "run_time")
+
+    def __init__(self, name, handler, period=None, poll=None, changed=None):
+        self.name = name
+        self.handler = handler
+        self.period = period        # seconds between runs (None to run once every tick)
+        self.poll = poll            # for on book change jobs, fetches what the handler gets
+        self.changed = changed      # for on book change jobs, tells if the fetched result changed
+        self.next_run = 0
+        self.last_tick = None       # tick the handler last ran on
+        self.runs = 0
+        self.overruns = 0           # runs that took longer than the job's period
+        self.run_time = 0.0
+
+    def stats(self):
+        return {"runs": self.runs, "overruns": self.overruns, "run_time": self.run_time}
+
+
+class Scheduler:
+    """Runs handlers at tick boundaries, every N ms or when the book changes, instead of busy polling
+
+    The case is polled through /case, which is cheap, and the time between polls adapts to when the
+    next tick is expected: slow right after a tick starts and fast as the next one gets close. The
+    tick length is learned from the tick boundaries seen. Handlers run on the thread calling run().
+
+    Cadences:
+        every_tick: once at the start of every tick
+        every: every N ms while the case is active
+        on_change: polls something (like the books) every N ms and runs when it changed, and at
+            least once a tick so nothing waits longer than a tick
+
+    Counters:
+        missed_ticks: ticks that started and ended between two polls of the case
+        overruns: handler runs that took longer than their period (the tick length for every tick)
+    """
+
+    def __init__(self, get_case, tick_seconds=1.0, min_interval=.005, max_interval=.1):
+        """
+        Args:
+            get_case (callable): returns the /case response (a dict with "tick" and "status")
+            tick_seconds (float): first guess of the length of a tick (1 / SPEED)
+            min_interval (float): shortest time between polls of the case in seconds
+            max_interval (float): longest time between polls of the case in seconds
+        """
+        self.get_case = get_case
+        self.tick_seconds = tick_seconds
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+        self.jobs = []
+        self.case = None
+        self.tick = None
+        self.tick_started = None    # time the current tick was first seen
+        self.next_case_poll = 0
+        self.running = False
+
+        self.case_polls = 0
+        self.ticks = 0
+        self.missed_ticks = 0
+        self.overruns = 0
+        self.idle_time = 0.0
+
+    # Registering handlers
+
+    def every_tick(self, handler, name=None):
+        """Runs handler(tick) once at the start of every tick"""
+        return self._add(Job(name or handler.__name__, handler))
+
+    def every(self, milliseconds, handler, name=None):
+        """Runs handler(tick) every milliseconds while the case is active"""
+        return self._add(Job(name or handler.__name__, handler, period=milliseconds / 1000))
+
+    def on_change(self, poll, handler, milliseconds=50, changed=bool, name=None):
+        """Runs handler(tick, result) when what poll() returns changed (and at least once a tick)
+
+        Args:
+            poll (callable): fetches the thing to watch, like the books
+            handler (callable): called with the tick and what poll returned
+            milliseconds (float): time between polls
+            changed (callable): gets what poll returned and tells if it changed
+            name (str): name for the stats (the handler's name by default)
+        """
+        return self._add(Job(name or handler.__name__, handler, period=milliseconds / 1000, poll=poll, changed=changed))
+
+    def _add(self, job):
+        self.jobs.append(job)
+        return job
+
+    # Running
+
+    def stop(self):
+        """Stops run() after the handler that is running returns"""
+        self.running = False
+
+    def run(self, until=None):
+        """Polls the case and runs the handlers that are due until stop() is called
+
+        Args:
+            until (callable): gets the /case response and returns True to stop (runs forever if None)
+        """
+        self.running = True
+        while self.running:
+            now = time.monotonic()
+
+            if now >= self.next_case_poll:
+                self._poll_case(now)
+                if until is not None and until(self.case):
+                    break
+
+            if self.case["status"] == "ACTIVE":
+                for job in self.jobs:
+                    if not self.running:
+                        break
+                    if job.period is not None and time.monotonic() >= job.next_run:
+                        self._run_timed(job)
+
+            wait = min([self.next_case_poll] + [job.next_run for job in self.jobs if job.period is not None]) - time.monotonic()
+            if wait > 0:
+                self.idle_time += wait
+                time.sleep(wait)
+        self.running = False
+
+    def _poll_case(self, now):
+        self.case = self.get_case()
+        self.case_polls += 1
+        tick = self.case["tick"]
+
+        if tick != self.tick:
+            if self.tick is not None and tick > self.tick:
+                self.missed_ticks += tick - self.tick - 1
+                # Learn the tick length from whole ticks seen (a tick can start anywhere between two polls)
+                if self.tick_started is not None and tick == self.tick + 1:
+                    self.tick_seconds = .8 * self.tick_seconds + .2 * (now - self.tick_started)
+            self.tick = tick
+            self.tick_started = now
+            self.ticks += 1
+            if self.case["status"] == "ACTIVE":
+                for job in self.jobs:
+                    if job.period is None and self.running:
+                        self._run(job, job.handler, tick, limit=self.tick_seconds)
+
+        # Poll slowly at the start of a tick and quickly once the next one is close
+        if self.case["status"] != "ACTIVE":
+            interval = self.max_interval
+        else:
+            remaining = self.tick_started + self.tick_seconds - time.monotonic()
+            interval = min(max(remaining / 2, self.min_interval), self.max_interval)
+        self.next_case_poll = time.monotonic() + interval
+
+    def _run_timed(self, job):
+        # Catch up from now rather than running a burst of late runs
+        job.next_run = max(job.next_run + job.period, time.monotonic())
+        if job.poll is None:
+            self._run(job, job.handler, self.tick, limit=job.period)
+            return
+
+        start = time.perf_counter()
+        result = job.poll()
+        if job.changed(result) or job.last_tick != self.tick:
+            self._run(job, job.handler, self.tick, result, limit=job.period, start=start)
+
+    def _run(self, job, handler, *args, limit, start=None):
+        start = start if start is not None else time.perf_counter()
+        job.last_tick = self.tick
+        handler(*args)
+        elapsed = time.perf_counter() - start
+        job.runs += 1
+        job.run_time += elapsed
+        if elapsed > limit:
+            job.overruns += 1
+            self.overruns += 1
+
+    def stats(self):
+        """Gets the counters of the scheduler and of each handler
+
+        Returns:
+            dict: case_polls, ticks, missed_ticks, overruns, idle_time, tick_seconds and jobs (name to counters)
+        """
+        return {
+            "case_polls": self.case_polls,
+            "ticks": self.ticks,
+            "missed_ticks": self.missed_ticks,
+            "overruns": self.overruns,
+            "idle_time": self.idle_time,
+            "tick_seconds": self.tick_seconds,
+            "jobs": {job.name: job.stats() for job in self.jobs},
+        }
@@ -0,0 +1,322 @@
+"""Local stand-in for the RIT Client REST API, for running the strategies offline
+
+Serves /v1/case, /v1/securities, /v1/securities/book, /v1/securities/history, /v1/orders
+(GET/POST/DELETE), /v1/commands/cancel (POST), /v1/tenders and /v1/tenders/{id} (POST/DELETE) on top
+of the matching engine and the scripted ANON order flow. The case settings come from one of the strategies' constants files:
+
+    python -m rit.server --constants LT4/constants_5.py --seed 1 --rate-limit 20
+
+The strategies talk to http://localhost:9999/v1, which is the default address.
+"""
+import argparse
+import importlib.util
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from rit.matching_engine import EngineException, MatchingEngine
+from rit.order_flow import ScriptedOrderFlow
+
+PLAYER = "player"
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second with bursts of up to `burst` requests"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Takes a token if there is one
+
+        Returns:
+            float: 0 if the request may go ahead, otherwise the seconds until a token is available
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+
+class StandIn:
+    """The engine, order flow and case clock that the request handler serves"""
+
+    def __init__(self, engine, flow, api_key, tick_seconds=1.0, rate_limit=0, order_rate=0):
+        self.engine = engine
+        self.flow = flow
+        self.api_key = api_key
+        self.tick_seconds = tick_seconds
+        self.lock = threading.Lock()
+        self.request_limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.order_limiter = RateLimiter(order_rate) if order_rate else None
+        self.stopped = threading.Event()
+
+    def run_clock(self):
+        """Sends the order flow and advances the tick every tick_seconds until the case ends"""
+        while not self.stopped.is_set():
+            with self.lock:
+                if self.engine.status != "ACTIVE":
+                    return
+                self.flow.step()
+            if self.stopped.wait(self.tick_seconds):
+                return
+            with self.lock:
+                self.engine.advance_tick()
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Strategies stopped with CTRL+C drop their connections, which isn't worth a traceback
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # Headers and body are written separately, which Nagle's algorithm would hold back ~40 ms per request
+    disable_nagle_algorithm = True
+
+    @property
+    def stand_in(self):
+        return self.server.stand_in
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _throttled(self, wait):
+        self._send(429, {"code": "TOO_MANY_REQUESTS", "message": "Rate limit exceeded", "wait": wait},
+                   {"Retry-After": f"{wait:.3f}"})
+
+    def _handle(self, method):
+        url = urlparse(self.path)
+        path = url.path.rstrip("/").split("/")[2:] if url.path.startswith("/v1") else None
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        # The request body isn't used, but it has to be read to keep the connection alive
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        if self.headers.get("X-API-Key") != self.stand_in.api_key:
+            return self._send(401, {"code": "NOT_AUTHORIZED", "message": "API key is not valid"})
+
+        limiter = self.stand_in.request_limiter
+        wait = limiter.acquire() if limiter else 0
+        if wait:
+            return self._throttled(wait)
+
+        if not path:
+            return self._send(404, {"code": "NOT_FOUND", "message": self.path})
+
+        try:
+            status, body = self._route(method, path, query)
+        except EngineException as e:
+            status, body = 400, {"code": "BAD_REQUEST", "message": str(e)}
+        except (KeyError, ValueError) as e:
+            status, body = 400, {"code": "BAD_REQUEST", "message": f"Bad parameter {e}"}
+        if status == 429:
+            return self._throttled(body)
+        self._send(status, body)
+
+    def _route(self, method, path, query):
+        """Runs the request against the engine
+
+        Returns:
+            tuple: (HTTP status, JSON body) or (429, seconds to wait) when orders are throttled
+        """
+        engine = self.stand_in.engine
+        limit = int(query["limit"]) if "limit" in query else None
+
+        with self.stand_in.lock:
+            if method == "GET" and path == ["case"]:
+                return 200, engine.case()
+
+            if method == "GET" and path == ["securities"]:
+                tickers = [query["ticker"]] if "ticker" in query else list(engine.tickers)
+                return 200, [engine.security(PLAYER, ticker) for ticker in tickers]
+
+            if method == "GET" and path == ["securities", "book"]:
+                return 200, engine.book(query["ticker"], limit)
+
+            if method == "GET" and path == ["securities", "history"]:
+                return 200, engine.price_history(query["ticker"], limit)
+
+            if path[0] == "orders":
+                return self._route_orders(method, path, query)
+
+            if method == "POST" and path == ["commands", "cancel"]:
+                return 200, {"cancelled_order_ids": self._bulk_cancel(query)}
+
+            if method == "GET" and path == ["tenders"]:
+                return 200, list(engine.tenders.values())
+
+            if path[0] == "tenders" and len(path) == 2:
+                tender_id = int(path[1])
+                if method == "POST":
+                    engine.accept_tender(PLAYER, tender_id, float(query["price"]) if "price" in query else None)
+                    return 200, {"success": True}
+                if method == "DELETE":
+                    return 200, {"success": engine.decline_tender(tender_id)}
+
+        return 404, {"code": "NOT_FOUND", "message": "/".join(path)}
+
+    def _route_orders(self, method, path, query):
+        engine = self.stand_in.engine
+
+        if method == "GET" and len(path) == 1:
+            return 200, engine.trader_orders(PLAYER, query.get("status"))
+
+        if method == "POST" and len(path) == 1:
+            limiter = self.stand_in.order_limiter
+            wait = limiter.acquire() if limiter else 0
+            if wait:
+                return 429, wait
+            order = engine.submit(PLAYER, query["ticker"], query["type"], int(float(query["quantity"])),
+                                  query["action"], float(query["price"]) if "price" in query else None)
+            return 200, order.to_dict()
+
+        if len(path) == 2:
+            order = engine.orders.get(int(path[1]))
+            if order is None or order.trader_id != PLAYER:
+                return 404, {"code": "NOT_FOUND", "message": f"Order {path[1]} does not exist"}
+            if method == "GET":
+                return 200, order.to_dict()
+            if method == "DELETE":
+                return 200, {"success": engine.cancel(order.order_id, PLAYER)}
+
+        return 404, {"code": "NOT_FOUND", "message": "/".join(path)}
+
+    def _bulk_cancel(self, query):
+        """Cancels our open orders by ids (comma separated), by ticker or all of them, like RIT's
+        /commands/cancel (its query expressions aren't supported)
+
+        Returns:
+            list of ints: ids of the orders that were open and are now cancelled
+        """
+        engine = self.stand_in.engine
+        if "ids" in query:
+            order_ids = [int(order_id) for order_id in query["ids"].split(",") if order_id]
+        elif "ticker" in query or query.get("all") in ("1", "true", "True"):
+            order_ids = [order["order_id"] for order in engine.trader_orders(PLAYER, "OPEN")
+                         if query.get("ticker") in (None, order["ticker"])]
+        else:
+            raise KeyError("ids, ticker or all")
+        return [order_id for order_id in order_ids if engine.cancel(order_id, PLAYER)]
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+def load_constants(path):
+    """Loads one of the strategies' constants files (like LT4/constants_5.py) as a module"""
+    spec = importlib.util.spec_from_file_location("case_constants", path)
+    constants = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(constants)
+    return constants
+
+
+def make_server(constants, host="localhost", port=9999, seed=0, tick_seconds=1.0, rate_limit=0, order_rate=0,
+                start_tick=1, **flow_options):
+    """Builds the stand-in server for a constants profile (call serve_forever to run it)
+
+    Args:
+        constants (module): constants with SECURITIES, MARKETS, TRADING_LIMITS, TICKS and API_KEY
+        host (str): address to listen on
+        port (int): port to listen on (0 picks a free port)
+        seed (int): seed of the ANON order flow
+        tick_seconds (float): real seconds per tick
+        rate_limit (float): requests per second allowed on every endpoint (0 for no limit)
+        order_rate (float): orders per second allowed (0 for no limit)
+        start_tick (int): tick the case starts at
+        **flow_options: passed to ScriptedOrderFlow
+
+    Returns:
+        StandInServer: the server, with the engine and clock on its `stand_in` attribute
+    """
+    engine = MatchingEngine(constants.SECURITIES, constants.MARKETS, constants.TRADING_LIMITS,
+                            ticks=constants.TICKS, start_tick=start_tick)
+    flow = ScriptedOrderFlow(engine, seed=seed, **flow_options)
+    server = StandInServer((host, port), RequestHandler)
+    server.stand_in = StandIn(engine, flow, constants.API_KEY["X-API-Key"], tick_seconds, rate_limit, order_rate)
+    return server
+
+
+def serve_in_background(server):
+    """Starts the clock and the server on daemon threads (handy for benchmarks)
+
+    Returns:
+        function: call it to stop the server
+    """
+    clock = threading.Thread(target=server.stand_in.run_clock, daemon=True)
+    clock.start()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def stop():
+        server.stand_in.stopped.set()
+        server.shutdown()
+        server.server_close()
+    return stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--constants", default="LT4/constants.py", help="constants file with the case settings")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the ANON order flow")
+    parser.add_argument("--tick-seconds", type=float, default=1.0, help="real seconds per tick")
+    parser.add_argument("--rate-limit", type=float, default=0, help="requests per second (0 for no limit)")
+    parser.add_argument("--order-rate", type=float, default=0, help="orders per second (0 for no limit)")
+    parser.add_argument("--start-tick", type=int, default=1)
+    parser.add_argument("--securities", help="comma separated securities traded on one market instead of the "
+                                             "constants file's (ALGO2 trades ALGO)")
+    args = parser.parse_args()
+
+    constants = load_constants(args.constants)
+    if args.securities:
+        constants.SECURITIES = {security: {"VOLITILITY": .07, "START_PRICE": 10} for security in args.securities.split(",")}
+        constants.MARKETS = {"M": {"LIMIT_COST": 0, "MARKET_COST": 0}}
+
+    server = make_server(constants, port=args.port, seed=args.seed,
+                         tick_seconds=args.tick_seconds, rate_limit=args.rate_limit,
+                         order_rate=args.order_rate, start_tick=args.start_tick)
+    print(f"RIT stand-in on http://localhost:{server.server_address[1]}/v1 ({args.constants}, seed {args.seed})")
+    threading.Thread(target=server.stand_in.run_clock, daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stand_in.stopped.set()
+
+
+if __name__ == "__main__":
+    main()
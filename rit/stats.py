@@ -0,0 +1,97 @@
+import math
+from statistics import NormalDist
+
+_STANDARD_NORMAL = NormalDist()
+
+# Quantiles of the standard normal distribution the strategies use, worked out once at import
+QUANTILES = {probability: _STANDARD_NORMAL.inv_cdf(probability)
+             for probability in (.01, .025, .05, .1, .25, .5, .75, .9, .95, .975, .99)}
+
+
+def norm_ppf(probability, loc=0, scale=1):
+    """Quantile of a normal distribution (same as scipy.stats.norm.ppf without importing scipy)
+
+    Args:
+        probability (float): probability to find the quantile for
+        loc (float): mean
+        scale (float): standard deviation
+
+    Returns:
+        float: the quantile (nan if scale isn't positive or probability is outside [0, 1], like scipy)
+    """
+    if not scale > 0 or not 0 <= probability <= 1:
+        return math.nan
+    if probability == 0:
+        return -math.inf
+    if probability == 1:
+        return math.inf
+
+    z = QUANTILES.get(probability)
+    if z is None:
+        z = _STANDARD_NORMAL.inv_cdf(probability)
+    return loc + scale * z
+
+
+class LatencyHistogram:
+    """Histogram of latencies in log-spaced buckets (a few per doubling) from 10 µs to about 10 s
+
+    Recording is one log and one list increment, so it can sit on the hot path. Percentiles are
+    read off the bucket edges, so they are within one bucket width (about 19%) of the real value.
+    """
+
+    def __init__(self, smallest=1e-5, buckets_per_doubling=4, buckets=80):
+        """
+        Args:
+            smallest (float): upper edge of the first bucket in seconds
+            buckets_per_doubling (int): buckets between a latency and twice that latency
+            buckets (int): number of buckets (the last one also holds everything slower)
+        """
+        self.smallest = smallest
+        self.scale = buckets_per_doubling / math.log(2)
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    def record(self, seconds):
+        """Adds one latency in seconds"""
+        bucket = 0 if seconds <= self.smallest else math.ceil(math.log(seconds / self.smallest) * self.scale)
+        self.counts[min(bucket, len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.worst = max(self.worst, seconds)
+
+    def edge(self, bucket):
+        """Upper edge of a bucket in seconds"""
+        return self.smallest * math.exp(bucket / self.scale)
+
+    def percentile(self, percent):
+        """Latency below which percent of the recorded latencies are (upper edge of its bucket)
+
+        Returns:
+            float: seconds (0 if nothing was recorded)
+        """
+        if not self.count:
+            return 0.0
+        target = percent / 100 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return min(self.edge(bucket), self.worst)
+        return self.worst
+
+    def summary(self):
+        """Gets the count, average, p50, p90, p99 and worst latency in milliseconds
+
+        Returns:
+            dict: count and the latencies in ms
+        """
+        return {
+            "count": self.count,
+            "average": self.total / self.count * 1000 if self.count else 0.0,
+            "p50": self.percentile(50) * 1000,
+            "p90": self.percentile(90) * 1000,
+            "p99": self.percentile(99) * 1000,
+            "worst": self.worst * 1000,
+        }
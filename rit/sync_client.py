@@ -0,0 +1,62 @@
+import asyncio
+import functools
+from rit.client import AsyncClient, BASE_URL
+
+
+class Client:
+    """Blocking facade over AsyncClient for the existing while True loops
+
+    Every AsyncClient method is available with the same name and arguments but returns the result
+    directly. `session` is the same pooled requests.Session, so the old helpers that take a session
+    (get_from_api, post_from_api, ...) keep working and can be moved over one call at a time.
+    `gather` runs several calls at the same time from blocking code.
+    """
+
+    def __init__(self, api_key, base_url=BASE_URL, pool_size=16, governor=None):
+        self.async_client = AsyncClient(api_key, base_url, pool_size, governor)
+        self.session = self.async_client.session
+        self.governor = self.async_client.governor
+        self._loop = asyncio.new_event_loop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Closes the connection pool and the event loop"""
+        self.async_client.close()
+        self._loop.close()
+
+    def run(self, coroutine):
+        """Runs one coroutine of the async client to completion"""
+        return self._loop.run_until_complete(coroutine)
+
+    def gather(self, *coroutines, return_exceptions=False):
+        """Runs coroutines of the async client at the same time
+
+        Example:
+            tick, tenders = client.gather(client.async_client.get_tick(), client.async_client.get_tenders())
+
+        Args:
+            return_exceptions (bool): return the exception of a failed call instead of raising it
+
+        Returns:
+            list: the result of each coroutine, in order
+        """
+        async def gather_all():
+            return await asyncio.gather(*coroutines, return_exceptions=return_exceptions)
+        return self.run(gather_all())
+
+    def __getattr__(self, name):
+        if name == "async_client":
+            raise AttributeError(name)
+        method = getattr(self.async_client, name)
+        if not asyncio.iscoroutinefunction(method):
+            return method
+
+        @functools.wraps(method)
+        def blocking(*args, **kwargs):
+            return self.run(method(*args, **kwargs))
+        return blocking